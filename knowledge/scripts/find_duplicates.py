@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Near-duplicate detector: find repeated checklist items and book paragraphs.
+
+Usage:
+    python knowledge/scripts/find_duplicates.py
+    python knowledge/scripts/find_duplicates.py --scope checklists --threshold 0.6
+    python knowledge/scripts/find_duplicates.py --json > duplicates.json
+
+Builds MinHash/LSH signatures over every checklist item and every book/article
+paragraph, then reports clusters of near-duplicates. Only pairs that share an
+LSH bucket are compared, so the run time grows roughly linearly with the size
+of the knowledge base rather than with the number of pairs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "mcp_server" / "src"))
+
+from shudaizi_mcp.book_loader import source_files  # noqa: E402
+from shudaizi_mcp.similarity import (  # noqa: E402
+    DEFAULT_THRESHOLD,
+    NearDuplicateIndex,
+    normalize_item,
+    paragraphs,
+)
+
+
+def index_checklists(index: NearDuplicateIndex, texts: dict) -> None:
+    """Add every checklist bullet, keyed by ("checklist", task_type, line number)."""
+    for f in sorted((PROJECT_ROOT / "knowledge" / "checklists").glob("*.md")):
+        for lineno, line in enumerate(f.read_text(encoding="utf-8").split("\n"), start=1):
+            if line.lstrip().startswith("- "):
+                key = ("checklist", f.stem, lineno)
+                index.add(key, normalize_item(line))
+                texts[key] = line.strip()
+
+
+def index_books(index: NearDuplicateIndex, texts: dict) -> None:
+    """Add every book/article paragraph, keyed by ("book", relative path, paragraph number)."""
+    research_dir = PROJECT_ROOT / "book_research"
+    files = source_files(research_dir) + source_files(research_dir / "anthropic_articles")
+    for _, f in files:
+        rel = str(f.relative_to(PROJECT_ROOT))
+        for n, para in enumerate(paragraphs(f.read_text(encoding="utf-8")), start=1):
+            key = ("book", rel, n)
+            index.add(key, para)
+            texts[key] = para
+
+
+def find_duplicates(scope: str = "all", threshold: float = DEFAULT_THRESHOLD) -> tuple[list[dict], int]:
+    """Return (clusters, number of indexed units) for the chosen scope."""
+    index = NearDuplicateIndex(threshold=threshold)
+    texts: dict = {}
+    if scope in ("all", "checklists"):
+        index_checklists(index, texts)
+    if scope in ("all", "books"):
+        index_books(index, texts)
+
+    clusters = []
+    for group in index.clusters():
+        members = [
+            {
+                "kind": kind,
+                "source": source,
+                "position": position,
+                "text": texts[(kind, source, position)],
+            }
+            for kind, source, position in group
+        ]
+        clusters.append({
+            "size": len(members),
+            "cross_source": len({m["source"] for m in members}) > 1,
+            "members": members,
+        })
+    clusters.sort(key=lambda c: (-c["size"], c["members"][0]["source"]))
+    return clusters, len(index)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report near-duplicate checklist items and paragraphs")
+    parser.add_argument("--scope", choices=["all", "checklists", "books"], default="all")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum word-shingle Jaccard similarity (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--json", action="store_true", help="Emit clusters as JSON")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    clusters, indexed = find_duplicates(args.scope, args.threshold)
+    elapsed = time.monotonic() - start
+
+    if args.json:
+        print(json.dumps({"indexed": indexed, "clusters": clusters}, indent=2, ensure_ascii=False))
+        return
+
+    print(f"\n{'='*60}")
+    print(f"  Shudaizi Near-Duplicate Report (threshold {args.threshold})")
+    print(f"{'='*60}\n")
+
+    for n, cluster in enumerate(clusters, start=1):
+        where = "across sources" if cluster["cross_source"] else "within one source"
+        print(f"Cluster {n} ({cluster['size']} members, {where}):")
+        for m in cluster["members"]:
+            label = f"{m['source']}:{m['position']}"
+            snippet = " ".join(m["text"].split())[:100]
+            print(f"  - [{m['kind']}] {label}: {snippet}")
+        print()
+
+    duplicates = sum(c["size"] - 1 for c in clusters)
+    print(f"Total: {indexed} units indexed, {len(clusters)} clusters, "
+          f"{duplicates} redundant units ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Opt-in structured access log — one JSON line per sampled tool call.
+
+Enabled by setting SHUDAIZI_ACCESS_LOG to a file path. SHUDAIZI_ACCESS_LOG_SAMPLE
+(0.0-1.0, default 1.0) keeps that fraction of calls. Entries are handed to a
+background thread through a queue, so the request path never waits on disk.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from pathlib import Path
+
+
+# Tool arguments that carry user-supplied bodies; logged as hash + length only
+REDACTED_ARGUMENTS = {
+    "add_knowledge_source": ("content",),
+    "update_checklist": ("content",),
+}
+
+_STOP = object()
+
+
+def redact_arguments(tool: str, arguments: dict) -> dict:
+    """Copy arguments, replacing write-tool content with its SHA-256 and length."""
+    redacted = dict(arguments)
+    for field in REDACTED_ARGUMENTS.get(tool, ()):
+        value = redacted.get(field)
+        if isinstance(value, str):
+            digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
+            redacted[field] = {"sha256": digest[:16], "chars": len(value)}
+    return redacted
+
+
+class AccessLog:
+    """Sampled JSONL writer backed by a queue and a daemon thread."""
+
+    def __init__(self, path: Path, sample_rate: float = 1.0, flush_interval: float = 1.0):
+        self.path = path
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_loop, name="shudaizi-access-log", daemon=True)
+        self._closed = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+
+    def record(
+        self,
+        tool: str,
+        arguments: dict,
+        latency_ms: float,
+        response_bytes: int,
+        cache_hit: bool | None,
+        error: bool,
+    ) -> None:
+        """Queue one entry if it falls inside the sample. Never blocks."""
+        if self._closed or random.random() >= self.sample_rate:
+            return
+        self._queue.put({
+            "ts": round(time.time(), 3),
+            "tool": tool,
+            "arguments": redact_arguments(tool, arguments),
+            "latency_ms": round(latency_ms, 3),
+            "response_bytes": response_bytes,
+            "cache_hit": cache_hit,
+            "error": error,
+            "sample_rate": self.sample_rate,
+        })
+
+    def close(self) -> None:
+        """Flush queued entries and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+
+    def _write_loop(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    entry = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    entry = None
+                if entry is _STOP:
+                    break
+                if entry is not None:
+                    try:
+                        f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                    except (TypeError, ValueError):
+                        self.dropped += 1
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    f.flush()
+                    last_flush = time.monotonic()
+            f.flush()
+
+
+def from_env() -> AccessLog | None:
+    """Build the access log configured by environment variables, or None when disabled."""
+    path = os.environ.get("SHUDAIZI_ACCESS_LOG")
+    if not path:
+        return None
+    try:
+        sample_rate = float(os.environ.get("SHUDAIZI_ACCESS_LOG_SAMPLE", "1.0"))
+    except ValueError:
+        sample_rate = 1.0
+    log = AccessLog(Path(path), sample_rate)
+    atexit.register(log.close)
+    return log
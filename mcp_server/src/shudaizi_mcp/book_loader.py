@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import bisect
 import re
+from collections import deque
 from pathlib import Path
 
+from . import tracing
+from .similarity import CITATION_RE, NearDuplicateIndex, normalize_item
+
 
 # Section heading patterns in book research files
 SECTION_PATTERNS = {
@@ -17,15 +22,12 @@ SECTION_PATTERNS = {
 }
 
 
-def extract_section(content: str, section: str) -> str | None:
-    """Extract a named section from a markdown file.
+def section_span(content: str, section: str) -> tuple[int, int] | None:
+    """Locate a named section in a book research file.
 
-    Looks for a ## heading matching the section pattern and returns all content
-    until the next ## heading or end of file.
+    Returns (start, end) offsets from the matching ## heading up to the next
+    ## heading or end of file, or None when the section is absent.
     """
-    if section == "full":
-        return content
-
     pattern = SECTION_PATTERNS.get(section)
     if not pattern:
         return None
@@ -47,7 +49,22 @@ def extract_section(content: str, section: str) -> str | None:
     else:
         end = len(content)
 
-    return content[start:end].strip()
+    return start, end
+
+
+def extract_section(content: str, section: str) -> str | None:
+    """Extract a named section from a markdown file.
+
+    Looks for a ## heading matching the section pattern and returns all content
+    until the next ## heading or end of file.
+    """
+    if section == "full":
+        return content
+
+    span = section_span(content, section)
+    if span is None:
+        return None
+    return content[span[0] : span[1]].strip()
 
 
 def extract_checklist_section(content: str, section_name: str) -> str | None:
@@ -117,6 +134,87 @@ def extract_standard(content: str) -> str:
     return "\n".join(result)
 
 
+def split_sections(content: str) -> list[tuple[str, list[str]]]:
+    """Split markdown into (heading, body_lines) blocks at ## headings.
+
+    The first block holds everything before the first ## heading and has an
+    empty heading.
+    """
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    for line in content.split("\n"):
+        if line.startswith("## "):
+            sections.append((line, []))
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: ~4 chars per token."""
+    return len(text) // 4
+
+
+# Budget each merged checklist keeps whatever max_tokens is, so a budget
+# smaller than the header and titles still returns some items per task
+MIN_TASK_BUDGET = 100
+
+_HEADING_RE = re.compile(r"^##\s+", re.MULTILINE)
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def page_end(content: str, start: int, max_chars: int) -> int:
+    """Pick where a page starting at `start` should end.
+
+    Prefers the last ## heading that still leaves at least half a page,
+    then the last paragraph break, then the last newline, and only cuts
+    mid-line when a single line exceeds the page.
+    """
+    limit = start + max_chars
+    if limit >= len(content):
+        return len(content)
+    window = content[start:limit]
+
+    headings = [m.start() for m in _HEADING_RE.finditer(window) if m.start() > 0]
+    if headings and headings[-1] >= max_chars // 2:
+        return start + headings[-1]
+
+    breaks = [m.end() for m in _PARAGRAPH_RE.finditer(window)]
+    if breaks:
+        return start + breaks[-1]
+
+    newline = window.rfind("\n")
+    if newline > 0:
+        return start + newline + 1
+    return limit
+
+
+def file_stamp(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, size) of a file, or None if it does not exist. Used to validate caches."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def source_files(directory: Path) -> list[tuple[str, Path]]:
+    """(numeric ID, path) for every NN_slug.md research file, in numeric order.
+
+    IDs are at least two digits; past 99 they simply grow ("100_slug.md").
+    """
+    found = []
+    for f in directory.glob("[0-9][0-9]*_*.md"):
+        prefix = f.stem.split("_", 1)[0]
+        if prefix.isdigit():
+            found.append((prefix, f))
+    found.sort(key=lambda pair: (int(pair[0]), pair[1].name))
+    return found
+
+
+def _is_item(line: str) -> bool:
+    return line.lstrip().startswith("- ")
+
+
 def parse_frontmatter(content: str) -> tuple[dict, str]:
     """Parse YAML frontmatter from a markdown file.
 
@@ -148,7 +246,14 @@ def parse_frontmatter(content: str) -> tuple[dict, str]:
 
 
 class BookLoader:
-    """Loads and parses book research files and checklists."""
+    """Loads and parses book research files and checklists.
+
+    File contents, book section offsets and rendered checklists are cached
+    and revalidated against the file's (mtime, size) stamp on every read, so
+    edits made outside the server are still picked up. Writes made through
+    KnowledgeManager arrive as change events (apply_change), which also keep
+    the checklist item index current without a rebuild.
+    """
 
     def __init__(self, project_root: Path):
         self.project_root = project_root
@@ -156,9 +261,95 @@ class BookLoader:
         self.articles_dir = self.book_research_dir / "anthropic_articles"
         self.knowledge_dir = project_root / "knowledge"
         self.checklists_dir = self.knowledge_dir / "checklists"
+        self._files: dict[Path, dict] = {}  # path → {stamp, content, sections}
+        self._renditions: dict[tuple[str, str], tuple[tuple[int, int], str, int]] = {}
+        self._book_files: dict[str, Path] = {}
+        self._item_index: NearDuplicateIndex | None = None
+        self._items_by_task: dict[str, set[tuple[str, str]]] = {}
+        # File-cache counters: a miss means the file was (re)read from disk
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # ── Caches ──────────────────────────────────────────────────
+
+    def _read_file(self, path: Path) -> dict | None:
+        """Return the cached entry for path, re-reading it if the stamp changed."""
+        with tracing.span("cache.lookup", file=path.name) as span:
+            stamp = file_stamp(path)
+            if stamp is None:
+                self._files.pop(path, None)
+                span.set_attribute("file.found", False)
+                return None
+            entry = self._files.get(path)
+            if entry is None or entry["stamp"] != stamp:
+                with tracing.span("file.read", file=path.name, **{"file.bytes": stamp[1]}):
+                    content = path.read_text(encoding="utf-8")
+                entry = {"stamp": stamp, "content": content, "sections": {}}
+                self._files[path] = entry
+                self.cache_misses += 1
+                span.set_attribute("cache.hit", False)
+            else:
+                self.cache_hits += 1
+                span.set_attribute("cache.hit", True)
+            return entry
+
+    def apply_change(self, event) -> None:
+        """Update derived state for one KnowledgeManager ChangeEvent.
+
+        Only the entries for the changed file are touched: its cached content
+        and section offsets, its renditions, and (for checklists) the item
+        index postings of items that were added or removed.
+        """
+        path = event.path
+        self._files.pop(path, None)
+        if path.parent == self.checklists_dir and path.suffix == ".md":
+            task_type = path.stem
+            for key in [k for k in self._renditions if k[0] == task_type]:
+                del self._renditions[key]
+            if self._item_index is not None:
+                self._index_checklist_items(task_type)
+
+    def _index_checklist_items(self, task_type: str) -> None:
+        """Sync the item index with one checklist file: add new items, drop removed ones."""
+        entry = self._read_file(self.checklists_dir / f"{task_type}.md")
+        current = set()
+        if entry is not None:
+            current = {
+                (task_type, normalize_item(line))
+                for line in entry["content"].split("\n")
+                if _is_item(line)
+            }
+        previous = self._items_by_task.get(task_type, set())
+        for key in previous - current:
+            self._item_index.remove(key)
+        for key in current - previous:
+            self._item_index.add(key, key[1])
+        self._items_by_task[task_type] = current
+
+    @property
+    def checklist_item_index(self) -> NearDuplicateIndex:
+        """MinHash/LSH index over every checklist item, keyed by (task_type, normalized text).
+
+        Built once on first use; merging checklists only does lookups.
+        """
+        if self._item_index is None:
+            self._item_index = NearDuplicateIndex()
+            for f in sorted(self.checklists_dir.glob("*.md")):
+                self._index_checklist_items(f.stem)
+        return self._item_index
+
+    def checklist_tokens(self, task_type: str, detail_level: str = "standard") -> int:
+        """Estimated token count of a checklist rendition (cached with the rendition)."""
+        self.read_checklist(task_type, detail_level)
+        cached = self._renditions.get((task_type, detail_level))
+        return cached[2] if cached else 0
 
     def get_book_file(self, book_id: str) -> Path | None:
         """Resolve a book ID to its file path."""
+        cached = self._book_files.get(book_id)
+        if cached is not None and cached.exists():
+            return cached
+
         if book_id.startswith("a"):
             # Article ID like "a01"
             num = book_id[1:]
@@ -168,42 +359,262 @@ class BookLoader:
             pattern = f"{book_id}_*.md"
             matches = list(self.book_research_dir.glob(pattern))
 
-        return matches[0] if matches else None
+        if not matches:
+            return None
+        self._book_files[book_id] = matches[0]
+        return matches[0]
 
     def read_book_section(self, book_id: str, section: str = "key_ideas") -> str:
         """Read a specific section from a book research file."""
         file_path = self.get_book_file(book_id)
-        if not file_path or not file_path.exists():
+        entry = self._read_file(file_path) if file_path else None
+        if entry is None:
             return f"Book '{book_id}' not found."
-
-        content = file_path.read_text(encoding="utf-8")
-
+        text = self._section_text(entry, book_id, section)
+        if text is None:
+            return f"Section '{section}' not found in book '{book_id}'."
+        return text
+
+    def _section_text(self, entry: dict, book_id: str, section: str) -> str | None:
+        """A section of a cached book entry, or None when the book has no such section."""
+        content = entry["content"]
         if section == "full":
             return content
 
-        extracted = extract_section(content, section)
-        if extracted:
-            return extracted
+        cached = section in entry["sections"]
+        with tracing.span("book.extract_section", book_id=book_id, section=section,
+                          **{"cache.hit": cached}):
+            if not cached:
+                entry["sections"][section] = section_span(content, section)
+        span = entry["sections"][section]
+        if span:
+            extracted = content[span[0] : span[1]].strip()
+            if extracted:
+                return extracted
+        return None
 
-        return f"Section '{section}' not found in book '{book_id}'."
+    def read_book_page(
+        self,
+        book_id: str,
+        section: str = "full",
+        cursor: str = "",
+        page_tokens: int = 2000,
+    ) -> str:
+        """Read one section-aligned page of a book section.
+
+        The cursor is the character offset where the page starts; each page
+        ends with a footer carrying the next cursor, or marking the last page.
+        A cursor inside a page snaps back to that page's start.
+        """
+        file_path = self.get_book_file(book_id)
+        entry = self._read_file(file_path) if file_path else None
+        text = self._section_text(entry, book_id, section) if entry else None
+        if text is None:
+            return self.read_book_section(book_id, section)  # its not-found message
+
+        try:
+            start = int(cursor or 0)
+        except ValueError:
+            return f"Invalid cursor '{cursor}'."
+        if not 0 <= start < max(len(text), 1):
+            return f"Cursor {start} is past the end of '{book_id}' ({len(text)} chars)."
+
+        max_chars = max(page_tokens, 100) * 4
+        offsets = [0]
+        while offsets[-1] < len(text) or len(offsets) == 1:
+            offsets.append(page_end(text, offsets[-1], max_chars))
+        page_num = bisect.bisect_right(offsets, start, hi=len(offsets) - 1)
+        start, end = offsets[page_num - 1], offsets[page_num]
+        total_pages = len(offsets) - 1
+
+        footer = f"[page {page_num} of {total_pages} · chars {start}-{end} of {len(text)}"
+        if end < len(text):
+            footer += f' · next_cursor: "{end}"]'
+        else:
+            footer += " · last page]"
+        return f"{text[start:end].rstrip()}\n\n---\n{footer}"
 
     def read_checklist(
         self, task_type: str, detail_level: str = "standard"
     ) -> str:
         """Read a checklist file with the specified detail level."""
         checklist_path = self.checklists_dir / f"{task_type}.md"
-        if not checklist_path.exists():
+        entry = self._read_file(checklist_path)
+        if entry is None:
             return f"Checklist '{task_type}' not found."
 
-        content = checklist_path.read_text(encoding="utf-8")
-
-        if detail_level == "brief":
-            return extract_items_only(content)
-        elif detail_level == "standard":
-            return extract_standard(content)
-        else:  # detailed
-            return content
-
+        key = (task_type, detail_level)
+        cached = self._renditions.get(key)
+        hit = cached is not None and cached[0] == entry["stamp"]
+        with tracing.span("checklist.render", task_type=task_type, detail_level=detail_level,
+                          **{"cache.hit": hit}) as span:
+            if hit:
+                rendered = cached[1]
+            else:
+                content = entry["content"]
+                if detail_level == "brief":
+                    rendered = extract_items_only(content)
+                elif detail_level == "standard":
+                    rendered = extract_standard(content)
+                else:  # detailed
+                    rendered = content
+                self._renditions[key] = (entry["stamp"], rendered, estimate_tokens(rendered))
+            span.set_attribute("rendition.bytes", len(rendered))
+        return rendered
+
+    @tracing.traced("checklist.merge")
+    def read_merged_checklist(
+        self,
+        task_types: list[str],
+        detail_level: str = "standard",
+        focus: str = "",
+        max_tokens: int | None = None,
+    ) -> str:
+        """Merge several checklists into one response.
+
+        Near-duplicate items (shingle Jaccard >= 0.5) that appear in more than
+        one checklist are kept once, at their first occurrence, with the extra
+        citations and task types folded in. When max_tokens is set, sections
+        are admitted round-robin across tasks until the shared budget is spent;
+        the budget never drops below MIN_TASK_BUDGET per task.
+        """
+        index = self.checklist_item_index
+        tasks: list[tuple[str, str, list[tuple[str, list[str]]]]] = []
+        missing = []
+
+        for task_type in task_types:
+            if not (self.checklists_dir / f"{task_type}.md").exists():
+                missing.append(task_type)
+                continue
+            content = self.read_checklist(task_type, detail_level)
+            if focus:
+                content = self.filter_by_focus(content, focus)
+            _, body = parse_frontmatter(content)
+            sections = split_sections(body)
+            title = next(
+                (line for line in sections[0][1] if line.startswith("# ")),
+                f"# {task_type}",
+            )
+            preamble = [line for line in sections[0][1] if line.strip() and line != title]
+            sections[0] = ("", preamble)
+            tasks.append((task_type, title, sections))
+
+        if not tasks:
+            return f"Checklist(s) not found: {', '.join(missing)}."
+
+        # Deduplicate items across checklists
+        kept: dict[tuple[str, str], list] = {}  # key → [section lines, line idx, extra cites, extra tasks]
+        merged = 0
+        total_items = 0
+        for task_type, _, sections in tasks:
+            for si, (heading, lines) in enumerate(sections):
+                survivors = []
+                for line in lines:
+                    if not _is_item(line):
+                        survivors.append(line)
+                        continue
+                    total_items += 1
+                    key = (task_type, normalize_item(line))
+                    dup_of = next(
+                        (k for k, _ in index.query_key(key) if k in kept and k[0] != task_type),
+                        None,
+                    )
+                    if dup_of is None:
+                        kept[key] = [survivors, len(survivors), [], []]
+                        survivors.append(line)
+                        continue
+                    merged += 1
+                    entry = kept[dup_of]
+                    entry[2].extend(CITATION_RE.findall(line))
+                    if task_type not in entry[3]:
+                        entry[3].append(task_type)
+                sections[si] = (heading, survivors)
+
+        for lines, idx, cites, also in kept.values():
+            if not also:
+                continue
+            line = lines[idx]
+            new_cites = "".join(dict.fromkeys(c for c in cites if c not in line))
+            lines[idx] = f"{line}{new_cites} (also in {', '.join(also)})"
+
+        # Admit sections under the shared token budget
+        rendered = [
+            [(si, "\n".join(([heading] if heading else []) + lines).strip())
+             for si, (heading, lines) in enumerate(sections)]
+            for _, _, sections in tasks
+        ]
+        included: list[dict[int, str]] = [{} for _ in tasks]
+        omitted_items = 0
+        if max_tokens is None:
+            for ti, blocks in enumerate(rendered):
+                included[ti] = {si: text for si, text in blocks if text}
+        else:
+            # Reserve room for the header, summary line and task titles
+            remaining = max(
+                max_tokens - 50 - sum(estimate_tokens(title) + 1 for _, title, _ in tasks),
+                MIN_TASK_BUDGET * len(tasks),
+            )
+            queues = [deque(b for b in blocks if b[1]) for blocks in rendered]
+            served: set[int] = set()  # tasks with at least one item admitted
+            while any(queues):
+                for ti, queue in enumerate(queues):
+                    if not queue:
+                        continue
+                    # Hold MIN_TASK_BUDGET back for every other task still waiting for its first item
+                    available = remaining - MIN_TASK_BUDGET * sum(
+                        1 for tj, q in enumerate(queues) if tj != ti and q and tj not in served
+                    )
+                    si, text = queue.popleft()
+                    cost = estimate_tokens(text) + 1
+                    if cost <= available:
+                        included[ti][si] = text
+                        remaining -= cost
+                        if any(_is_item(line) for line in text.split("\n")):
+                            served.add(ti)
+                        continue
+                    # Partial section: take leading lines that fit, then stop this task
+                    partial = []
+                    for line in text.split("\n"):
+                        line_cost = estimate_tokens(line) + 1
+                        if line_cost > available:
+                            break
+                        partial.append(line)
+                        available -= line_cost
+                    if any(_is_item(line) for line in partial):
+                        included[ti][si] = "\n".join(partial)
+                        remaining -= sum(estimate_tokens(line) + 1 for line in partial)
+                        served.add(ti)
+                    else:
+                        partial = []
+                    dropped = text.split("\n")[len(partial):]
+                    omitted_items += sum(1 for line in dropped if _is_item(line))
+                    omitted_items += sum(
+                        1 for _, rest in queue for line in rest.split("\n") if _is_item(line)
+                    )
+                    queue.clear()
+
+        parts = []
+        for (_, title, _), blocks in zip(tasks, included):
+            parts.append(title)
+            parts.extend(text for _, text in sorted(blocks.items()))
+        body = "\n\n".join(parts)
+
+        summary = (
+            f"> {len(tasks)} checklists, {total_items} items, "
+            f"{merged} near-duplicates merged. ~{estimate_tokens(body)} tokens"
+        )
+        if max_tokens is not None:
+            summary += f" (budget {max_tokens})"
+            if omitted_items:
+                summary += f"; {omitted_items} items omitted to fit the budget"
+        summary += "."
+        if missing:
+            summary += f"\n> Not found: {', '.join(missing)}."
+
+        header = f"# Merged Checklist: {' + '.join(t for t, _, _ in tasks)}"
+        return f"{header}\n\n{summary}\n\n{body}"
+
+    @tracing.traced("checklist.filter_focus")
     def filter_by_focus(self, content: str, focus: str) -> str:
         """Filter checklist content to sections matching the focus keyword."""
         if not focus:
@@ -250,18 +661,17 @@ class BookLoader:
     def list_books(self) -> list[dict]:
         """List all available books."""
         books = []
-        for f in sorted(self.book_research_dir.glob("[0-9][0-9]_*.md")):
-            book_id = f.stem[:2]
-            title = f.stem[3:].replace("_", " ").title()
+        for book_id, f in source_files(self.book_research_dir):
+            title = f.stem[len(book_id) + 1 :].replace("_", " ").title()
             books.append({"id": book_id, "title": title, "file": str(f.relative_to(self.project_root))})
         return books
 
     def list_articles(self) -> list[dict]:
         """List all available Anthropic articles."""
         articles = []
-        for f in sorted(self.articles_dir.glob("[0-9][0-9]_*.md")):
-            article_id = f"a{f.stem[:2]}"
-            title = f.stem[3:].replace("_", " ").title()
+        for num, f in source_files(self.articles_dir):
+            article_id = f"a{num}"
+            title = f.stem[len(num) + 1 :].replace("_", " ").title()
             articles.append({"id": article_id, "title": title, "file": str(f.relative_to(self.project_root))})
         return articles
 
@@ -270,7 +680,7 @@ class BookLoader:
         checklists = []
         for f in sorted(self.checklists_dir.glob("*.md")):
             task_type = f.stem
-            metadata, _ = parse_frontmatter(f.read_text(encoding="utf-8"))
+            metadata, _ = parse_frontmatter(self._read_file(f)["content"])
             description = metadata.get("description", "")
             checklists.append({"task_type": task_type, "description": description})
         return checklists
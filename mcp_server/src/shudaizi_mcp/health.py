@@ -0,0 +1,164 @@
+"""Liveness/readiness state for the HTTP server — a cached, incremental corpus integrity check.
+
+Readiness runs the structural checks from tests/test_level1_integrity.py
+against the live corpus: routing.json and book_index.json parse, every
+indexed source and routed checklist exists, routing references only known
+IDs, and checklist citations name known sources. The result is cached with
+a digest of the (mtime, size) stamps it covered. A probe re-validates only
+when a KnowledgeManager change event arrives, when the index files or the
+source/checklist directories change on disk, or every rescan_interval
+seconds; otherwise it costs a handful of stat calls. Rescans re-parse only
+files whose stamp changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .book_loader import BookLoader, file_stamp
+from .routing import TaskRouter
+from .similarity import CITATION_RE
+
+
+class HealthMonitor:
+    """Tracks whether the corpus caches are warm and the corpus is internally consistent."""
+
+    def __init__(self, project_root: Path, rescan_interval: float = 30.0):
+        self.project_root = project_root
+        self.rescan_interval = rescan_interval
+        self.loader: BookLoader | None = None
+        self.router: TaskRouter | None = None
+        self.warm = False
+        knowledge_dir = project_root / "knowledge"
+        self.routing_path = knowledge_dir / "routing.json"
+        self.book_index_path = knowledge_dir / "book_index.json"
+        self.checklists_dir = knowledge_dir / "checklists"
+        self._watched = (
+            self.routing_path,
+            self.book_index_path,
+            self.checklists_dir,
+            project_root / "book_research",
+            project_root / "book_research" / "anthropic_articles",
+        )
+        self._watched_stamps: tuple | None = None
+        self._json: dict[Path, tuple] = {}  # path → (stamp, data or None, error)
+        self._citations: dict[Path, tuple] = {}  # checklist → (stamp, cited IDs)
+        self._status: dict | None = None
+        self._last_scan = 0.0
+        self.scans = 0
+
+    def attach(self, loader: BookLoader, router: TaskRouter) -> None:
+        """Share the server's loader and router so warming fills the caches that serve requests."""
+        self.loader = loader
+        self.router = router
+
+    def apply_change(self, event) -> None:
+        """KnowledgeManager listener: the next probe re-validates."""
+        self._status = None
+
+    # ── Warm-up ─────────────────────────────────────────────────
+
+    def warm_up(self) -> None:
+        """Load every index, checklist rendition and source file into the attached caches."""
+        if self.loader is None or self.router is None:
+            self.attach(BookLoader(self.project_root), TaskRouter(self.project_root / "knowledge"))
+        index = self.router.book_index
+        for task_type in self.router.list_task_types():
+            for level in ("brief", "standard", "detailed"):
+                self.loader.read_checklist(task_type, level)
+        for source_id in [*index.get("books", {}), *index.get("articles", {})]:
+            self.loader.read_book_section(source_id, "full")
+        self.warm = True
+        self._status = None
+
+    # ── Probes ──────────────────────────────────────────────────
+
+    def status(self) -> dict:
+        """Cached readiness report; re-validated only when something may have changed."""
+        stamps = tuple(file_stamp(p) for p in self._watched)
+        if (
+            self._status is None
+            or stamps != self._watched_stamps
+            or time.monotonic() - self._last_scan >= self.rescan_interval
+        ):
+            self._watched_stamps = stamps
+            self._status = self._scan()
+        return self._status
+
+    def _scan(self) -> dict:
+        self.scans += 1
+        self._last_scan = time.monotonic()
+        problems: list[str] = []
+        stamps: list[tuple[str, tuple | None]] = []
+
+        routing = self._load_json(self.routing_path, problems, stamps)
+        index = self._load_json(self.book_index_path, problems, stamps)
+        tasks = (routing or {}).get("tasks", {})
+        known_ids = set((index or {}).get("books", {})) | set((index or {}).get("articles", {}))
+
+        if index is not None:
+            for kind in ("books", "articles"):
+                for source_id, entry in index.get(kind, {}).items():
+                    path = self.project_root / entry.get("file", "")
+                    stamp = file_stamp(path)
+                    stamps.append((str(path), stamp))
+                    if stamp is None:
+                        problems.append(f"{kind[:-1]} {source_id}: missing file {entry.get('file')}")
+
+        for task_type, cfg in tasks.items():
+            if index is not None:
+                for key in ("primary_sources", "secondary_sources", "anthropic_articles"):
+                    problems.extend(
+                        f"routing {task_type}.{key}: unknown source {sid}"
+                        for sid in cfg.get(key, []) if sid not in known_ids
+                    )
+            path = self.checklists_dir / f"{task_type}.md"
+            cited = self._cited_ids(path, stamps)
+            if cited is None:
+                problems.append(f"checklist {task_type}: missing file")
+            elif index is not None:
+                problems.extend(f"checklist {task_type}: unknown citation [{cid}]" for cid in sorted(cited - known_ids))
+
+        digest = hashlib.sha256(json.dumps(sorted(stamps, key=lambda s: s[0])).encode()).hexdigest()[:16]
+        return {
+            "status": "ready" if self.warm and not problems else "not_ready",
+            "warm": self.warm,
+            "problems": problems,
+            "digest": digest,
+            "files": len(stamps),
+            "checked_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    def _load_json(self, path: Path, problems: list[str], stamps: list) -> dict | None:
+        stamp = file_stamp(path)
+        stamps.append((str(path), stamp))
+        cached = self._json.get(path)
+        if cached is None or cached[0] != stamp:
+            data, error = None, None
+            if stamp is None:
+                error = "missing"
+            else:
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+                    error = f"unreadable ({exc})"
+            cached = self._json[path] = (stamp, data, error)
+        if cached[2]:
+            problems.append(f"{path.name}: {cached[2]}")
+        return cached[1]
+
+    def _cited_ids(self, path: Path, stamps: list) -> set[str] | None:
+        stamp = file_stamp(path)
+        stamps.append((str(path), stamp))
+        if stamp is None:
+            self._citations.pop(path, None)
+            return None
+        cached = self._citations.get(path)
+        if cached is None or cached[0] != stamp:
+            text = path.read_text(encoding="utf-8")
+            cached = self._citations[path] = (stamp, {c[1:-1] for c in CITATION_RE.findall(text)})
+        return cached[1]
@@ -4,12 +4,39 @@ from __future__ import annotations
 
 import json
 import re
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
 
+from .book_loader import source_files
+from .similarity import NearDuplicateIndex, normalize_item, paragraphs
+
+# A new source whose paragraphs mostly repeat one existing source is a duplicate
+SOURCE_OVERLAP_THRESHOLD = 0.5
+ON_DUPLICATE_MODES = ("flag", "reject", "allow")
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """A file written by KnowledgeManager.
+
+    kind is "added" or "modified"; sections names the checklist sections or
+    routing tasks the write touched, when known.
+    """
+
+    kind: str
+    path: Path
+    sections: tuple[str, ...] = ()
+
 
 class KnowledgeManager:
-    """Handles write operations: adding knowledge sources and updating checklists."""
+    """Handles write operations: adding knowledge sources and updating checklists.
+
+    Every file write is announced to subscribers as a ChangeEvent so derived
+    caches and indexes can update just the affected entries.
+    """
 
     def __init__(self, project_root: Path):
         self.project_root = project_root
@@ -19,6 +46,20 @@ class KnowledgeManager:
         self.checklists_dir = self.knowledge_dir / "checklists"
         self.routing_path = self.knowledge_dir / "routing.json"
         self.book_index_path = self.knowledge_dir / "book_index.json"
+        self._paragraph_index: NearDuplicateIndex | None = None
+        self._index_build_lock = threading.Lock()  # one full scan at a time
+        self._index_publish_lock = threading.Lock()  # guards publishing vs. sources written mid-scan
+        self._unindexed: list[tuple[Path, str]] = []
+        self._listeners: list[Callable[[ChangeEvent], None]] = []
+
+    def subscribe(self, listener: Callable[[ChangeEvent], None]) -> None:
+        """Call listener with a ChangeEvent after every file this manager writes."""
+        self._listeners.append(listener)
+
+    def _emit(self, kind: str, path: Path, sections: tuple[str, ...] = ()) -> None:
+        event = ChangeEvent(kind, path, sections)
+        for listener in self._listeners:
+            listener(event)
 
     def _load_json(self, path: Path) -> dict:
         if path.exists():
@@ -56,6 +97,88 @@ class KnowledgeManager:
         slug = re.sub(r"\s+", "_", slug.strip())
         return slug[:60]  # cap length
 
+    # ── Duplicate detection ─────────────────────────────────────
+
+    @property
+    def paragraph_index(self) -> NearDuplicateIndex:
+        """MinHash/LSH index over every paragraph of every existing source file."""
+        if self._paragraph_index is None:
+            self.build_paragraph_index()
+        return self._paragraph_index
+
+    def build_paragraph_index(self) -> None:
+        """Scan every source into the paragraph index, unless it is already built.
+
+        The first scan takes about a second on this corpus and grows with it,
+        so async callers run this in a worker thread. Sources written while
+        it runs are queued by add_knowledge_source and indexed before the
+        index is published; after that, writes update it in place.
+        """
+        with self._index_build_lock:
+            if self._paragraph_index is not None:
+                return
+            index = NearDuplicateIndex()
+            scanned = set()
+            files = source_files(self.book_research_dir) + source_files(self.articles_dir)
+            for _, f in files:
+                self._index_paragraphs(index, f, f.read_text(encoding="utf-8"))
+                scanned.add(f)
+            with self._index_publish_lock:
+                for path, content in self._unindexed:
+                    if path not in scanned:
+                        self._index_paragraphs(index, path, content)
+                self._unindexed.clear()
+                self._paragraph_index = index
+
+    def _index_paragraphs(self, index: NearDuplicateIndex, file_path: Path, content: str) -> None:
+        relative_path = str(file_path.relative_to(self.project_root))
+        for n, para in enumerate(paragraphs(content)):
+            index.add((relative_path, n), para)
+
+    def find_source_overlaps(self, content: str) -> list[dict]:
+        """Existing source files sharing near-duplicate paragraphs with content.
+
+        Returns dicts with file, shared_paragraphs, and fraction (of the new
+        content's paragraphs), largest overlap first.
+        """
+        new_paragraphs = paragraphs(content)
+        if not new_paragraphs:
+            return []
+        index = self.paragraph_index
+        shared: dict[str, int] = {}
+        for para in new_paragraphs:
+            for file in {key[0] for key, _ in index.query(para)}:
+                shared[file] = shared.get(file, 0) + 1
+        overlaps = [
+            {"file": file, "shared_paragraphs": n, "fraction": round(n / len(new_paragraphs), 2)}
+            for file, n in shared.items()
+        ]
+        overlaps.sort(key=lambda o: -o["shared_paragraphs"])
+        return overlaps
+
+    def find_item_duplicates(self, lines: list[str], content: str) -> list[dict]:
+        """New checklist items in content that near-duplicate an existing item in lines."""
+        index = NearDuplicateIndex()
+        for n, line in enumerate(lines):
+            if line.lstrip().startswith("- "):
+                index.add(n, normalize_item(line))
+
+        duplicates = []
+        for item in content.strip().split("\n"):
+            if not item.lstrip().startswith("- "):
+                continue
+            matches = index.query(normalize_item(item))
+            if matches:
+                n, score = matches[0]
+                duplicates.append({
+                    "item": item.strip(),
+                    "existing": lines[n].strip(),
+                    "similarity": round(score, 2),
+                })
+        return duplicates
+
+    # ── Write operations ────────────────────────────────────────
+
     def add_knowledge_source(
         self,
         title: str,
@@ -65,11 +188,35 @@ class KnowledgeManager:
         task_types: list[str],
         author: str = "",
         year: int | None = None,
+        on_duplicate: str = "flag",
     ) -> dict:
         """Add a new book or article to the knowledge base.
 
-        Returns dict with: id, file_path, tasks_updated.
+        on_duplicate: "flag" reports existing sources with overlapping
+        paragraphs, "reject" refuses content that mostly repeats one existing
+        source, "allow" skips the check.
+
+        Returns dict with: id, file_path, tasks_updated, overlaps.
         """
+        if on_duplicate not in ON_DUPLICATE_MODES:
+            return {"error": f"Unknown on_duplicate '{on_duplicate}'. Use: {', '.join(ON_DUPLICATE_MODES)}."}
+        overlaps = []
+        if on_duplicate != "allow":
+            overlaps = self.find_source_overlaps(content)
+            if (
+                on_duplicate == "reject"
+                and overlaps
+                and overlaps[0]["fraction"] >= SOURCE_OVERLAP_THRESHOLD
+            ):
+                top = overlaps[0]
+                return {
+                    "error": (
+                        f"'{title}' duplicates {top['file']} "
+                        f"({top['fraction']:.0%} of its paragraphs are near-duplicates). Not added."
+                    ),
+                    "overlaps": overlaps,
+                }
+
         is_article = source_type in ("article", "blog")
 
         # Assign ID
@@ -92,6 +239,12 @@ class KnowledgeManager:
         # Write the content file
         file_path.parent.mkdir(parents=True, exist_ok=True)
         file_path.write_text(content, encoding="utf-8")
+        with self._index_publish_lock:
+            if self._paragraph_index is not None:
+                self._index_paragraphs(self._paragraph_index, file_path, content)
+            else:
+                self._unindexed.append((file_path, content))
+        self._emit("added", file_path)
 
         # Update book_index.json
         index = self._load_json(self.book_index_path)
@@ -122,6 +275,7 @@ class KnowledgeManager:
 
         index["updated"] = date.today().isoformat()
         self._save_json(self.book_index_path, index)
+        self._emit("modified", self.book_index_path, (source_id,))
 
         # Update routing.json
         routing = self._load_json(self.routing_path)
@@ -139,12 +293,20 @@ class KnowledgeManager:
 
         routing["updated"] = date.today().isoformat()
         self._save_json(self.routing_path, routing)
+        self._emit("modified", self.routing_path, tuple(tasks_updated))
+
+        message = f"Added '{title}' as {source_id}. File: {relative_path}. Updated routing for: {', '.join(tasks_updated) or 'none'}."
+        if overlaps:
+            message += " Overlaps with existing sources: " + ", ".join(
+                f"{o['file']} ({o['shared_paragraphs']} paragraphs)" for o in overlaps[:3]
+            ) + "."
 
         return {
             "id": source_id,
             "file_path": relative_path,
             "tasks_updated": tasks_updated,
-            "message": f"Added '{title}' as {source_id}. File: {relative_path}. Updated routing for: {', '.join(tasks_updated) or 'none'}.",
+            "overlaps": overlaps,
+            "message": message,
         }
 
     def update_checklist(
@@ -153,12 +315,17 @@ class KnowledgeManager:
         action: str,
         section: str,
         content: str,
+        on_duplicate: str = "flag",
     ) -> dict:
         """Update a task checklist.
 
         Actions: add_items, remove_items, replace_section.
-        Returns dict with: task_type, action, diff summary.
+        on_duplicate (add_items only): "flag" reports new items that
+        near-duplicate existing ones, "reject" drops them, "allow" skips the check.
+        Returns dict with: task_type, action, diff summary, duplicates.
         """
+        if on_duplicate not in ON_DUPLICATE_MODES:
+            return {"error": f"Unknown on_duplicate '{on_duplicate}'. Use: {', '.join(ON_DUPLICATE_MODES)}."}
         checklist_path = self.checklists_dir / f"{task_type}.md"
         if not checklist_path.exists():
             return {"error": f"Checklist '{task_type}' not found."}
@@ -166,6 +333,19 @@ class KnowledgeManager:
         original = checklist_path.read_text(encoding="utf-8")
         lines = original.split("\n")
 
+        duplicates = []
+        if action == "add_items" and on_duplicate != "allow":
+            duplicates = self.find_item_duplicates(lines, content)
+            if duplicates and on_duplicate == "reject":
+                rejected = {d["item"] for d in duplicates}
+                remaining = [l for l in content.strip().split("\n") if l.strip() not in rejected]
+                if not any(l.lstrip().startswith("- ") for l in remaining):
+                    return {
+                        "error": f"All {len(rejected)} items near-duplicate existing items in '{task_type}'. Nothing added.",
+                        "duplicates": duplicates,
+                    }
+                content = "\n".join(remaining)
+
         if action == "add_items":
             result = self._add_items_to_section(lines, section, content)
         elif action == "remove_items":
@@ -180,18 +360,28 @@ class KnowledgeManager:
 
         new_content = "\n".join(result)
         checklist_path.write_text(new_content, encoding="utf-8")
+        self._emit("modified", checklist_path, (section,))
 
         # Count changes
         added = len(set(result) - set(lines))
         removed = len(set(lines) - set(result))
 
+        message = f"Updated '{task_type}' checklist: {action} in '{section}'. +{added}/-{removed} lines."
+        if duplicates:
+            verb = "Rejected" if on_duplicate == "reject" else "Possible"
+            message += f" {verb} near-duplicates of existing items:" + "".join(
+                f"\n  {d['item']}\n    ~ {d['existing']} (similarity {d['similarity']})"
+                for d in duplicates
+            )
+
         return {
             "task_type": task_type,
             "action": action,
             "section": section,
             "lines_added": added,
             "lines_removed": removed,
-            "message": f"Updated '{task_type}' checklist: {action} in '{section}'. +{added}/-{removed} lines.",
+            "duplicates": duplicates,
+            "message": message,
         }
 
     def _add_items_to_section(
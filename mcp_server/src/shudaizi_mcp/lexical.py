@@ -0,0 +1,124 @@
+"""Lexical text model — tokenization and TF-IDF scoring (no external dependencies)."""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+
+
+STOPWORDS = frozenset(
+    """
+    a about above after again all also am an and any are as at be because been before
+    being below between both but by can could did do does doing down during each few for
+    from further had has have having he her here hers him his how i if in into is it its
+    itself just me more most my no nor not now of off on once only or other our out over
+    own same she should so some such than that the their them then there these they this
+    those through to too under until up very was we were what when where which while who
+    whom why will with would you your yours user asks wants want need needs please help
+    """.split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Ordered longest-first so "ization" wins over "ation" wins over "s"
+_SUFFIXES = ("ization", "ations", "ation", "ments", "ment", "ings", "ing", "ies", "ed", "es", "ly", "s")
+
+
+def stem(word: str) -> str:
+    """Strip common English suffixes. Deliberately crude — it only needs to be consistent."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            base = word[: -len(suffix)]
+            return base + "y" if suffix == "ies" else base
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords, and stem."""
+    return [
+        stem(tok)
+        for tok in _TOKEN_RE.findall(text.lower())
+        if tok not in STOPWORDS and len(tok) > 1
+    ]
+
+
+class TfidfIndex:
+    """Inverted index with TF-IDF cosine scoring over a small document set.
+
+    Postings map each term to the raw term frequency per document. IDF and
+    document norms are derived from the postings and cached until the next
+    add/remove.
+    """
+
+    def __init__(self, documents: dict[str, str] | None = None):
+        self.postings: dict[str, dict[str, int]] = {}
+        self.doc_terms: dict[str, Counter] = {}
+        self._norms: dict[str, float] | None = None
+        for doc_id, text in (documents or {}).items():
+            self.add(doc_id, text)
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version with the same ID."""
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        self.doc_terms[doc_id] = terms
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self._norms = None
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document and its postings."""
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+        self._norms = None
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        if df == 0:
+            return 0.0
+        return math.log(len(self.doc_terms) / df)
+
+    def _doc_norms(self) -> dict[str, float]:
+        if self._norms is None:
+            self._norms = {
+                doc_id: math.sqrt(sum((tf * self.idf(t)) ** 2 for t, tf in terms.items()))
+                for doc_id, terms in self.doc_terms.items()
+            }
+        return self._norms
+
+    def score(self, query: str) -> list[tuple[str, float]]:
+        """Return (doc_id, cosine similarity) pairs for documents sharing a term, best first."""
+        q_terms = Counter(tokenize(query))
+        q_weights = {t: tf * self.idf(t) for t, tf in q_terms.items()}
+        q_norm = math.sqrt(sum(w * w for w in q_weights.values()))
+        if q_norm == 0:
+            return []
+
+        norms = self._doc_norms()
+        acc: dict[str, float] = {}
+        for term, q_w in q_weights.items():
+            if q_w == 0:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in self.postings.get(term, {}).items():
+                acc[doc_id] = acc.get(doc_id, 0.0) + q_w * tf * idf
+
+        scored = [
+            (doc_id, dot / (q_norm * norms[doc_id]))
+            for doc_id, dot in acc.items()
+            if norms.get(doc_id)
+        ]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        return scored
@@ -0,0 +1,79 @@
+"""On-demand sampling profiler for a live server — collapsed stacks, flamegraph-ready.
+
+A background thread snapshots every thread's Python stack via
+sys._current_frames() at a fixed interval and counts identical stacks. The
+output is Brendan Gregg's collapsed format, one `frame;frame;frame count`
+line per distinct stack (root first), which flamegraph.pl, speedscope and
+inferno read directly. Nothing is installed into the interpreter, so the
+profiler costs nothing until a profile is requested.
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_SECONDS = 60.0
+MIN_INTERVAL = 0.001
+MAX_INTERVAL = 1.0
+
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profile is already running in this process."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+def collapse(frame, thread_name: str) -> str:
+    """Collapsed stack for one frame chain: thread name first, innermost frame last."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def sample(seconds: float, interval: float = 0.005) -> tuple[Counter, int]:
+    """Sample all other threads for `seconds`. Returns (stack counts, number of sampling ticks).
+
+    The interval is clamped to MIN_INTERVAL..MAX_INTERVAL and to `seconds`,
+    so one sleep never outlasts the profile. Raises ValueError for a
+    non-finite seconds or interval, and ProfilerBusy if a profile is already
+    running.
+    """
+    if not (math.isfinite(seconds) and math.isfinite(interval)):
+        raise ValueError("seconds and interval must be finite")
+    seconds = min(max(seconds, 0.0), MAX_SECONDS)
+    interval = min(max(interval, MIN_INTERVAL), MAX_INTERVAL, max(seconds, MIN_INTERVAL))
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        ticks = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    stacks[collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+            ticks += 1
+            time.sleep(interval)
+        return stacks, ticks
+    finally:
+        _busy.release()
+
+
+def render_collapsed(stacks: Counter) -> str:
+    """Collapsed-stack text, heaviest stacks first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -5,6 +5,9 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from .book_loader import extract_checklist_section, file_stamp
+from .lexical import TfidfIndex
+
 
 class TaskRouter:
     """Routes task types to their relevant knowledge sources."""
@@ -13,33 +16,43 @@ class TaskRouter:
         self.knowledge_dir = knowledge_dir
         self.routing_path = knowledge_dir / "routing.json"
         self.book_index_path = knowledge_dir / "book_index.json"
+        self.checklists_dir = knowledge_dir / "checklists"
+        self.skills_dir = knowledge_dir.parent / "skills"
         self._routing_data: dict | None = None
         self._book_index: dict | None = None
+        self._routing_stamp: tuple[int, int] | None = None
+        self._book_index_stamp: tuple[int, int] | None = None
+        self._route_index: TfidfIndex | None = None
 
     @property
     def routing_data(self) -> dict:
-        """Lazy-load routing.json, re-read on each access for live updates."""
-        if self._routing_data is None:
+        """Lazy-load routing.json, re-read whenever the file changes on disk."""
+        if self._routing_data is None or file_stamp(self.routing_path) != self._routing_stamp:
             self._reload_routing()
         return self._routing_data
 
     @property
     def book_index(self) -> dict:
-        """Lazy-load book_index.json."""
-        if self._book_index is None:
+        """Lazy-load book_index.json, re-read whenever the file changes on disk."""
+        if self._book_index is None or file_stamp(self.book_index_path) != self._book_index_stamp:
             self._reload_book_index()
         return self._book_index
 
     def _reload_routing(self) -> None:
-        if self.routing_path.exists():
+        previous = (self._routing_data or {}).get("tasks", {})
+        self._routing_stamp = file_stamp(self.routing_path)
+        if self._routing_stamp is not None:
             self._routing_data = json.loads(
                 self.routing_path.read_text(encoding="utf-8")
             )
         else:
             self._routing_data = {"tasks": {}}
+        if self._route_index is not None:
+            self._sync_route_index(previous, self._routing_data.get("tasks", {}))
 
     def _reload_book_index(self) -> None:
-        if self.book_index_path.exists():
+        self._book_index_stamp = file_stamp(self.book_index_path)
+        if self._book_index_stamp is not None:
             self._book_index = json.loads(
                 self.book_index_path.read_text(encoding="utf-8")
             )
@@ -50,6 +63,23 @@ class TaskRouter:
         """Force reload all data from disk."""
         self._routing_data = None
         self._book_index = None
+        self._route_index = None
+
+    def apply_change(self, event) -> None:
+        """Update derived state for one KnowledgeManager ChangeEvent.
+
+        Index files are re-read on next access; a checklist write re-indexes
+        only that task's routing document.
+        """
+        if event.path == self.routing_path:
+            self._routing_stamp = None
+        elif event.path == self.book_index_path:
+            self._book_index_stamp = None
+        elif event.path.parent == self.checklists_dir and self._route_index is not None:
+            task_type = event.path.stem
+            info = self.get_task_info(task_type)
+            if info is not None:
+                self._route_index.add(task_type, self._routing_document(task_type, info))
 
     def list_task_types(self) -> list[str]:
         """Return all available task type slugs."""
@@ -65,6 +95,70 @@ class TaskRouter:
             return self.book_index.get("articles", {}).get(book_id)
         return self.book_index.get("books", {}).get(book_id)
 
+    # ── Intent routing ──────────────────────────────────────────
+
+    def _routing_document(self, task_type: str, info: dict) -> str:
+        """Collect the text that describes a task: slug, description, headings, skill triggers."""
+        parts = [task_type.replace("_", " ")] * 3
+        parts += [info.get("description", "")] * 2
+
+        checklist_path = self.checklists_dir / f"{task_type}.md"
+        if checklist_path.exists():
+            for line in checklist_path.read_text(encoding="utf-8").split("\n"):
+                if line.startswith("## "):
+                    parts.append(line[3:])
+
+        skill_path = self.skills_dir / task_type.replace("_", "-") / "SKILL.md"
+        if skill_path.exists():
+            skill = skill_path.read_text(encoding="utf-8")
+            # Frontmatter description (folded YAML) + "When to Activate" bullets
+            if skill.startswith("---"):
+                parts.append(skill[3:].split("\n---", 1)[0])
+            triggers = extract_checklist_section(skill, "When to Activate")
+            if triggers:
+                parts.append(triggers)
+
+        return "\n".join(parts)
+
+    @property
+    def route_index(self) -> TfidfIndex:
+        """Lazy-build the TF-IDF model over all task routing documents."""
+        if self._route_index is None:
+            self._route_index = TfidfIndex({
+                task_type: self._routing_document(task_type, info)
+                for task_type, info in self.routing_data.get("tasks", {}).items()
+            })
+        return self._route_index
+
+    def _sync_route_index(self, previous: dict, current: dict) -> None:
+        """Re-index only the tasks whose routing entry was added, removed or re-described."""
+        for task_type in previous.keys() - current.keys():
+            self._route_index.remove(task_type)
+        for task_type, info in current.items():
+            old = previous.get(task_type)
+            if old is None or old.get("description") != info.get("description"):
+                self._route_index.add(task_type, self._routing_document(task_type, info))
+
+    def route_task(self, intent: str, top_k: int = 3) -> list[dict]:
+        """Rank task types against a natural-language intent.
+
+        Returns up to top_k dicts with task_type, score (cosine similarity) and
+        confidence (share of the total score across all matching tasks).
+        Empty when no task shares a meaningful term with the intent.
+        """
+        scored = self.route_index.score(intent)
+        total = sum(score for _, score in scored)
+        if total == 0:
+            return []
+        return [
+            {
+                "task_type": task_type,
+                "score": round(score, 4),
+                "confidence": round(score / total, 4),
+            }
+            for task_type, score in scored[:top_k]
+        ]
+
     def format_book_list(self) -> str:
         """Format all books as a readable list."""
         lines = ["# Available Books\n"]
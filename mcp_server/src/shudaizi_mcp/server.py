@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 from mcp.server import Server
-from mcp.server.stdio import stdio_server
 
+from . import access_log, metrics, tracing, usage
 from .tools import register_tools
 
 # Project root is 3 levels up from this file:
@@ -14,17 +15,32 @@ from .tools import register_tools
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
 
 
-def create_server() -> Server:
-    """Create and configure the MCP server."""
+def create_server(project_root: Path = PROJECT_ROOT, health=None) -> Server:
+    """Create and configure the MCP server.
+
+    A HealthMonitor passed as `health` is attached to the server's caches.
+    """
+    tracing.configure()  # no-op unless SHUDAIZI_TRACING is set
     server = Server("shudaizi-mcp")
-    register_tools(server, PROJECT_ROOT)
+    register_tools(server, project_root, access_log=access_log.from_env(), usage=usage.from_env(), health=health)
     return server
 
 
 async def _run() -> None:
+    import asyncio
+
+    from mcp.server.stdio import stdio_server
+
     server = create_server()
+    # stdio has no HTTP endpoint to scrape, so metrics go to a stats file instead
+    stats_file = os.environ.get("SHUDAIZI_METRICS_FILE")
     async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+        writer = asyncio.create_task(metrics.write_periodically(Path(stats_file))) if stats_file else None
+        try:
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+        finally:
+            if writer is not None:
+                writer.cancel()
 
 
 def main() -> None:
@@ -34,25 +50,99 @@ def main() -> None:
     asyncio.run(_run())
 
 
-def main_http(host: str = "127.0.0.1", port: int = 8530) -> None:
-    """Entry point for StreamableHTTP mode (used with Cloudflare Tunnel)."""
-    import uvicorn
+def create_http_app(project_root: Path = PROJECT_ROOT):
+    """Build the StreamableHTTP Starlette app: /mcp, /metrics, /healthz and /readyz.
+
+    /healthz answers whenever the event loop does. /readyz returns 200 only
+    once the corpus caches are warm and the integrity check passes, else 503.
+    Setting SHUDAIZI_ADMIN_TOKEN also mounts /admin/profile, which requires
+    `Authorization: Bearer <token>`; without it the route does not exist.
+    """
+    import asyncio
+    import contextlib
+    import hmac
+    import math
+
     from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, PlainTextResponse
     from starlette.routing import Route
     from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 
-    server = create_server()
+    from .health import HealthMonitor
+
+    monitor = HealthMonitor(project_root)
+    server = create_server(project_root, health=monitor)
     session_manager = StreamableHTTPSessionManager(app=server, stateless=True)
 
     class _AsgiApp:
         async def __call__(self, scope, receive, send):
             await session_manager.handle_request(scope, receive, send)
 
-    starlette_app = Starlette(
-        routes=[Route("/mcp", endpoint=_AsgiApp())],
-        lifespan=lambda app: session_manager.run(),
+    async def metrics_endpoint(request):
+        return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    async def healthz(request):
+        return PlainTextResponse("ok\n")
+
+    async def readyz(request):
+        status = monitor.status()
+        return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Warm off the event loop so /healthz answers while the corpus loads
+        warming = asyncio.create_task(asyncio.to_thread(monitor.warm_up))
+        async with session_manager.run():
+            yield
+        warming.cancel()
+
+    routes = [
+        Route("/mcp", endpoint=_AsgiApp()),
+        Route("/metrics", endpoint=metrics_endpoint),
+        Route("/healthz", endpoint=healthz),
+        Route("/readyz", endpoint=readyz),
+    ]
+
+    admin_token = os.environ.get("SHUDAIZI_ADMIN_TOKEN", "")
+    if admin_token:
+        async def profile_endpoint(request):
+            """Sample the live process for ?seconds=N (default 10, max 60); returns collapsed stacks."""
+            from . import profiler
+
+            supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+            if not hmac.compare_digest(supplied.encode(), admin_token.encode()):
+                return PlainTextResponse("Unauthorized\n", status_code=401)
+            try:
+                seconds = float(request.query_params.get("seconds", 10))
+                interval = float(request.query_params.get("interval_ms", 5)) / 1000
+            except ValueError:
+                return PlainTextResponse("seconds and interval_ms must be numbers\n", status_code=400)
+            if not (math.isfinite(seconds) and math.isfinite(interval)):
+                return PlainTextResponse("seconds and interval_ms must be finite\n", status_code=400)
+            try:
+                # Sample from a worker thread so the event loop keeps serving (and is itself sampled)
+                stacks, ticks = await asyncio.to_thread(profiler.sample, seconds, interval)
+            except profiler.ProfilerBusy as exc:
+                return PlainTextResponse(f"{exc}\n", status_code=409)
+            return PlainTextResponse(
+                profiler.render_collapsed(stacks),
+                headers={"X-Profile-Samples": str(ticks)},
+            )
+
+        routes.append(Route("/admin/profile", endpoint=profile_endpoint))
+
+    app = Starlette(
+        routes=routes,
+        lifespan=lifespan,
     )
-    uvicorn.run(starlette_app, host=host, port=port, log_level="info")
+    return tracing.instrument_asgi(app)
+
+
+def main_http(host: str = "127.0.0.1", port: int = 8530) -> None:
+    """Entry point for StreamableHTTP mode (used with Cloudflare Tunnel)."""
+    import uvicorn
+
+    uvicorn.run(create_http_app(), host=host, port=port, log_level="info")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,237 @@
+"""Near-duplicate detection — word shingles, MinHash signatures, and LSH banding."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+from collections.abc import Hashable, Iterable
+
+from .lexical import tokenize
+
+
+CITATION_RE = re.compile(r"\[a?\d{2,}\]")
+_CHECKBOX_RE = re.compile(r"^\s*-\s*(?:\[[ x]\]\s*)?")
+
+_MAX_HASH = (1 << 32) - 1
+
+DEFAULT_THRESHOLD = 0.5
+
+
+def normalize_item(line: str) -> str:
+    """Strip checkbox/bullet markers and [XX] citations from a checklist line."""
+    return CITATION_RE.sub("", _CHECKBOX_RE.sub("", line)).strip()
+
+
+def shingles(text: str, k: int = 2) -> frozenset[str]:
+    """Word k-shingles over stemmed, stopword-free tokens.
+
+    Text shorter than k tokens falls back to its unigrams so short items
+    still produce a comparable set.
+    """
+    tokens = tokenize(CITATION_RE.sub("", text))
+    if len(tokens) < k:
+        return frozenset(tokens)
+    return frozenset(" ".join(tokens[i : i + k]) for i in range(len(tokens) - k + 1))
+
+
+def paragraphs(text: str, min_tokens: int = 8) -> list[str]:
+    """Split markdown prose into blank-line-separated paragraphs.
+
+    Headings, horizontal rules and fragments shorter than min_tokens are
+    skipped — they are structural, not content worth comparing.
+    """
+    result = []
+    for block in re.split(r"\n\s*\n", text):
+        block = block.strip()
+        if not block or block.startswith("#") or block.startswith("---"):
+            continue
+        if len(tokenize(block)) >= min_tokens:
+            result.append(block)
+    return result
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures over shingle sets.
+
+    Each shingle is expanded into num_perm independent 32-bit hashes by
+    salted BLAKE2b (16 hashes per 64-byte digest); the signature is the
+    element-wise minimum. Deterministic for a given seed, so signatures
+    computed in different processes (server vs. offline analyzer) agree.
+    """
+
+    _PER_DIGEST = 16
+
+    def __init__(self, num_perm: int = 96, seed: int = 1):
+        if num_perm % self._PER_DIGEST:
+            raise ValueError(f"num_perm must be a multiple of {self._PER_DIGEST}")
+        self.num_perm = num_perm
+        self._salts = [
+            f"{seed}:{i}".encode("ascii") for i in range(num_perm // self._PER_DIGEST)
+        ]
+        self._unpack = struct.Struct(f"<{self._PER_DIGEST}I").unpack
+
+    def _hashes(self, shingle: str) -> tuple[int, ...]:
+        data = shingle.encode("utf-8")
+        row: tuple[int, ...] = ()
+        for salt in self._salts:
+            row += self._unpack(hashlib.blake2b(data, digest_size=64, salt=salt).digest())
+        return row
+
+    def signature(self, shingle_set: Iterable[str]) -> tuple[int, ...]:
+        rows = [self._hashes(s) for s in shingle_set]
+        if not rows:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(map(min, zip(*rows)))
+
+
+class LSHIndex:
+    """Locality-sensitive hash buckets over MinHash bands.
+
+    Two signatures become candidates when any band of `rows` slots is equal.
+    With the defaults (32 bands x 3 rows) pairs at Jaccard 0.5 collide with
+    ~99% probability, pairs at 0.2 with ~23%.
+    """
+
+    def __init__(self, bands: int = 32, rows: int = 3):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: list[dict[tuple[int, ...], set[Hashable]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature: tuple[int, ...]) -> Iterable[tuple[int, tuple[int, ...]]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start : start + self.rows]
+
+    def add(self, key: Hashable, signature: tuple[int, ...]) -> None:
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable, signature: tuple[int, ...]) -> None:
+        for band, band_key in self._band_keys(signature):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def candidates(self, signature: tuple[int, ...]) -> set[Hashable]:
+        found: set[Hashable] = set()
+        for band, band_key in self._band_keys(signature):
+            found |= self._buckets[band].get(band_key, set())
+        return found
+
+    def buckets(self) -> Iterable[set[Hashable]]:
+        """Every bucket holding more than one key — the candidate groups."""
+        for band_buckets in self._buckets:
+            for bucket in band_buckets.values():
+                if len(bucket) > 1:
+                    yield bucket
+
+
+class NearDuplicateIndex:
+    """Shingles + MinHash + LSH with exact Jaccard verification of candidates."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, hasher: MinHasher | None = None):
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+        rows = 3
+        self.lsh = LSHIndex(bands=self.hasher.num_perm // rows, rows=rows)
+        self.shingles: dict[Hashable, frozenset[str]] = {}
+        self.signatures: dict[Hashable, tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.shingles)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.shingles
+
+    def add(self, key: Hashable, text: str) -> None:
+        if key in self.shingles:
+            self.remove(key)
+        sh = shingles(text)
+        if not sh:
+            return
+        sig = self.hasher.signature(sh)
+        self.shingles[key] = sh
+        self.signatures[key] = sig
+        self.lsh.add(key, sig)
+
+    def remove(self, key: Hashable) -> None:
+        sig = self.signatures.pop(key, None)
+        self.shingles.pop(key, None)
+        if sig is not None:
+            self.lsh.remove(key, sig)
+
+    def query(self, text: str, threshold: float | None = None) -> list[tuple[Hashable, float]]:
+        """Indexed keys whose Jaccard similarity to text is >= threshold, best first."""
+        return self._verify(shingles(text), threshold)
+
+    def query_key(self, key: Hashable, threshold: float | None = None) -> list[tuple[Hashable, float]]:
+        """Like query(), for an already-indexed key (excluding itself)."""
+        if key not in self.shingles:
+            return []
+        return [(k, j) for k, j in self._verify(self.shingles[key], threshold, self.signatures[key]) if k != key]
+
+    def _verify(
+        self,
+        sh: frozenset[str],
+        threshold: float | None,
+        sig: tuple[int, ...] | None = None,
+    ) -> list[tuple[Hashable, float]]:
+        if not sh:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+        sig = sig or self.hasher.signature(sh)
+        matches = []
+        for key in self.lsh.candidates(sig):
+            score = jaccard(sh, self.shingles[key])
+            if score >= threshold:
+                matches.append((key, score))
+        matches.sort(key=lambda pair: -pair[1])
+        return matches
+
+    def clusters(self, threshold: float | None = None) -> list[list[Hashable]]:
+        """Group keys into connected components of verified near-duplicate pairs.
+
+        Only pairs that share an LSH bucket are compared, so the cost grows
+        with the number of keys times the (small) bucket sizes instead of
+        quadratically.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        parent: dict[Hashable, Hashable] = {}
+
+        def find(x: Hashable) -> Hashable:
+            root = x
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while x != root:
+                parent[x], x = root, parent[x]
+            return root
+
+        checked: set[frozenset] = set()
+        for bucket in self.lsh.buckets():
+            members = list(bucket)
+            for i, a in enumerate(members):
+                for b in members[i + 1 :]:
+                    pair = frozenset((a, b))
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    if jaccard(self.shingles[a], self.shingles[b]) >= threshold:
+                        parent.setdefault(a, a)
+                        parent.setdefault(b, b)
+                        ra, rb = find(a), find(b)
+                        if ra != rb:
+                            parent[rb] = ra
+
+        groups: dict[Hashable, list[Hashable]] = {}
+        for key in parent:
+            groups.setdefault(find(key), []).append(key)
+        return [sorted(group, key=repr) for group in groups.values() if len(group) > 1]
@@ -1,26 +1,54 @@
-"""MCP tool definitions — 5 tools (3 read + 2 write)."""
+"""MCP tool definitions — 6 tools (4 read + 2 write)."""
 
 from __future__ import annotations
 
+import asyncio
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from mcp.server import Server
 from mcp.types import TextContent, Tool
 
-from .book_loader import BookLoader
-from .knowledge_manager import KnowledgeManager
+from . import metrics, tracing
+from .access_log import AccessLog
+from .book_loader import SECTION_PATTERNS, BookLoader
 from .routing import TaskRouter
+from .usage import DETAIL_LEVELS, UsageTracker, format_report
+
+if TYPE_CHECKING:
+    from .health import HealthMonitor
+    from .knowledge_manager import KnowledgeManager
 
 
 def register_tools(
     server: Server,
     project_root: Path,
+    access_log: AccessLog | None = None,
+    usage: UsageTracker | None = None,
+    health: HealthMonitor | None = None,
 ) -> None:
     """Register all MCP tools on the server."""
 
     loader = BookLoader(project_root)
+    usage = usage if usage is not None else UsageTracker()
     router = TaskRouter(project_root / "knowledge")
-    manager = KnowledgeManager(project_root)
+    if health is not None:
+        health.attach(loader, router)
+    manager: KnowledgeManager | None = None
+
+    def get_manager() -> KnowledgeManager:
+        # Write tools are rare; keep their module off the startup path
+        nonlocal manager
+        if manager is None:
+            from .knowledge_manager import KnowledgeManager
+
+            manager = KnowledgeManager(project_root)
+            manager.subscribe(loader.apply_change)
+            manager.subscribe(router.apply_change)
+            if health is not None:
+                manager.subscribe(health.apply_change)
+        return manager
 
     # ── Read Tools ──────────────────────────────────────────────
 
@@ -45,14 +73,25 @@ def register_tools(
                     "architecture_review, code_review, security_audit, test_strategy, "
                     "bug_fix, feature_design, api_design, data_viz_review, product_doc, "
                     "presentation, devops, ai_ml_design, refactoring, observability, "
-                    "ux_review, agent_design"
+                    "ux_review, agent_design. If unsure, pass task_type='auto' with the user's "
+                    "request as `intent` and the best-matching checklist is chosen for you. "
+                    "For reviews spanning several concerns, pass comma-separated task types "
+                    "(e.g. 'code_review,security_audit') to get one merged, de-duplicated checklist."
                 ),
                 inputSchema={
                     "type": "object",
                     "properties": {
                         "task_type": {
                             "type": "string",
-                            "description": f"Task type. Available: {task_enum_desc}",
+                            "description": (
+                                f"Task type, comma-separated task types to merge, or 'auto' to route from "
+                                f"`intent`. Available: {task_enum_desc}"
+                            ),
+                        },
+                        "intent": {
+                            "type": "string",
+                            "description": "Natural-language description of what the user wants. Required when task_type='auto'.",
+                            "default": "",
                         },
                         "focus": {
                             "type": "string",
@@ -65,6 +104,11 @@ def register_tools(
                             "description": "brief = items only (~1-3K tokens), standard = items + questions (~3-6K), detailed = everything (~5-10K)",
                             "default": "standard",
                         },
+                        "max_tokens": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "description": "Optional: token budget shared across all requested checklists. Sections are trimmed round-robin to fit.",
+                        },
                     },
                     "required": ["task_type"],
                 },
@@ -89,6 +133,17 @@ def register_tools(
                             "description": "Which section to return. 'full' returns entire file (use sparingly).",
                             "default": "key_ideas",
                         },
+                        "page_tokens": {
+                            "type": "integer",
+                            "description": (
+                                "Return the section in pages of about this many tokens, split at section "
+                                "and paragraph boundaries. Each page ends with a next_cursor to fetch the rest."
+                            ),
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "next_cursor from the previous page. Implies paging (default page_tokens: 2000).",
+                        },
                     },
                     "required": ["book_id"],
                 },
@@ -111,6 +166,25 @@ def register_tools(
                     },
                 },
             ),
+            Tool(
+                name="get_usage_report",
+                description=(
+                    "Report which books, articles and checklists have been read since counting began: "
+                    "reads and tokens served per source and section, per checklist and detail level, "
+                    "the most requested focus terms, and sources that were never read. Read-only."
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "category": {
+                            "type": "string",
+                            "enum": ["all", "sources", "checklists"],
+                            "description": "Which part of the report to return.",
+                            "default": "all",
+                        },
+                    },
+                },
+            ),
             # ── Write Tools ──────────────────────────────────────────
             Tool(
                 name="add_knowledge_source",
@@ -154,6 +228,12 @@ def register_tools(
                             "type": "integer",
                             "description": "Publication year. Optional.",
                         },
+                        "on_duplicate": {
+                            "type": "string",
+                            "enum": ["flag", "reject", "allow"],
+                            "description": "flag: report existing sources with near-duplicate paragraphs. reject: refuse content that mostly repeats an existing source. allow: skip the check.",
+                            "default": "flag",
+                        },
                     },
                     "required": ["title", "source_type", "content", "category", "task_types"],
                 },
@@ -184,6 +264,12 @@ def register_tools(
                             "type": "string",
                             "description": "The checklist items to add/replace, or patterns to remove. Each item should cite its source: '- [ ] Item description [XX]'",
                         },
+                        "on_duplicate": {
+                            "type": "string",
+                            "enum": ["flag", "reject", "allow"],
+                            "description": "For add_items. flag: report items that near-duplicate existing ones. reject: drop them. allow: skip the check.",
+                            "default": "flag",
+                        },
                     },
                     "required": ["task_type", "action", "section", "content"],
                 },
@@ -192,27 +278,107 @@ def register_tools(
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict) -> list[TextContent]:
+        labels = _metric_labels(name, arguments, router.list_task_types())
+        hits, misses = loader.cache_hits, loader.cache_misses
+        with tracing.span("tool.call", **labels) as span:
+            start = time.perf_counter()
+            try:
+                result = await _dispatch(name, arguments)
+            except Exception:
+                elapsed = time.perf_counter() - start
+                metrics.record_tool_call(labels, elapsed, "", error=True)
+                if access_log is not None:
+                    access_log.record(name, arguments, elapsed * 1000, 0, None, error=True)
+                raise
+            elapsed = time.perf_counter() - start
+            text = "".join(c.text for c in result)
+            error = _is_error(text)
+            size = len(text.encode("utf-8"))
+            span.set_attribute("response.bytes", size)
+            span.set_attribute("error", error)
+            span.set_attribute("cache.hits", loader.cache_hits - hits)
+            span.set_attribute("cache.misses", loader.cache_misses - misses)
+        metrics.record_tool_call(labels, elapsed, text, error)
+        if access_log is not None:
+            # None when the call never touched the file cache (e.g. listings)
+            touched = loader.cache_hits > hits or loader.cache_misses > misses
+            cache_hit = loader.cache_misses == misses if touched else None
+            access_log.record(name, arguments, elapsed * 1000, size, cache_hit, error)
+        return result
+
+    async def _dispatch(name: str, arguments: dict) -> list[TextContent]:
         if name == "get_task_checklist":
             task_type = arguments["task_type"]
             focus = arguments.get("focus", "")
             detail_level = arguments.get("detail_level", "standard")
 
-            content = loader.read_checklist(task_type, detail_level)
-            if focus:
-                content = loader.filter_by_focus(content, focus)
+            routing_note = ""
+            if task_type == "auto":
+                intent = arguments.get("intent", "")
+                if not intent:
+                    return [TextContent(type="text", text="Error: task_type='auto' requires an `intent` description.")]
+                routes = router.route_task(intent)
+                if not routes:
+                    return [TextContent(
+                        type="text",
+                        text=f"Could not route intent to a task type. Available: {', '.join(router.list_task_types())}",
+                    )]
+                task_type = routes[0]["task_type"]
+                alternatives = ", ".join(
+                    f"{r['task_type']} ({r['confidence']:.0%})" for r in routes[1:]
+                )
+                routing_note = (
+                    f"> Auto-routed to `{task_type}` (confidence {routes[0]['confidence']:.0%})."
+                    + (f" Alternatives: {alternatives}." if alternatives else "")
+                    + "\n\n"
+                )
 
-            return [TextContent(type="text", text=content)]
+            task_types = [t.strip() for t in task_type.split(",") if t.strip()]
+            max_tokens = arguments.get("max_tokens")
+            if max_tokens is not None:
+                try:
+                    max_tokens = int(max_tokens)
+                except (TypeError, ValueError):
+                    max_tokens = 0
+                if max_tokens < 1:
+                    return [TextContent(type="text", text="Error: max_tokens must be a positive integer.")]
+            if len(task_types) > 1 or max_tokens is not None:
+                content = loader.read_merged_checklist(task_types, detail_level, focus, max_tokens)
+            else:
+                content = loader.read_checklist(task_type, detail_level)
+                if focus:
+                    content = loader.filter_by_focus(content, focus)
+            if not _is_error(content):
+                known = router.list_task_types()
+                usage.record_checklist([t for t in task_types if t in known], focus, detail_level, content)
+
+            return [TextContent(type="text", text=routing_note + content)]
 
         elif name == "get_book_knowledge":
             book_id = arguments["book_id"]
             section = arguments.get("section", "key_ideas")
 
-            content = loader.read_book_section(book_id, section)
+            if "page_tokens" in arguments or "cursor" in arguments:
+                try:
+                    page_tokens = int(arguments.get("page_tokens", 2000))
+                except (TypeError, ValueError):
+                    page_tokens = 0
+                if page_tokens < 1:
+                    return [TextContent(type="text", text="Error: page_tokens must be a positive integer.")]
+                content = loader.read_book_page(
+                    book_id,
+                    section,
+                    cursor=arguments.get("cursor", ""),
+                    page_tokens=page_tokens,
+                )
+            else:
+                content = loader.read_book_section(book_id, section)
+            if not _is_error(content) and not content.startswith(("Invalid cursor", "Cursor ")):
+                usage.record_source(book_id, section, content)
             return [TextContent(type="text", text=content)]
 
         elif name == "list_available_knowledge":
             category = arguments.get("category", "all")
-            router.reload()  # refresh from disk
 
             parts = []
             if category in ("all", "tasks"):
@@ -224,8 +390,21 @@ def register_tools(
 
             return [TextContent(type="text", text="\n\n".join(parts))]
 
+        elif name == "get_usage_report":
+            report = format_report(
+                usage.snapshot(),
+                router.book_index,
+                router.list_task_types(),
+                arguments.get("category", "all"),
+            )
+            return [TextContent(type="text", text=report)]
+
         elif name == "add_knowledge_source":
-            result = manager.add_knowledge_source(
+            on_duplicate = arguments.get("on_duplicate", "flag")
+            if on_duplicate in ("flag", "reject"):
+                # The first duplicate check scans every source; keep that scan off the event loop
+                await asyncio.to_thread(get_manager().build_paragraph_index)
+            result = get_manager().add_knowledge_source(
                 title=arguments["title"],
                 source_type=arguments["source_type"],
                 content=arguments["content"],
@@ -233,15 +412,19 @@ def register_tools(
                 task_types=arguments["task_types"],
                 author=arguments.get("author", ""),
                 year=arguments.get("year"),
+                on_duplicate=on_duplicate,
             )
+            if "error" in result:
+                return [TextContent(type="text", text=f"Error: {result['error']}")]
             return [TextContent(type="text", text=result["message"])]
 
         elif name == "update_checklist":
-            result = manager.update_checklist(
+            result = get_manager().update_checklist(
                 task_type=arguments["task_type"],
                 action=arguments["action"],
                 section=arguments["section"],
                 content=arguments["content"],
+                on_duplicate=arguments.get("on_duplicate", "flag"),
             )
             if "error" in result:
                 return [TextContent(type="text", text=f"Error: {result['error']}")]
@@ -249,3 +432,49 @@ def register_tools(
 
         else:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
+
+
+TOOL_NAMES = (
+    "get_task_checklist",
+    "get_book_knowledge",
+    "list_available_knowledge",
+    "get_usage_report",
+    "add_knowledge_source",
+    "update_checklist",
+)
+
+
+def _metric_labels(name: str, arguments: dict, task_types: list[str]) -> dict[str, str]:
+    """Metric labels for a call, folded to a bounded set of values.
+
+    Free-form inputs (merged task lists, unknown tools, detail levels,
+    checklist section names) would otherwise create one time series per distinct string.
+    """
+    task_type = str(arguments.get("task_type", ""))
+    if "," in task_type:
+        task_type = "merged"
+    elif task_type and task_type != "auto" and task_type not in task_types:
+        task_type = "unknown"
+
+    detail_level = ""
+    if name == "get_task_checklist":
+        detail_level = str(arguments.get("detail_level", "standard"))
+        if detail_level not in DETAIL_LEVELS:
+            detail_level = "unknown"
+
+    section = ""
+    if name == "get_book_knowledge":
+        section = str(arguments.get("section", "key_ideas"))
+        if section not in SECTION_PATTERNS and section != "full":
+            section = "unknown"
+
+    return {
+        "tool": name if name in TOOL_NAMES else "unknown",
+        "task_type": task_type,
+        "detail_level": detail_level,
+        "section": section,
+    }
+
+
+def _is_error(text: str) -> bool:
+    return text.startswith(("Error:", "Unknown tool:")) or text.endswith("not found.")
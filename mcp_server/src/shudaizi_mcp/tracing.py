@@ -0,0 +1,181 @@
+"""Optional OpenTelemetry tracing — nested spans for dispatch, cache, disk and extraction.
+
+Off by default, and close to free when off: span() hands back one shared
+no-op context manager. Enable with SHUDAIZI_TRACING:
+
+    otlp         export over OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (default localhost:4318)
+    file:PATH    append one JSON object per finished span to PATH, for offline analysis
+    console      print finished spans to stderr
+
+Needs the `tracing` extra (opentelemetry-sdk, plus the OTLP exporter for
+`otlp`). OpenTelemetry is imported only when tracing is enabled, so it costs
+nothing at startup otherwise.
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+_provider = None
+
+
+class _NoopSpan:
+    """Stands in for both the span context manager and the span itself."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **attributes):
+    """Context manager for a child span of the current one (no-op when tracing is off).
+
+    None-valued attributes are dropped; OpenTelemetry rejects them.
+    """
+    if _tracer is None:
+        return _NOOP
+    return _tracer.start_as_current_span(
+        name, attributes={k: v for k, v in attributes.items() if v is not None}
+    )
+
+
+def traced(name: str):
+    """Decorator: run the function inside span `name`, recording the size of a str result."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.start_as_current_span(name) as s:
+                result = fn(*args, **kwargs)
+                if isinstance(result, str):
+                    s.set_attribute("result.bytes", len(result))
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def configure(mode: str | None = None) -> bool:
+    """Set up tracing for `mode` (default: $SHUDAIZI_TRACING). Returns True when enabled."""
+    global _tracer, _provider
+    mode = mode if mode is not None else os.environ.get("SHUDAIZI_TRACING", "")
+    if not mode or _tracer is not None:
+        return _tracer is not None
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    except ImportError:
+        logger.warning("SHUDAIZI_TRACING=%s but opentelemetry-sdk is not installed; tracing disabled", mode)
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "shudaizi-mcp"}))
+    if mode == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("SHUDAIZI_TRACING=otlp needs opentelemetry-exporter-otlp-proto-http; tracing disabled")
+            return False
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    elif mode.startswith("file:"):
+        provider.add_span_processor(BatchSpanProcessor(_jsonl_exporter(Path(mode[len("file:"):]))))
+    elif mode == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    else:
+        logger.warning("Unknown SHUDAIZI_TRACING mode %r (expected otlp, file:PATH or console)", mode)
+        return False
+
+    _provider = provider
+    _tracer = provider.get_tracer("shudaizi_mcp")
+    atexit.register(provider.shutdown)
+    return True
+
+
+def flush() -> None:
+    """Export all finished spans now."""
+    if _provider is not None:
+        _provider.force_flush()
+
+
+def shutdown() -> None:
+    """Flush and turn tracing back off."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = None
+    _provider = None
+
+
+def instrument_asgi(app, excluded_urls: str = "/metrics,/healthz,/readyz"):
+    """Wrap an ASGI app in OpenTelemetry's server middleware when tracing is on and it is installed.
+
+    Transport spans (HTTP receive/send) then parent the tool spans.
+    """
+    if _provider is None:
+        return app
+    try:
+        from opentelemetry.instrumentation.asgi import OpenTelemetryMiddleware
+    except ImportError:
+        return app
+    return OpenTelemetryMiddleware(app, excluded_urls=excluded_urls, tracer_provider=_provider)
+
+
+def _span_record(s) -> dict:
+    ctx = s.get_span_context()
+    return {
+        "name": s.name,
+        "trace_id": f"{ctx.trace_id:032x}",
+        "span_id": f"{ctx.span_id:016x}",
+        "parent_id": f"{s.parent.span_id:016x}" if s.parent else None,
+        "start_ns": s.start_time,
+        "duration_ms": round((s.end_time - s.start_time) / 1e6, 4),
+        "status": s.status.status_code.name,
+        "attributes": dict(s.attributes or {}),
+    }
+
+
+def _jsonl_exporter(path: Path):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonlSpanExporter(SpanExporter):
+        def __init__(self):
+            self._lock = threading.Lock()
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        def export(self, spans) -> SpanExportResult:
+            lines = "".join(json.dumps(_span_record(s), default=str) + "\n" for s in spans)
+            with self._lock, open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            pass
+
+    return JsonlSpanExporter()
@@ -0,0 +1,230 @@
+"""Usage analytics — which sources and checklist views are actually read.
+
+An in-memory counter keyed by (book_id, section) for get_book_knowledge and
+(task_type, focus, detail_level) for get_task_checklist, with the tokens
+served alongside each count. Set SHUDAIZI_USAGE_FILE to persist it: counts
+already in the file are loaded at startup, and the file is rewritten
+atomically at most every SHUDAIZI_USAGE_FLUSH seconds (default 60) and at
+exit. The get_usage_report tool and `python -m shudaizi_mcp.usage` render
+the same report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .book_loader import SECTION_PATTERNS, estimate_tokens
+
+SECTIONS = (*SECTION_PATTERNS, "full")
+DETAIL_LEVELS = ("brief", "standard", "detailed")
+
+
+def normalize_focus(focus: str) -> str:
+    """Canonical focus key: lower-cased, de-duplicated, sorted terms."""
+    return ",".join(sorted({t.strip().lower() for t in focus.split(",") if t.strip()}))
+
+
+class UsageTracker:
+    """Aggregated read counts and served tokens, optionally persisted to a JSON file."""
+
+    def __init__(self, path: Path | None = None, flush_interval: float = 60.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.since = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.sources: dict[tuple[str, str], list[int]] = {}  # (book_id, section) → [reads, tokens]
+        self.checklists: dict[tuple[str, str, str], list[int]] = {}  # (task, focus, level) → [reads, tokens]
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        if path is not None and path.exists():
+            self.load(path)
+
+    # ── Recording ───────────────────────────────────────────────
+
+    def record_source(self, book_id: str, section: str, text: str) -> None:
+        self._bump(self.sources, (book_id, section), estimate_tokens(text))
+
+    def record_checklist(self, task_types: list[str], focus: str, detail_level: str, text: str) -> None:
+        """Count one checklist response.
+
+        A merged response counts as a read of each task type in it, with its
+        tokens split evenly between them.
+        """
+        focus = normalize_focus(focus)
+        tokens = estimate_tokens(text) // max(len(task_types), 1)
+        for task_type in task_types:
+            self._bump(self.checklists, (task_type, focus, detail_level), tokens)
+
+    def _bump(self, table: dict, key: tuple, tokens: int) -> None:
+        with self._lock:
+            counts = table.setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += tokens
+            self._dirty = True
+        if self.path is not None and time.monotonic() - self._last_save >= self.flush_interval:
+            self.save()
+
+    # ── Persistence ─────────────────────────────────────────────
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "version": 1,
+                "since": self.since,
+                "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "sources": [
+                    {"book_id": b, "section": s, "reads": r, "tokens": t}
+                    for (b, s), (r, t) in sorted(self.sources.items())
+                ],
+                "checklists": [
+                    {"task_type": task, "focus": f, "detail_level": lvl, "reads": r, "tokens": t}
+                    for (task, f, lvl), (r, t) in sorted(self.checklists.items())
+                ],
+            }
+
+    def load(self, path: Path) -> None:
+        """Add the counts stored in path to this tracker."""
+        data = json.loads(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self.since = min(self.since, data.get("since", self.since))
+            for row in data.get("sources", []):
+                counts = self.sources.setdefault((row["book_id"], row["section"]), [0, 0])
+                counts[0] += row["reads"]
+                counts[1] += row["tokens"]
+            for row in data.get("checklists", []):
+                key = (row["task_type"], row["focus"], row["detail_level"])
+                counts = self.checklists.setdefault(key, [0, 0])
+                counts[0] += row["reads"]
+                counts[1] += row["tokens"]
+
+    def save(self) -> None:
+        """Atomically write the counts to self.path if anything changed."""
+        if self.path is None or not self._dirty:
+            return
+        snapshot = self.snapshot()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(snapshot, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def from_env() -> UsageTracker:
+    """Tracker configured by environment variables; in-memory only unless SHUDAIZI_USAGE_FILE is set."""
+    path = os.environ.get("SHUDAIZI_USAGE_FILE")
+    try:
+        interval = float(os.environ.get("SHUDAIZI_USAGE_FLUSH", "60"))
+    except ValueError:
+        interval = 60.0
+    tracker = UsageTracker(Path(path) if path else None, interval)
+    if path:
+        atexit.register(tracker.save)
+    return tracker
+
+
+# ── Report ──────────────────────────────────────────────────────
+
+
+def format_report(snapshot: dict, book_index: dict, task_types: list[str], category: str = "all") -> str:
+    """Markdown heatmap of reads per source × section and per checklist × detail level."""
+    parts = [f"# Usage Report\n\nCounting since {snapshot['since']} (updated {snapshot['updated']})."]
+    if category in ("all", "sources"):
+        parts.append(_format_sources(snapshot["sources"], book_index))
+    if category in ("all", "checklists"):
+        parts.append(_format_checklists(snapshot["checklists"], task_types))
+    return "\n\n".join(parts)
+
+
+def _format_sources(rows: list[dict], book_index: dict) -> str:
+    known = {**book_index.get("books", {}), **book_index.get("articles", {})}
+    per_source: dict[str, dict[str, int]] = {}
+    tokens: dict[str, int] = {}
+    for row in rows:
+        per_source.setdefault(row["book_id"], {})[row["section"]] = row["reads"]
+        tokens[row["book_id"]] = tokens.get(row["book_id"], 0) + row["tokens"]
+
+    lines = ["## Sources", ""]
+    if per_source:
+        lines.append("| ID | Title | Reads | Tokens served | " + " | ".join(SECTIONS) + " |")
+        lines.append("|" + "---|" * (4 + len(SECTIONS)))
+        for book_id, sections in sorted(per_source.items(), key=lambda kv: (-sum(kv[1].values()), kv[0])):
+            title = known.get(book_id, {}).get("title", "(not in index)")
+            cells = [str(sections.get(s, "")) for s in SECTIONS]
+            lines.append(
+                f"| {book_id} | {title} | {sum(sections.values())} | {tokens[book_id]} | " + " | ".join(cells) + " |"
+            )
+    else:
+        lines.append("No source reads recorded.")
+
+    never = sorted(set(known) - set(per_source))
+    lines += ["", f"**Never read ({len(never)} of {len(known)}):** " + (", ".join(never) if never else "none")]
+    return "\n".join(lines)
+
+
+def _format_checklists(rows: list[dict], task_types: list[str]) -> str:
+    per_task: dict[str, dict[str, int]] = {}
+    focus_counts: dict[str, dict[str, int]] = {}
+    tokens: dict[str, int] = {}
+    for row in rows:
+        task = row["task_type"]
+        levels = per_task.setdefault(task, {})
+        levels[row["detail_level"]] = levels.get(row["detail_level"], 0) + row["reads"]
+        tokens[task] = tokens.get(task, 0) + row["tokens"]
+        if row["focus"]:
+            focus = focus_counts.setdefault(task, {})
+            focus[row["focus"]] = focus.get(row["focus"], 0) + row["reads"]
+
+    lines = ["## Checklists", ""]
+    if per_task:
+        lines.append("| Task type | Reads | Tokens served | " + " | ".join(DETAIL_LEVELS) + " | Top focus |")
+        lines.append("|" + "---|" * (4 + len(DETAIL_LEVELS)))
+        for task, levels in sorted(per_task.items(), key=lambda kv: (-sum(kv[1].values()), kv[0])):
+            top = sorted(focus_counts.get(task, {}).items(), key=lambda kv: (-kv[1], kv[0]))[:3]
+            cells = [str(levels.get(lvl, "")) for lvl in DETAIL_LEVELS]
+            lines.append(
+                f"| {task} | {sum(levels.values())} | {tokens[task]} | " + " | ".join(cells)
+                + " | " + ", ".join(f"{f} ({n})" for f, n in top) + " |"
+            )
+    else:
+        lines.append("No checklist reads recorded.")
+
+    never = sorted(set(task_types) - set(per_task))
+    lines += ["", f"**Never read ({len(never)} of {len(task_types)}):** " + (", ".join(never) if never else "none")]
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Print the report for a persisted usage file."""
+    from .routing import TaskRouter
+    from .server import PROJECT_ROOT
+
+    parser = argparse.ArgumentParser(description="Report on persisted shudaizi usage counts")
+    parser.add_argument("usage_file", nargs="?", default=os.environ.get("SHUDAIZI_USAGE_FILE"),
+                        help="Usage JSON file (default: $SHUDAIZI_USAGE_FILE)")
+    parser.add_argument("--category", choices=["all", "sources", "checklists"], default="all")
+    parser.add_argument("--project-root", type=Path, default=PROJECT_ROOT)
+    parser.add_argument("--json", action="store_true", help="Print the raw counts instead of the report")
+    args = parser.parse_args()
+    if not args.usage_file:
+        parser.error("no usage file given and SHUDAIZI_USAGE_FILE is not set")
+
+    tracker = UsageTracker()
+    tracker.load(Path(args.usage_file))
+    snapshot = tracker.snapshot()
+    if args.json:
+        print(json.dumps(snapshot, indent=2))
+        return
+    router = TaskRouter(args.project_root / "knowledge")
+    print(format_report(snapshot, router.book_index, router.list_task_types(), args.category))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Synthetic knowledge-base generator for scalability testing.
+
+Writes a complete, template-conformant project tree:
+
+    OUT/book_research/NN_slug.md                    books (book_research_prompts.md template)
+    OUT/book_research/anthropic_articles/NN_slug.md articles
+    OUT/knowledge/checklists/<task>.md              checklists with frontmatter + cited items
+    OUT/knowledge/book_index.json                   matching metadata
+    OUT/knowledge/routing.json                      task → source mapping
+
+Prose is drawn from a fixed engineering vocabulary with a per-source topic
+bias, so sources differ from each other the way real ones do (they do not
+collapse into near-duplicates) while staying deterministic for a given seed.
+
+Point BookLoader/TaskRouter/KnowledgeManager or create_server() at OUT to
+measure how they behave at 10x-1000x today's size; run_benchmarks.py
+--scaling and run_load_test.py --corpus do exactly that.
+
+Usage:
+    python tests/corpus_generator.py /tmp/corpus --books 10000 --articles 500 --tasks 40
+    python tests/corpus_generator.py /tmp/corpus --books 1000 --paragraphs 6   # ~30KB books
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+
+VOCABULARY = """
+    abstraction adapter aggregate alerting allocation api architecture async audit availability
+    backpressure batch benchmark boundary budget buffer cache canary capacity cardinality checkpoint
+    circuit client cluster cohesion compaction component concurrency config consensus consistency
+    container contract coupling coverage cursor dashboard deadline debt decomposition dependency
+    deployment design diagnostics domain durability encapsulation endpoint entity error event
+    eviction experiment failover fallback feature fixture flag fragment framework gateway gradient
+    granularity handler hashing heuristic idempotency incident index inference injection interface
+    invariant isolation iteration join kernel latency layer lease ledger lineage load lock logging
+    mesh message metric migration model module monitor mutation namespace network node normalization
+    observability offset orchestration outage ownership pagination partition payload pipeline policy
+    pool prompt protocol provenance proxy quorum queue quota rate reconciliation recovery redundancy
+    refactoring regression release reliability replica repository request resilience retry review
+    rollback rollout routing runtime sandbox saturation scaling schema secret segment serialization
+    service session shard signal snapshot span staging state storage stream subscriber surface
+    telemetry tenant test threshold throughput timeout token topology trace tradeoff transaction
+    transport trigger validation versioning workflow workload
+""".split()
+
+CONNECTIVES = """
+    the a of to and for when with under across before after without because while unless
+    should may can often rarely tends helps prevents requires
+""".split()
+
+BOOK_SECTIONS = [
+    "What This Book Is About",
+    "Key Ideas & Mental Models",
+    "Patterns & Approaches Introduced",
+    "Tradeoffs & Tensions",
+    "What to Watch Out For",
+    "Applicability by Task Type",
+    "Relationship to Other Books in This Category",
+    "Freshness Assessment",
+    "Key Framings Worth Preserving",
+]
+
+ARTICLE_SECTIONS = ["Core Thesis", "Key Architectural Distinction", "Design Principles", "Key Insight"]
+
+CATEGORIES = [
+    "Architecture & System Design",
+    "Code Quality & Design",
+    "Security",
+    "Testing & Quality",
+    "DevOps & Reliability",
+    "AI/ML Engineering",
+    "Product & UX",
+]
+
+
+class ProseGenerator:
+    """Seeded sentence/paragraph generator with a per-document topic bias."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def topic(self, size: int = 12) -> list[str]:
+        return self.rng.sample(VOCABULARY, size)
+
+    def sentence(self, topic: list[str], min_words: int = 10, max_words: int = 22) -> str:
+        words = []
+        for _ in range(self.rng.randint(min_words, max_words)):
+            roll = self.rng.random()
+            if roll < 0.35:
+                words.append(self.rng.choice(CONNECTIVES))
+            elif roll < 0.65:
+                words.append(self.rng.choice(topic))
+            else:
+                words.append(self.rng.choice(VOCABULARY))
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self, topic: list[str], sentences: int = 4) -> str:
+        return " ".join(self.sentence(topic) for _ in range(sentences))
+
+    def title(self, topic: list[str], words: int = 3) -> str:
+        return " ".join(w.capitalize() for w in self.rng.sample(topic, words))
+
+
+def slugify(title: str) -> str:
+    return "_".join(title.lower().split())[:60]
+
+
+def book_markdown(gen: ProseGenerator, title: str, author: str, year: int, category: str,
+                  topic: list[str], paragraphs: int) -> str:
+    lines = [
+        f"# {title} — {author} ({year})",
+        f"**Skill Category:** {category}",
+        f"**Relevance to AI-assisted / vibe-coding workflows:** {gen.sentence(topic)}",
+        "",
+    ]
+    for section in BOOK_SECTIONS:
+        lines += ["---", "", f"## {section}", ""]
+        if section == "Key Ideas & Mental Models":
+            for n in range(1, paragraphs + 1):
+                lines += [f"### {n}. {gen.title(topic)}", "", gen.paragraph(topic), ""]
+        elif section in ("What to Watch Out For", "Applicability by Task Type"):
+            lines += [f"- **{gen.title(topic, 2)}**: {gen.sentence(topic)}" for _ in range(paragraphs)]
+            lines.append("")
+        elif section == "Freshness Assessment":
+            lines += [f"**Publication date:** {year}", "", gen.paragraph(topic, 2), ""]
+        elif section == "Key Framings Worth Preserving":
+            lines += [f'> **"{gen.sentence(topic, 6, 12)}"**\n' for _ in range(3)]
+        else:
+            for _ in range(paragraphs):
+                lines += [gen.paragraph(topic), ""]
+    return "\n".join(lines)
+
+
+def article_markdown(gen: ProseGenerator, title: str, date: str, topic: list[str], paragraphs: int) -> str:
+    lines = [f"# {title}", f"**Date:** {date}", "**Source:** Synthetic corpus", "", "---", ""]
+    for section in ARTICLE_SECTIONS:
+        lines += [f"## {section}", ""]
+        for _ in range(max(1, paragraphs // 2)):
+            lines += [gen.paragraph(topic, 3), ""]
+    return "\n".join(lines)
+
+
+def checklist_markdown(gen: ProseGenerator, task: str, description: str, sources: dict,
+                       topic: list[str], phases: int, items: int) -> str:
+    cited = sources["primary_sources"] + sources["secondary_sources"]
+    articles = sources["anthropic_articles"]
+    lines = [
+        "---",
+        f"task: {task}",
+        f"description: {description}",
+        f"primary_sources: {json.dumps(sources['primary_sources'])}",
+        f"secondary_sources: {json.dumps(sources['secondary_sources'])}",
+        f"anthropic_articles: {json.dumps(articles)}",
+        "version: 1",
+        "updated: 2026-01-01",
+        "---",
+        "",
+        f"# {task.replace('_', ' ').title()} Checklist",
+        "",
+    ]
+    for phase in range(1, phases + 1):
+        lines += [f"## Phase {phase}: {gen.title(topic, 2)}", ""]
+        for _ in range(items):
+            refs = gen.rng.sample(cited + articles, min(2, len(cited + articles)))
+            lines.append(f"- [ ] {gen.sentence(topic, 8, 16)} " + "".join(f"[{r}]" for r in refs))
+        lines.append("")
+    lines += ["## Anti-Patterns to Flag", ""]
+    for _ in range(max(1, items // 2)):
+        lines.append(f"- **{gen.title(topic, 2)}**: {gen.sentence(topic, 8, 14)} [{gen.rng.choice(cited)}]")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def generate_corpus(
+    out: Path,
+    books: int = 100,
+    articles: int = 20,
+    tasks: int = 16,
+    paragraphs: int = 4,
+    phases: int = 6,
+    items: int = 8,
+    seed: int = 0,
+) -> dict:
+    """Write a synthetic project tree under `out` and return a summary."""
+    gen = ProseGenerator(seed)
+    research_dir = out / "book_research"
+    articles_dir = research_dir / "anthropic_articles"
+    checklists_dir = out / "knowledge" / "checklists"
+    for d in (research_dir, articles_dir, checklists_dir):
+        d.mkdir(parents=True, exist_ok=True)
+
+    index: dict = {"version": 1, "updated": "2026-01-01", "books": {}, "articles": {}}
+    total_bytes = 0
+
+    for n in range(1, books + 1):
+        book_id = f"{n:02d}"
+        topic = gen.topic()
+        title = f"{gen.title(topic)} {n}"
+        year = gen.rng.randint(1995, 2025)
+        category = gen.rng.choice(CATEGORIES)
+        path = research_dir / f"{book_id}_{slugify(title)}.md"
+        text = book_markdown(gen, title, f"Author {n}", year, category, topic, paragraphs)
+        path.write_text(text, encoding="utf-8")
+        total_bytes += len(text)
+        index["books"][book_id] = {
+            "title": title,
+            "author": f"Author {n}",
+            "year": year,
+            "category": category,
+            "file": str(path.relative_to(out)),
+        }
+
+    for n in range(1, articles + 1):
+        article_id = f"a{n:02d}"
+        topic = gen.topic()
+        title = f"{gen.title(topic)} {n}"
+        date = f"20{gen.rng.randint(20, 25)}-{gen.rng.randint(1, 12):02d}-{gen.rng.randint(1, 28):02d}"
+        path = articles_dir / f"{n:02d}_{slugify(title)}.md"
+        text = article_markdown(gen, title, date, topic, paragraphs)
+        path.write_text(text, encoding="utf-8")
+        total_bytes += len(text)
+        index["articles"][article_id] = {
+            "title": title,
+            "date": date,
+            "category": gen.rng.choice(CATEGORIES),
+            "file": str(path.relative_to(out)),
+        }
+
+    book_ids = list(index["books"])
+    article_ids = list(index["articles"])
+    routing: dict = {"version": 1, "updated": "2026-01-01", "tasks": {}}
+    for n in range(1, tasks + 1):
+        topic = gen.topic()
+        task = f"{slugify(gen.title(topic, 2))}_{n}"
+        description = f"Review {' and '.join(gen.rng.sample(topic, 3))} for {gen.rng.choice(topic)} risks"
+        sources = {
+            "description": description,
+            "primary_sources": sorted(gen.rng.sample(book_ids, min(6, len(book_ids)))),
+            "secondary_sources": sorted(gen.rng.sample(book_ids, min(6, len(book_ids)))),
+            "anthropic_articles": sorted(gen.rng.sample(article_ids, min(2, len(article_ids)))),
+        }
+        routing["tasks"][task] = sources
+        text = checklist_markdown(gen, task, description, sources, topic, phases, items)
+        (checklists_dir / f"{task}.md").write_text(text, encoding="utf-8")
+        total_bytes += len(text)
+
+    knowledge_dir = out / "knowledge"
+    (knowledge_dir / "book_index.json").write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+    (knowledge_dir / "routing.json").write_text(json.dumps(routing, indent=2) + "\n", encoding="utf-8")
+
+    return {"books": books, "articles": articles, "tasks": tasks, "bytes": total_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic shudaizi knowledge base")
+    parser.add_argument("out", help="Output project root (created if missing)")
+    parser.add_argument("--books", type=int, default=100, help="Number of books (default: 100)")
+    parser.add_argument("--articles", type=int, default=20, help="Number of articles (default: 20)")
+    parser.add_argument("--tasks", type=int, default=16, help="Number of task checklists (default: 16)")
+    parser.add_argument("--paragraphs", type=int, default=4, help="Paragraphs per book section (default: 4)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    if (out / "knowledge" / "book_index.json").exists():
+        sys.exit(f"{out} already contains a knowledge base; choose an empty directory.")
+
+    start = time.monotonic()
+    summary = generate_corpus(out, args.books, args.articles, args.tasks, args.paragraphs, seed=args.seed)
+    print(f"Wrote {summary['books']} books, {summary['articles']} articles, {summary['tasks']} checklists "
+          f"({summary['bytes'] / 1e6:.1f} MB) to {out} in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
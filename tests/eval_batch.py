@@ -0,0 +1,208 @@
+"""Message Batches mode for the eval runners.
+
+Batches cost half the interactive price and don't count against interactive
+rate limits. The trade-off is latency: a batch may take minutes to process.
+That is fine for nightly sweeps of fixtures × trials × models.
+
+`EvalBatcher.wrap()` returns a client whose `messages.create` does not send
+anything. It queues the request and returns once the request's batch has
+ended. A queue that stays quiet for `window` seconds is submitted as one batch,
+or several if it exceeds `max_batch_size`. So the runners' unchanged
+asyncio.gather fan-out turns into rounds:
+
+    round 1   every trial's first request
+    round 2   tool-result turns and/or judge calls that depended on round 1
+    ...
+
+Each batch is polled until it ends. Each result then resolves its caller:
+succeeded requests as `Message`s, and errored (overloaded / api_error) or
+expired requests are re-queued into the next round up to `max_retries`
+times. Anything else raises BatchRequestError for that trial alone.
+
+    batcher = EvalBatcher(poll_interval=30)
+    client = cache.wrap(batcher.wrap())
+    ...
+    await batcher.close()
+
+All wrapped clients share the batcher's one AsyncAnthropic, because a batch
+may carry requests from several runs (e.g. both conditions of a comparison).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+
+import anthropic
+
+RETRYABLE_ERRORS = {"overloaded_error", "api_error", "rate_limit_error"}
+
+
+class BatchRequestError(RuntimeError):
+    """A batched request ended errored, canceled or expired and was not retried."""
+
+    def __init__(self, custom_id: str, result):
+        self.custom_id = custom_id
+        self.result = result
+        error = getattr(getattr(result, "error", None), "error", None)
+        detail = f"{error.type}: {error.message}" if error is not None else result.type
+        super().__init__(f"batch request {custom_id} {result.type} ({detail})")
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    requests: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    resubmitted: int = 0
+    waited_s: float = 0.0
+
+
+@dataclass
+class _Pending:
+    params: dict
+    future: asyncio.Future
+    attempts: int = 0
+    custom_id: str = ""
+
+
+class EvalBatcher:
+    """Collects concurrent messages.create calls into Message Batches."""
+
+    def __init__(
+        self,
+        client=None,
+        window: float = 2.0,
+        poll_interval: float = 30.0,
+        max_batch_size: int = 10_000,
+        max_retries: int = 2,
+    ):
+        self.client = client
+        self.window = window
+        self.poll_interval = poll_interval
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.stats = BatchStats()
+        self._queue: list[_Pending] = []
+        self._collector: asyncio.Task | None = None
+        self._ids = itertools.count(1)
+
+    def wrap(self) -> "BatchedClient":
+        if self.client is None:
+            # SDK retries stay on: batch create/poll calls are few and not scheduled
+            self.client = anthropic.AsyncAnthropic()
+        return BatchedClient(self)
+
+    async def create(self, params: dict):
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(_Pending(params, future))
+        return await future
+
+    def _enqueue(self, pending: _Pending) -> None:
+        pending.custom_id = f"eval-{next(self._ids)}"
+        self._queue.append(pending)
+        if self._collector is None:
+            self._collector = asyncio.create_task(self._collect())
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+
+    async def _collect(self) -> None:
+        """Wait until no request has arrived for `window` seconds, then submit the queue."""
+        while True:
+            seen = len(self._queue)
+            await asyncio.sleep(self.window)
+            if len(self._queue) == seen:
+                break
+        queue, self._queue, self._collector = self._queue, [], None
+        chunks = [queue[i:i + self.max_batch_size] for i in range(0, len(queue), self.max_batch_size)]
+        await asyncio.gather(*(self._run_batch(chunk) for chunk in chunks))
+
+    async def _run_batch(self, chunk: list[_Pending]) -> None:
+        client = self.client
+        by_id = {p.custom_id: p for p in chunk}
+        try:
+            batch = await client.messages.batches.create(
+                requests=[{"custom_id": p.custom_id, "params": p.params} for p in chunk]
+            )
+            self.stats.batches += 1
+            self.stats.requests += len(chunk)
+            started = time.monotonic()
+            while batch.processing_status != "ended":
+                await asyncio.sleep(self.poll_interval)
+                batch = await client.messages.batches.retrieve(batch.id)
+            self.stats.waited_s += time.monotonic() - started
+
+            async for entry in await client.messages.batches.results(batch.id):
+                pending = by_id.pop(entry.custom_id, None)
+                if pending is not None:
+                    self._settle(pending, entry.result)
+        except Exception as exc:
+            for pending in by_id.values():
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+        for pending in by_id.values():  # missing from the results file
+            pending.future.set_exception(RuntimeError(f"batch {batch.id} returned no result for {pending.custom_id}"))
+
+    def _settle(self, pending: _Pending, result) -> None:
+        if result.type == "succeeded":
+            self.stats.succeeded += 1
+            pending.future.set_result(result.message)
+            return
+        error = getattr(getattr(result, "error", None), "error", None)
+        retryable = result.type == "expired" or (error is not None and error.type in RETRYABLE_ERRORS)
+        if retryable and pending.attempts < self.max_retries:
+            self.stats.resubmitted += 1
+            pending.attempts += 1
+            self._enqueue(pending)
+            return
+        self.stats.failed += 1
+        pending.future.set_exception(BatchRequestError(pending.custom_id, result))
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"Batch: {s.requests} requests in {s.batches} batches, {s.succeeded} succeeded, "
+            f"{s.resubmitted} resubmitted, {s.failed} failed; {s.waited_s:.0f}s waiting for batches"
+        )
+
+
+class _BatchedMessages:
+    def __init__(self, batcher: EvalBatcher):
+        self._batcher = batcher
+
+    async def create(self, **kwargs):
+        return await self._batcher.create(kwargs)
+
+
+class BatchedClient:
+    """Drop-in for AsyncAnthropic in the runners: messages.create is answered from a batch."""
+
+    def __init__(self, batcher: EvalBatcher):
+        self.batcher = batcher
+        self.messages = _BatchedMessages(batcher)
+
+    async def close(self) -> None:
+        pass  # the shared client may still carry other runs' requests; see EvalBatcher.close
+
+
+# ── CLI wiring shared by the runners ─────────────────────────────
+
+
+def add_batch_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("batch mode")
+    group.add_argument("--batch", action="store_true",
+                       help="Submit requests as Message Batches (half price, no interactive rate limits, "
+                            "minutes to hours of latency)")
+    group.add_argument("--batch-poll", type=float, default=30.0,
+                       help="Seconds between batch status polls (default: 30)")
+
+
+def batch_from_args(args: argparse.Namespace) -> EvalBatcher | None:
+    return EvalBatcher(poll_interval=args.batch_poll) if args.batch else None
@@ -0,0 +1,161 @@
+"""Content-addressed on-disk cache for eval model calls.
+
+Each `messages.create` request is keyed by model, a SHA-256 of the rest of
+the request (system, messages, tools, stop sequences…), max_tokens,
+temperature and the trial index, so trial 3 of an unchanged fixture always
+maps to the same entry while a changed checklist or prompt misses. Entries
+are `<dir>/<key[:2]>/<key>.json` holding the request fields and the full
+response, which replays as a real `anthropic.types.Message`.
+
+Modes:
+    auto     serve hits from the cache; call the API on a miss and store it
+    record   always call the API and overwrite the entry
+    replay   serve only from the cache; a miss raises CacheMiss (offline runs)
+    off      bypass the cache entirely
+
+The runners default to `off`: a replayed response is not a new sample, and
+its latency is the cache's, not the model's. Caching is opt-in per run.
+
+Runners wrap their (scheduled) client and pass the trial index through:
+
+    cache = EvalCache(Path("tests/.eval_cache"), mode="auto")
+    client = cache.wrap(make_client(scheduler))
+    await client.messages.create(model=..., messages=..., trial=3)
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from anthropic.types import Message
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".eval_cache"
+MODES = ("auto", "record", "replay", "off")
+
+
+class CacheMiss(LookupError):
+    """Replay mode found no recorded response for a request."""
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stored: int = 0
+
+
+def _canonical(value) -> str:
+    def default(obj):
+        if hasattr(obj, "model_dump"):  # SDK content blocks replayed into a later turn
+            return obj.model_dump(exclude_none=True)
+        raise TypeError(f"not JSON serializable: {type(obj).__name__}")
+
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=default)
+
+
+def request_key(kwargs: dict, trial: int | None = None) -> tuple[str, dict]:
+    """(cache key, key fields) for one Messages request."""
+    prompt = {k: v for k, v in kwargs.items() if k not in ("model", "max_tokens", "temperature")}
+    fields = {
+        "model": kwargs.get("model"),
+        "prompt_sha256": hashlib.sha256(_canonical(prompt).encode("utf-8")).hexdigest(),
+        "max_tokens": kwargs.get("max_tokens"),
+        "temperature": kwargs.get("temperature"),
+        "trial": trial,
+    }
+    return hashlib.sha256(_canonical(fields).encode("utf-8")).hexdigest(), fields
+
+
+class EvalCache:
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, mode: str = "auto"):
+        if mode not in MODES:
+            raise ValueError(f"cache mode must be one of {MODES}, not {mode!r}")
+        self.directory = directory
+        self.mode = mode
+        self.stats = CacheStats()
+
+    def wrap(self, client) -> "CachedClient":
+        return CachedClient(client, self)
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Message | None:
+        try:
+            entry = json.loads(self.path_for(key).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return Message.model_validate(entry["response"])
+
+    def put(self, key: str, fields: dict, response) -> None:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = response.model_dump(mode="json") if hasattr(response, "model_dump") else response
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"request": fields, "response": data}, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+        self.stats.stored += 1
+
+    async def create(self, create, kwargs: dict, trial: int | None):
+        """Serve or record one request according to the mode; `create` is the real call."""
+        if self.mode == "off":
+            return await create(**kwargs)
+        key, fields = request_key(kwargs, trial)
+        if self.mode in ("auto", "replay"):
+            cached = self.get(key)
+            if cached is not None:
+                self.stats.hits += 1
+                return cached
+            self.stats.misses += 1
+            if self.mode == "replay":
+                raise CacheMiss(f"no recorded response for {fields['model']} trial {trial} "
+                                f"(prompt {fields['prompt_sha256'][:12]}) in {self.directory}")
+        response = await create(**kwargs)
+        self.put(key, fields, response)
+        return response
+
+    def summary(self) -> str:
+        s = self.stats
+        return f"Cache ({self.mode}, {self.directory}): {s.hits} hits, {s.misses} misses, {s.stored} stored"
+
+
+class _CachedMessages:
+    def __init__(self, client, cache: EvalCache):
+        self._client = client
+        self._cache = cache
+
+    async def create(self, trial: int | None = None, **kwargs):
+        return await self._cache.create(self._client.messages.create, kwargs, trial)
+
+
+class CachedClient:
+    """Client wrapper whose messages.create accepts `trial=` and goes through the cache."""
+
+    def __init__(self, client, cache: EvalCache):
+        self.client = client
+        self.cache = cache
+        self.messages = _CachedMessages(client, cache)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+# ── CLI wiring shared by the runners ─────────────────────────────
+
+
+def add_cache_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("response cache")
+    group.add_argument("--cache", choices=MODES, default="off",
+                       help="off: no cache, every trial is a new sample (default); auto: reuse recorded responses, "
+                            "record misses; record: always call and overwrite; replay: recorded responses only (offline)")
+    group.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                       help=f"Cache directory (default: {DEFAULT_CACHE_DIR.relative_to(Path(__file__).parent.parent)})")
+
+
+def cache_from_args(args: argparse.Namespace) -> EvalCache:
+    return EvalCache(args.cache_dir, args.cache)
@@ -0,0 +1,145 @@
+"""Compiled keyword grading for eval fixtures.
+
+A fixture's ground truth lists expected findings, each with keywords, plus
+optional `false_positive_keywords` that must NOT appear. A finding passes
+when any of its keywords occurs in the response (case-insensitive), and a
+response passes when every finding passes and no false-positive keyword
+occurs.
+
+KeywordGrader compiles a fixture's keywords once. Keywords are lowercased
+and deduplicated across findings and false positives, so a keyword shared by
+two findings is searched once. Regex keywords are compiled once. Grading a
+response then lowercases it once and makes one C-level pass per distinct
+keyword:
+
+  - Literal keywords use `str.find`, which gives exactly the old
+    `kw in text` answer, overlaps and all, plus every position.
+  - With regex=True (activation fixtures: "mock.*stripe"), keywords are
+    regular expressions searched with their precompiled pattern. Keywords
+    that are not valid regexes are treated as literals, as before.
+
+A single combined automaton (one alternation, or a trie-shaped regex in a
+lookahead to keep overlapping matches) was measured and rejected. Over all
+182 fixture keywords and an 8 KB response it took 0.7–5 ms per grade, against
+about 1 ms for per-keyword substring search. CPython's `re` steps through every
+position in Python-level opcodes, while `str.find` runs a vectorised search,
+and per-fixture keyword sets are small.
+
+Every occurrence is reported as a Hit with start/end offsets into
+`text.lower()`. Graders are cached per ground truth (`grader_for`), so
+regrading thousands of stored responses costs one scan each.
+
+    grade = grader_for(ground_truth).grade(response_text)
+    grade.passed, grade.findings[0].matched, grade.false_positives
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Hit:
+    keyword: str
+    start: int
+    end: int
+
+
+@dataclass
+class FindingGrade:
+    finding_id: str
+    matched: list[str]  # keywords found, in ground-truth order
+    hits: list[Hit] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return bool(self.matched)
+
+
+@dataclass
+class Grade:
+    findings: list[FindingGrade]
+    false_positives: list[str]  # false-positive keywords found
+    hits: list[Hit] = field(default_factory=list)  # false-positive hits
+
+    @property
+    def findings_passed(self) -> bool:
+        return all(f.passed for f in self.findings)
+
+    @property
+    def passed(self) -> bool:
+        return self.findings_passed and not self.false_positives
+
+    @property
+    def matched_keywords(self) -> list[str]:
+        return [kw for f in self.findings for kw in f.matched]
+
+
+class KeywordGrader:
+    def __init__(self, findings: list[dict], false_positive_keywords: list[str] = (), regex: bool = False):
+        self.findings = [(f["id"], list(f["keywords"])) for f in findings]
+        self.false_positive_keywords = list(false_positive_keywords)
+        keywords = {kw.lower() for _, kws in self.findings for kw in kws}
+        keywords |= {kw.lower() for kw in self.false_positive_keywords}
+        keywords.discard("")
+
+        self._literals: list[str] = []
+        self._patterns: list[tuple[str, re.Pattern]] = []
+        for kw in sorted(keywords):
+            if regex:
+                try:
+                    self._patterns.append((kw, re.compile(kw)))
+                    continue
+                except re.error:
+                    pass
+            self._literals.append(kw)
+
+    @classmethod
+    def from_ground_truth(cls, ground_truth: dict, regex: bool = False) -> "KeywordGrader":
+        return cls(ground_truth["expected_findings"], ground_truth.get("false_positive_keywords", []), regex)
+
+    def scan(self, text: str) -> dict[str, list[Hit]]:
+        """Every occurrence of every keyword in text (lowercased), by lowercased keyword."""
+        lowered = text.lower()
+        found: dict[str, list[Hit]] = {}
+        for kw in self._literals:
+            start = lowered.find(kw)
+            if start < 0:
+                continue
+            hits = found[kw] = []
+            while start >= 0:
+                hits.append(Hit(kw, start, start + len(kw)))
+                start = lowered.find(kw, start + 1)
+        for kw, pattern in self._patterns:
+            hits = [Hit(kw, m.start(), m.end()) for m in pattern.finditer(lowered)]
+            if hits:
+                found[kw] = hits
+        return found
+
+    def grade(self, text: str) -> Grade:
+        found = self.scan(text)
+        findings = []
+        for finding_id, keywords in self.findings:
+            matched = [kw for kw in keywords if kw.lower() in found]
+            hits = [hit for kw in matched for hit in found[kw.lower()]]
+            findings.append(FindingGrade(finding_id, matched, sorted(hits, key=lambda h: h.start)))
+        false_positives = [kw for kw in self.false_positive_keywords if kw.lower() in found]
+        fp_hits = sorted((hit for kw in false_positives for hit in found[kw.lower()]), key=lambda h: h.start)
+        return Grade(findings, false_positives, fp_hits)
+
+
+@lru_cache(maxsize=256)
+def _compiled(spec: str, regex: bool) -> KeywordGrader:
+    findings, false_positives = json.loads(spec)
+    return KeywordGrader(findings, false_positives, regex)
+
+
+def grader_for(ground_truth: dict, regex: bool = False) -> KeywordGrader:
+    """The compiled grader for a fixture's ground truth, built once per distinct keyword set."""
+    spec = json.dumps(
+        [ground_truth["expected_findings"], ground_truth.get("false_positive_keywords", [])], sort_keys=True
+    )
+    return _compiled(spec, regex)
@@ -0,0 +1,270 @@
+"""Shared request scheduler for the LLM eval runners.
+
+Every runner fans out fixtures × trials with asyncio.gather. Routing each
+`client.messages.create` call through one EvalScheduler bounds that fan-out:
+
+  - Max in-flight: at most `limit` requests are outstanding at once.
+  - AIMD concurrency: `limit` grows by ~1 per round of successful requests
+    (additive increase) and halves on a 429 / 529 overloaded response
+    (multiplicative decrease, at most once per cooldown so one burst of
+    rejections counts once). It settles just under the account's limit.
+  - Token budget: with `tokens_per_minute`, a token bucket is debited by each
+    request's estimate (prompt chars / 4 + max_tokens) before it is sent and
+    reconciled with the actual usage afterwards.
+  - Retries: rate limits, overloads, 5xx and connection errors are retried
+    with full-jitter exponential backoff, honouring retry-after. Trials are
+    only lost if a request fails `max_retries` times in a row.
+
+Runners wrap their client once and keep calling `client.messages.create`:
+
+    scheduler = EvalScheduler(max_in_flight=8, tokens_per_minute=400_000)
+    client = scheduler.wrap(anthropic.AsyncAnthropic(max_retries=0))
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+import anthropic
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+BACKOFF_STATUS = {429, 529}  # the server is telling us to slow down
+
+
+@dataclass
+class SchedulerStats:
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0  # 429 / 529 responses
+    failed: int = 0
+    peak_in_flight: int = 0
+    tokens: int = 0
+    budget_wait_s: float = 0.0
+
+
+def estimate_request_tokens(kwargs: dict) -> int:
+    """Rough token cost of a Messages request: prompt characters / 4 plus max_tokens."""
+    prompt_chars = len(json.dumps(kwargs.get("messages", []), default=str))
+    prompt_chars += len(json.dumps(kwargs.get("system", ""), default=str))
+    prompt_chars += len(json.dumps(kwargs.get("tools", []), default=str))
+    return prompt_chars // 4 + int(kwargs.get("max_tokens", 0))
+
+
+def usage_tokens(response) -> int | None:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return sum(
+        getattr(usage, field, 0) or 0
+        for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+    )
+
+
+def _status(exc: BaseException) -> int | None:
+    if isinstance(exc, anthropic.APIStatusError):
+        return exc.status_code
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (anthropic.APIConnectionError, anthropic.APITimeoutError)):
+        return True
+    return _status(exc) in RETRYABLE_STATUS
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds the server asked us to wait, if it said."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EvalScheduler:
+    """Bounded, adaptive, retrying executor for model calls."""
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        min_in_flight: int = 1,
+        tokens_per_minute: int | None = None,
+        max_retries: int = 8,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        cooldown: float = 2.0,
+        seed: int | None = None,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_in_flight = max(1, min(min_in_flight, self.max_in_flight))
+        self.limit = float(self.max_in_flight)
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cooldown = cooldown
+        self.stats = SchedulerStats()
+        self._rng = random.Random(seed)
+        self._in_flight = 0
+        self._slots: asyncio.Condition | None = None
+        self._last_decrease = float("-inf")
+        self._tokens = float(tokens_per_minute or 0)
+        self._refilled_at = time.monotonic()
+        self._bucket_lock: asyncio.Lock | None = None
+
+    def wrap(self, client) -> "ScheduledClient":
+        return ScheduledClient(client, self)
+
+    # ── Concurrency ─────────────────────────────────────────────
+
+    async def _acquire(self) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+        async with self._slots:
+            await self._slots.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+            self.stats.peak_in_flight = max(self.stats.peak_in_flight, self._in_flight)
+
+    async def _release(self) -> None:
+        async with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def _on_success(self) -> None:
+        # +1 per `limit` successes ≈ +1 per round trip of the whole window
+        self.limit = min(float(self.max_in_flight), self.limit + 1.0 / self.limit)
+
+    def _on_throttled(self) -> None:
+        self.stats.throttled += 1
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(float(self.min_in_flight), self.limit / 2)
+            self._last_decrease = now
+
+    # ── Token budget ────────────────────────────────────────────
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.tokens_per_minute / 60.0
+        self._tokens = min(float(self.tokens_per_minute), self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+    async def _reserve(self, tokens: int) -> None:
+        if not self.tokens_per_minute:
+            return
+        if self._bucket_lock is None:
+            self._bucket_lock = asyncio.Lock()
+        tokens = min(tokens, self.tokens_per_minute)  # a single oversized request must still go out
+        async with self._bucket_lock:  # FIFO: big requests are not starved by small ones
+            self._refill()
+            while self._tokens < tokens:
+                wait = (tokens - self._tokens) / (self.tokens_per_minute / 60.0)
+                self.stats.budget_wait_s += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= tokens
+
+    def _reconcile(self, estimated: int, actual: int | None) -> None:
+        if self.tokens_per_minute and actual is not None:
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + estimated - actual)
+
+    # ── Execution ───────────────────────────────────────────────
+
+    def backoff(self, attempt: int, exc: BaseException | None = None) -> float:
+        """Full-jitter exponential delay for retry `attempt` (0-based), at least any retry-after."""
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hinted = retry_after(exc) if exc is not None else None
+        return max(delay, hinted) if hinted is not None else delay
+
+    async def call(self, fn: Callable[[], Awaitable[T]], estimated_tokens: int = 0) -> T:
+        """Run fn() under the concurrency limit and token budget, retrying transient failures."""
+        attempt = 0
+        while True:
+            await self._reserve(estimated_tokens)
+            await self._acquire()
+            try:
+                self.stats.requests += 1
+                result = await fn()
+            except Exception as exc:
+                if _status(exc) in BACKOFF_STATUS:
+                    self._on_throttled()
+                self._reconcile(estimated_tokens, 0)
+                if not is_retryable(exc) or attempt >= self.max_retries:
+                    self.stats.failed += 1
+                    raise
+                delay = self.backoff(attempt, exc)
+            else:
+                self._on_success()
+                actual = usage_tokens(result)
+                self._reconcile(estimated_tokens, actual)
+                self.stats.tokens += actual or 0
+                return result
+            finally:
+                await self._release()
+            attempt += 1
+            self.stats.retries += 1
+            await asyncio.sleep(delay)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"Scheduler: {s.requests} requests, {s.retries} retries, {s.throttled} throttled, "
+            f"{s.failed} failed; peak in-flight {s.peak_in_flight}, final limit {self.limit:.1f}"
+            + (f"; waited {s.budget_wait_s:.1f}s for token budget" if s.budget_wait_s else "")
+        )
+
+
+class _ScheduledMessages:
+    def __init__(self, client, scheduler: EvalScheduler):
+        self._client = client
+        self._scheduler = scheduler
+
+    async def create(self, **kwargs):
+        return await self._scheduler.call(
+            lambda: self._client.messages.create(**kwargs),
+            estimate_request_tokens(kwargs),
+        )
+
+
+class ScheduledClient:
+    """Drop-in for AsyncAnthropic in the runners: messages.create goes through the scheduler."""
+
+    def __init__(self, client, scheduler: EvalScheduler):
+        self.client = client
+        self.scheduler = scheduler
+        self.messages = _ScheduledMessages(client, scheduler)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+# ── CLI wiring shared by the runners ─────────────────────────────
+
+
+def add_scheduler_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("rate limiting")
+    group.add_argument("--max-in-flight", type=int, default=8,
+                       help="Upper bound on concurrent API requests (default: 8)")
+    group.add_argument("--tpm", type=int, default=None,
+                       help="Token-per-minute budget (input + max output), e.g. 400000 (default: unlimited)")
+    group.add_argument("--max-retries", type=int, default=8,
+                       help="Retries per request on 429/529/5xx/connection errors (default: 8)")
+
+
+def scheduler_from_args(args: argparse.Namespace) -> EvalScheduler:
+    return EvalScheduler(max_in_flight=args.max_in_flight, tokens_per_minute=args.tpm, max_retries=args.max_retries)
+
+
+def make_client(scheduler: EvalScheduler) -> ScheduledClient:
+    """AsyncAnthropic with SDK retries off (the scheduler retries, and must see every 429)."""
+    return scheduler.wrap(anthropic.AsyncAnthropic(max_retries=0))
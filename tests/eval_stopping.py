@@ -0,0 +1,132 @@
+"""Sequential stopping for eval trials: run only as many trials as the answer needs.
+
+A fixture's trials are Bernoulli draws with an unknown pass rate p, and
+pass@k = 1 - (1 - p)^k and pass^k = p^k are monotone in p. So a confidence
+interval for p gives intervals for both metrics. The interval is the Wilson
+score interval, which stays sensible at 0/n and n/n, where most fixtures live.
+
+With a StoppingRule, a fixture first runs `min_trials` trials, then one more
+at a time, and stops at the first of:
+
+    precise   the interval for p is no wider than `ci_width`
+    decided   the interval lies entirely above or below `decide_at`, i.e.
+              more trials cannot change whether the fixture usually passes
+    max       `max_trials` reached (the runner's --trials)
+
+"decided" is a test repeated after every trial, and each look is another
+chance to be wrong. Unadjusted 95% intervals decide the wrong side of
+`decide_at` for about 22% of fixtures that sit right on it at 20 trials. So
+the decision interval splits 1 - confidence evenly across the possible
+looks (Bonferroni), which keeps the chance of a wrong decision under
+1 - confidence over the whole sequence. The "precise" check and the
+reported interval use the plain confidence.
+
+At 95% confidence and --trials 20, a fixture that passes (or fails) every
+trial is decided after 9 trials. Mixed fixtures keep sampling until they
+are precise or reach the cap. Fixtures are stopped independently, and trial
+numbers stay 1..n, so recorded responses in the eval cache are reused
+across adaptive and fixed runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Awaitable, Callable, TypeVar
+
+from eval_usage import gather_after_first
+
+T = TypeVar("T")
+
+
+def wilson_interval(successes: int, n: int, confidence: float = 0.95) -> tuple[float, float]:
+    """Wilson score interval for a binomial proportion; (0, 1) with no trials."""
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def pass_at_k(p: float, k: int) -> float:
+    return 1.0 - (1.0 - p) ** k
+
+
+def pass_pow_k(p: float, k: int) -> float:
+    return p ** k
+
+
+@dataclass
+class StoppingRule:
+    max_trials: int
+    min_trials: int = 3
+    ci_width: float = 0.3
+    decide_at: float = 0.5
+    confidence: float = 0.95
+
+    @property
+    def decision_confidence(self) -> float:
+        """Per-look confidence for "decided": 1 - confidence split across every look."""
+        looks = max(1, self.max_trials - self.min_trials)
+        return 1 - (1 - self.confidence) / looks
+
+    def decision(self, successes: int, n: int) -> str | None:
+        """Why to stop after `successes` of `n` trials, or None to keep going."""
+        if n >= self.max_trials:
+            return "max"
+        if n < self.min_trials:
+            return None
+        low, high = wilson_interval(successes, n, self.confidence)
+        if high - low <= self.ci_width:
+            return "precise"
+        low, high = wilson_interval(successes, n, self.decision_confidence)
+        if low > self.decide_at or high < self.decide_at:
+            return "decided"
+        return None
+
+
+async def run_sequential(
+    trial: Callable[[int], Awaitable[T]],
+    passed: Callable[[T], bool],
+    rule: StoppingRule,
+    warm_first: bool = True,
+) -> tuple[list[T], str]:
+    """Run trial(1), trial(2), ... until the rule stops; returns (results, reason).
+
+    The first `min_trials` run as one wave (trial 1 alone first when
+    warm_first, so it writes the prompt cache), the rest one at a time.
+    """
+    first_wave = [trial(n) for n in range(1, min(rule.min_trials, rule.max_trials) + 1)]
+    results = await (gather_after_first(first_wave) if warm_first else asyncio.gather(*first_wave))
+    results = list(results)
+    while (reason := rule.decision(sum(map(passed, results)), len(results))) is None:
+        results.append(await trial(len(results) + 1))
+    return results, reason
+
+
+# ── CLI wiring shared by the runners ─────────────────────────────
+
+
+def add_stopping_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("adaptive trials")
+    group.add_argument("--adaptive", action="store_true",
+                       help="Stop each fixture's trials early once its pass rate is known well enough; "
+                            "--trials becomes the maximum")
+    group.add_argument("--min-trials", type=int, default=3, help="Trials before stopping is considered (default: 3)")
+    group.add_argument("--ci-width", type=float, default=0.3,
+                       help="Stop when the pass-rate interval is at most this wide (default: 0.3)")
+    group.add_argument("--decide-at", type=float, default=0.5,
+                       help="Stop when the interval lies entirely above or below this pass rate (default: 0.5)")
+    group.add_argument("--confidence", type=float, default=0.95, help="Interval confidence level (default: 0.95)")
+
+
+def stopping_from_args(args: argparse.Namespace) -> StoppingRule | None:
+    if not args.adaptive:
+        return None
+    return StoppingRule(args.trials, args.min_trials, args.ci_width, args.decide_at, args.confidence)
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""Persistent SQLite store of eval results, with trend and regression queries.
+
+run_llm_eval.py appends every run here (unless --no-store). Questions like
+"did v3 of the code_review checklist help?" can then be answered from past
+runs without spending tokens again.
+
+Tables:
+    runs       one row per run_eval call: runner, model, condition
+               (checklist / baseline), trials requested, timestamp
+    fixtures   one row per fixture per run: task type, detail level, focus,
+               checklist version (from the checklist's frontmatter),
+               pass@k, pass^k, trials run and passed, and the fixture's
+               input fingerprint (checklist, code, prompt, ground truth, grader)
+    trials     one row per trial: pass/fail, latency, token usage
+               (input, output, cache write, cache read), false positives
+    findings   one row per expected finding per trial: pass/fail and the
+               matched keywords
+
+`fixtures` repeats model, condition and created_at from its run. That way the
+common queries (one fixture over time, one model's latest results) are served
+by its indexes without a join.
+
+`find_fixture` looks a result up by fingerprint and model. That is how
+`run_llm_eval.py --incremental` skips fixtures whose inputs have not changed
+since they were last run.
+
+Query CLI:
+    python tests/eval_store.py runs
+    python tests/eval_store.py trend --fixture security_sql_injection
+    python tests/eval_store.py versions --task-type code_review
+    python tests/eval_store.py regressions --threshold 0.2
+    python tests/eval_store.py findings --fixture arch_entity_trap
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+DEFAULT_STORE = Path(__file__).parent / ".eval_results.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    runner TEXT NOT NULL,
+    model TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    trials INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fixtures (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    fixture TEXT NOT NULL,
+    task_type TEXT NOT NULL,
+    detail_level TEXT NOT NULL DEFAULT '',
+    focus TEXT NOT NULL DEFAULT '',
+    checklist_version TEXT,
+    model TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    trials INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    pass_at_k REAL NOT NULL,
+    pass_pow_k REAL NOT NULL,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY,
+    fixture_id INTEGER NOT NULL REFERENCES fixtures(id) ON DELETE CASCADE,
+    trial_num INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    latency_ms INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_creation_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+    false_positives TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS findings (
+    trial_id INTEGER NOT NULL REFERENCES trials(id) ON DELETE CASCADE,
+    finding_id TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    matched_keywords TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_fixtures_fixture ON fixtures(fixture, model, created_at);
+CREATE INDEX IF NOT EXISTS idx_fixtures_model ON fixtures(model, created_at);
+CREATE INDEX IF NOT EXISTS idx_fixtures_task_type ON fixtures(task_type, checklist_version);
+CREATE INDEX IF NOT EXISTS idx_fixtures_run ON fixtures(run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_trials_fixture ON trials(fixture_id);
+CREATE INDEX IF NOT EXISTS idx_findings_trial ON findings(trial_id);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class EvalStore:
+    def __init__(self, path: Path = DEFAULT_STORE):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Bring stores created by earlier versions up to the current schema."""
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(fixtures)")}
+        with self.db:
+            if "fingerprint" not in columns:
+                self.db.execute("ALTER TABLE fixtures ADD COLUMN fingerprint TEXT")
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_fixtures_fingerprint ON fixtures(fingerprint, model, created_at)"
+            )
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "EvalStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record_run(
+        self,
+        runner: str,
+        model: str,
+        use_checklist: bool,
+        trials: int,
+        results: list,
+        created_at: str | None = None,
+    ) -> int:
+        """Append one run's FixtureResults (run_llm_eval's shape) in a single transaction; returns the run id.
+
+        Results reused from an earlier run (`reused_run` set) are already stored and are skipped.
+        """
+        created_at = created_at or _now()
+        condition = "checklist" if use_checklist else "baseline"
+        with self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (runner, model, condition, trials, created_at) VALUES (?, ?, ?, ?, ?)",
+                (runner, model, condition, trials, created_at),
+            ).lastrowid
+            for r in results:
+                if r.reused_run is not None:
+                    continue
+                fixture_id = self.db.execute(
+                    "INSERT INTO fixtures (run_id, fixture, task_type, detail_level, focus, checklist_version, "
+                    "model, condition, created_at, trials, passed, pass_at_k, pass_pow_k, fingerprint) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id, r.fixture_name, r.task_type, r.detail_level, r.focus, r.checklist_version,
+                        model, condition, created_at, len(r.trials), sum(t.all_passed for t in r.trials),
+                        r.pass_at_k, r.pass_pow_k, r.fingerprint or None,
+                    ),
+                ).lastrowid
+                for t in r.trials:
+                    trial_id = self.db.execute(
+                        "INSERT INTO trials (fixture_id, trial_num, passed, latency_ms, input_tokens, output_tokens, "
+                        "cache_creation_tokens, cache_read_tokens, false_positives) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            fixture_id, t.trial_num, t.all_passed, t.latency_ms,
+                            t.usage.input_tokens, t.usage.output_tokens,
+                            t.usage.cache_creation_tokens, t.usage.cache_read_tokens,
+                            json.dumps(t.false_positives),
+                        ),
+                    ).lastrowid
+                    self.db.executemany(
+                        "INSERT INTO findings (trial_id, finding_id, passed, matched_keywords) VALUES (?, ?, ?, ?)",
+                        [(trial_id, f.finding_id, f.passed, json.dumps(f.matched_keywords)) for f in t.findings],
+                    )
+        return run_id
+
+    # ── Queries ──────────────────────────────────────────────────
+
+    def find_fixture(self, fingerprint: str, model: str, min_trials: int) -> dict | None:
+        """The latest stored result with this fingerprint and model that ran at least `min_trials` trials.
+
+        The count is the fixture's own trials, not the run's: an adaptive run records --trials as its
+        maximum, but a fixture that stopped early has fewer samples than that.
+
+        Returns {"fixture": row, "trials": [(trial row, [finding rows])]}, or None.
+        """
+        fixture = self.db.execute(
+            "SELECT * FROM fixtures "
+            "WHERE fingerprint = ? AND model = ? AND trials >= ? "
+            "ORDER BY created_at DESC, id DESC LIMIT 1",
+            (fingerprint, model, max(min_trials, 1)),
+        ).fetchone()
+        if fixture is None:
+            return None
+        trials = self.db.execute(
+            "SELECT * FROM trials WHERE fixture_id = ? ORDER BY trial_num", (fixture["id"],)
+        ).fetchall()
+        findings: dict[int, list[sqlite3.Row]] = {t["id"]: [] for t in trials}
+        placeholders = ", ".join("?" * len(trials))
+        for row in self.db.execute(
+            f"SELECT * FROM findings WHERE trial_id IN ({placeholders}) ORDER BY rowid", [t["id"] for t in trials]
+        ):
+            findings[row["trial_id"]].append(row)
+        return {"fixture": fixture, "trials": [(t, findings[t["id"]]) for t in trials]}
+
+    def runs(self, limit: int = 20) -> list[sqlite3.Row]:
+        return self.db.execute(
+            "SELECT runs.*, COUNT(fixtures.id) AS fixtures, SUM(fixtures.passed) AS passed, "
+            "SUM(fixtures.trials) AS trials_run "
+            "FROM runs LEFT JOIN fixtures ON fixtures.run_id = runs.id "
+            "GROUP BY runs.id ORDER BY runs.created_at DESC, runs.id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def trend(self, fixture: str | None = None, model: str | None = None,
+              condition: str | None = None, task_type: str | None = None) -> list[sqlite3.Row]:
+        """Per-fixture results in date order, with checklist version, latency and tokens."""
+        where, params = _filters(fixture=fixture, model=model, condition=condition, task_type=task_type)
+        return self.db.execute(
+            "SELECT f.fixture, f.model, f.condition, f.checklist_version, f.created_at, f.run_id, "
+            "f.trials, f.passed, f.pass_at_k, f.pass_pow_k, "
+            "AVG(t.latency_ms) AS mean_latency_ms, "
+            "SUM(t.input_tokens + t.cache_creation_tokens + t.cache_read_tokens) AS input_tokens, "
+            "SUM(t.output_tokens) AS output_tokens "
+            f"FROM fixtures f LEFT JOIN trials t ON t.fixture_id = f.id {where} "
+            "GROUP BY f.id ORDER BY f.fixture, f.model, f.condition, f.created_at, f.id",
+            params,
+        ).fetchall()
+
+    def versions(self, task_type: str | None = None, model: str | None = None,
+                 fixture: str | None = None) -> list[sqlite3.Row]:
+        """Pass rate per checklist version, pooled over every stored trial; baselines shown for reference."""
+        where, params = _filters(task_type=task_type, model=model, fixture=fixture)
+        return self.db.execute(
+            "SELECT f.task_type, f.model, f.condition, COALESCE(f.checklist_version, '') AS checklist_version, "
+            "COUNT(DISTINCT f.run_id) AS runs, COUNT(DISTINCT f.fixture) AS fixtures, "
+            "SUM(f.trials) AS trials, SUM(f.passed) AS passed, "
+            "1.0 * SUM(f.passed) / SUM(f.trials) AS pass_rate, AVG(f.pass_pow_k) AS mean_pass_pow_k, "
+            "MIN(f.created_at) AS first_seen, MAX(f.created_at) AS last_seen "
+            f"FROM fixtures f {where} "
+            "GROUP BY f.task_type, f.model, f.condition, f.checklist_version HAVING SUM(f.trials) > 0 "
+            "ORDER BY f.task_type, f.model, f.condition, first_seen",
+            params,
+        ).fetchall()
+
+    def regressions(self, threshold: float = 0.2, model: str | None = None,
+                    condition: str | None = None) -> list[dict]:
+        """Fixtures whose latest pass rate fell at least `threshold` below the run before it."""
+        where, params = _filters(model=model, condition=condition)
+        rows = self.db.execute(
+            "SELECT fixture, model, condition, checklist_version, created_at, run_id, trials, passed "
+            f"FROM fixtures f {where} AND trials > 0 "
+            "ORDER BY fixture, model, condition, created_at DESC, id DESC",
+            params,
+        ).fetchall()
+        latest: dict[tuple, list[sqlite3.Row]] = {}
+        for row in rows:
+            history = latest.setdefault((row["fixture"], row["model"], row["condition"]), [])
+            if len(history) < 2:
+                history.append(row)
+
+        found = []
+        for (fixture, model_id, cond), history in latest.items():
+            if len(history) < 2:
+                continue
+            current, previous = history
+            now, before = current["passed"] / current["trials"], previous["passed"] / previous["trials"]
+            if before - now >= threshold:
+                found.append({
+                    "fixture": fixture, "model": model_id, "condition": cond,
+                    "previous_rate": before, "current_rate": now,
+                    "previous_version": previous["checklist_version"], "current_version": current["checklist_version"],
+                    "previous_run": previous["run_id"], "current_run": current["run_id"],
+                })
+        return sorted(found, key=lambda r: r["current_rate"] - r["previous_rate"])
+
+    def finding_rates(self, fixture: str | None = None, model: str | None = None,
+                      condition: str | None = None, task_type: str | None = None) -> list[sqlite3.Row]:
+        """Hit rate of each expected finding per checklist version."""
+        where, params = _filters(fixture=fixture, model=model, condition=condition, task_type=task_type)
+        return self.db.execute(
+            "SELECT f.fixture, fd.finding_id, f.model, f.condition, "
+            "COALESCE(f.checklist_version, '') AS checklist_version, "
+            "COUNT(*) AS trials, SUM(fd.passed) AS passed, AVG(fd.passed) AS pass_rate "
+            "FROM findings fd JOIN trials t ON t.id = fd.trial_id JOIN fixtures f ON f.id = t.fixture_id "
+            f"{where} GROUP BY f.fixture, fd.finding_id, f.model, f.condition, f.checklist_version "
+            "ORDER BY f.fixture, fd.finding_id, f.model, f.condition, MIN(f.created_at)",
+            params,
+        ).fetchall()
+
+
+def _filters(**columns) -> tuple[str, list]:
+    """A WHERE clause over fixtures (aliased f) for the given non-empty column values."""
+    clauses, params = ["1 = 1"], []
+    for column, value in columns.items():
+        if value:
+            clauses.append(f"f.{column} = ?")
+            params.append(value)
+    return "WHERE " + " AND ".join(clauses), params
+
+
+# ── CLI wiring shared by the runners ─────────────────────────────
+
+
+def add_store_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("results store")
+    group.add_argument("--store", type=Path, default=DEFAULT_STORE,
+                       help=f"SQLite results store (default: {DEFAULT_STORE.relative_to(Path(__file__).parent.parent)})")
+    group.add_argument("--no-store", action="store_true", help="Don't record this run in the results store")
+    group.add_argument("--incremental", action="store_true",
+                       help="Skip fixtures whose fingerprint (rendered checklist, code, prompt, ground truth, grader) "
+                            "and model match a stored result; reuse that result")
+
+
+def store_from_args(args: argparse.Namespace) -> EvalStore | None:
+    return None if args.no_store else EvalStore(args.store)
+
+
+# ── Query CLI ─────────────────────────────────────────────────────
+
+
+def _rate(passed: int, trials: int) -> str:
+    return f"{passed / trials:.0%}" if trials else "-"
+
+
+def print_runs(store: EvalStore, args) -> None:
+    print(f"{'Run':>5} {'Date':<26} {'Runner':<10} {'Model':<28} {'Condition':<10} {'Fixtures':>8} {'Pass':>6}")
+    for r in store.runs(args.limit):
+        print(f"{r['id']:>5} {r['created_at']:<26} {r['runner']:<10} {r['model']:<28} {r['condition']:<10} "
+              f"{r['fixtures']:>8} {_rate(r['passed'] or 0, r['trials_run'] or 0):>6}")
+
+
+def print_trend(store: EvalStore, args) -> None:
+    rows = store.trend(args.fixture, args.model, args.condition, args.task_type)
+    key = None
+    for r in rows:
+        if (r["fixture"], r["model"], r["condition"]) != key:
+            key = (r["fixture"], r["model"], r["condition"])
+            print(f"\n{r['fixture']} — {r['model']} — {r['condition']}")
+            print(f"  {'Date':<26} {'Run':>5} {'Ver':>4} {'Pass':>6} {'Pass@k':>7} {'Pass^k':>7} "
+                  f"{'Latency':>8} {'Tokens in/out':>15}")
+        tokens = f"{r['input_tokens'] or 0:,}/{r['output_tokens'] or 0:,}"
+        print(f"  {r['created_at']:<26} {r['run_id']:>5} {r['checklist_version'] or '-':>4} "
+              f"{_rate(r['passed'], r['trials']):>6} {r['pass_at_k']:>6.0%} {r['pass_pow_k']:>6.0%} "
+              f"{r['mean_latency_ms'] or 0:>6.0f}ms {tokens:>15}")
+    if not rows:
+        print("No stored results match.")
+
+
+def print_versions(store: EvalStore, args) -> None:
+    rows = store.versions(args.task_type, args.model, args.fixture)
+    print(f"{'Task':<20} {'Model':<28} {'Condition':<10} {'Ver':>4} {'Runs':>5} {'Trials':>7} {'Pass':>6} "
+          f"{'Pass^k':>7}  Seen")
+    for r in rows:
+        print(f"{r['task_type']:<20} {r['model']:<28} {r['condition']:<10} {r['checklist_version'] or '-':>4} "
+              f"{r['runs']:>5} {r['trials']:>7} {r['pass_rate']:>6.0%} {r['mean_pass_pow_k']:>6.0%}  "
+              f"{r['first_seen'][:10]}..{r['last_seen'][:10]}")
+    if not rows:
+        print("No stored results match.")
+
+
+def print_regressions(store: EvalStore, args) -> None:
+    rows = store.regressions(args.threshold, args.model, args.condition)
+    for r in rows:
+        version = ""
+        if r["previous_version"] != r["current_version"]:
+            version = f", checklist v{r['previous_version'] or '-'} → v{r['current_version'] or '-'}"
+        print(f"{r['fixture']} — {r['model']} — {r['condition']}: {r['previous_rate']:.0%} → {r['current_rate']:.0%} "
+              f"(run {r['previous_run']} → {r['current_run']}{version})")
+    if not rows:
+        print(f"No fixture dropped by {args.threshold:.0%} or more since its previous run.")
+
+
+def print_findings(store: EvalStore, args) -> None:
+    rows = store.finding_rates(args.fixture, args.model, args.condition, args.task_type)
+    print(f"{'Fixture':<35} {'Finding':<30} {'Condition':<10} {'Ver':>4} {'Trials':>7} {'Hit':>6}")
+    for r in rows:
+        print(f"{r['fixture']:<35} {r['finding_id']:<30} {r['condition']:<10} {r['checklist_version'] or '-':>4} "
+              f"{r['trials']:>7} {r['pass_rate']:>6.0%}")
+    if not rows:
+        print("No stored results match.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query stored eval results")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE, help="SQLite results store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs = commands.add_parser("runs", help="Recent runs")
+    runs.add_argument("--limit", type=int, default=20)
+    runs.set_defaults(func=print_runs)
+
+    for name, func, help_text in (
+        ("trend", print_trend, "Pass rate, latency and tokens of each fixture over time"),
+        ("versions", print_versions, "Pass rate per checklist version"),
+        ("findings", print_findings, "Hit rate of each expected finding per checklist version"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--fixture")
+        command.add_argument("--model")
+        command.add_argument("--task-type")
+        if name != "versions":
+            command.add_argument("--condition", choices=("checklist", "baseline"))
+        command.set_defaults(func=func)
+
+    regressions = commands.add_parser("regressions", help="Fixtures whose latest pass rate dropped")
+    regressions.add_argument("--threshold", type=float, default=0.2,
+                             help="Minimum drop in pass rate to report (default: 0.2)")
+    regressions.add_argument("--model")
+    regressions.add_argument("--condition", choices=("checklist", "baseline"))
+    regressions.set_defaults(func=print_regressions)
+
+    args = parser.parse_args()
+    if not args.store.exists():
+        parser.error(f"no results store at {args.store}; run tests/run_llm_eval.py first")
+    with EvalStore(args.store) as store:
+        args.func(store, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Prompt caching and token/cost accounting for the eval runners.
+
+Every trial of a fixture repeats the same prefix: the checklist (run_llm_eval)
+or the tool definitions and task prompt (activation, qualitative). The runners
+mark that prefix cacheable (see docs/prompt_caching_research.md):
+
+  - Single-shot reviews put the checklist first, as a `system` block with an
+    explicit `cache_control` breakpoint; only the code varies after it.
+  - Tool-using conversations set top-level `cache_control`, so the breakpoint
+    follows the conversation and each turn re-reads the previous turns,
+    including the checklist returned as a tool result.
+
+The cache is only readable once the first response that wrote it has started,
+so runners send trial 1 of a fixture alone (`gather_after_first`) and the
+remaining trials concurrently after it.
+
+`TokenUsage.from_response` records input, output, cache-write and cache-read
+tokens per trial. `usage_summary` prices them against the uncached
+equivalent (cache writes 1.25×, reads 0.1× base input, 5-minute TTL; all
+halved for Message Batches) and compares the latency of trials that read the cache with those that did not.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+CACHE_CONTROL = {"type": "ephemeral"}
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+BATCH_MULTIPLIER = 0.5
+
+# $ per million tokens (input, output), matched by substring of the model ID, most specific first.
+PRICES = (
+    ("opus-4-6", 5.0, 25.0),
+    ("opus-4-5", 5.0, 25.0),
+    ("opus", 15.0, 75.0),
+    ("sonnet", 3.0, 15.0),
+    ("haiku-4-5", 1.0, 5.0),
+    ("3-5-haiku", 0.8, 4.0),
+    ("haiku", 0.25, 1.25),
+)
+
+
+def price_for(model: str) -> tuple[float, float] | None:
+    for fragment, input_price, output_price in PRICES:
+        if fragment in model:
+            return input_price, output_price
+    return None
+
+
+def cached_system(text: str) -> list[dict]:
+    """A system prompt as one text block ending in a cache breakpoint."""
+    return [{"type": "text", "text": text, "cache_control": dict(CACHE_CONTROL)}]
+
+
+async def gather_after_first(coros: list[Awaitable[T]]) -> list[T]:
+    """Await the first coroutine alone (it writes the prompt cache), then the rest concurrently."""
+    if not coros:
+        return []
+    first = await coros[0]
+    return [first, *await asyncio.gather(*coros[1:])]
+
+
+@dataclass
+class TokenUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_tokens: int = 0
+    cache_read_tokens: int = 0
+
+    @classmethod
+    def from_response(cls, response) -> "TokenUsage":
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return cls()
+        return cls(
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_creation_tokens=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0) or 0,
+        )
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(
+            self.input_tokens + other.input_tokens,
+            self.output_tokens + other.output_tokens,
+            self.cache_creation_tokens + other.cache_creation_tokens,
+            self.cache_read_tokens + other.cache_read_tokens,
+        )
+
+    @property
+    def prompt_tokens(self) -> int:
+        """All input tokens, however they were billed."""
+        return self.input_tokens + self.cache_creation_tokens + self.cache_read_tokens
+
+    def cost(self, model: str, batch: bool = False) -> float | None:
+        """Dollars actually billed, or None for an unknown model."""
+        prices = price_for(model)
+        if prices is None:
+            return None
+        input_price, output_price = prices
+        return (BATCH_MULTIPLIER if batch else 1.0) * (
+            self.input_tokens * input_price
+            + self.cache_creation_tokens * input_price * CACHE_WRITE_MULTIPLIER
+            + self.cache_read_tokens * input_price * CACHE_READ_MULTIPLIER
+            + self.output_tokens * output_price
+        ) / 1_000_000
+
+    def uncached_cost(self, model: str, batch: bool = False) -> float | None:
+        """Dollars the same tokens would cost without prompt caching."""
+        prices = price_for(model)
+        if prices is None:
+            return None
+        input_price, output_price = prices
+        scale = BATCH_MULTIPLIER if batch else 1.0
+        return scale * (self.prompt_tokens * input_price + self.output_tokens * output_price) / 1_000_000
+
+
+def _mean(values: list[int]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def usage_summary(trials: Iterable[tuple[TokenUsage, int]], model: str, batch: bool = False) -> str:
+    """Token, cost and latency report for (usage, latency_ms) pairs, one per trial."""
+    trials = list(trials)
+    if not trials:
+        return "Prompt cache: no trials"
+    total = sum((usage for usage, _ in trials), TokenUsage())
+    hit_ms = [ms for usage, ms in trials if usage.cache_read_tokens]
+    miss_ms = [ms for usage, ms in trials if not usage.cache_read_tokens]
+    read_share = total.cache_read_tokens / total.prompt_tokens if total.prompt_tokens else 0.0
+
+    lines = [
+        f"Prompt cache: {len(hit_ms)}/{len(trials)} trials read the cache; "
+        f"{total.cache_read_tokens:,} of {total.prompt_tokens:,} input tokens ({read_share:.0%}) read, "
+        f"{total.cache_creation_tokens:,} written; {total.output_tokens:,} output tokens"
+    ]
+    actual, uncached = total.cost(model, batch), total.uncached_cost(model, batch)
+    if actual is not None and uncached:
+        saved = uncached - actual
+        lines.append(f"  Cost{' (batch)' if batch else ''}: ${actual:.4f} vs ${uncached:.4f} uncached "
+                     f"({'saved' if saved >= 0 else 'lost'} ${abs(saved):.4f}, {abs(saved) / uncached:.0%})")
+    else:
+        lines.append(f"  Cost: no price for {model}")
+    hit, miss = _mean(hit_ms), _mean(miss_ms)
+    if hit_ms and miss:
+        lines.append(f"  Latency: {hit:.0f}ms mean with cache reads vs {miss:.0f}ms without "
+                     f"({(miss - hit) / miss:.0%} lower)")
+    return "\n".join(lines)
@@ -0,0 +1,512 @@
+"""Local stand-in for the Anthropic Messages API, for offline harness testing.
+
+Speaks the subset of `POST /v1/messages` the eval runners use: text replies,
+`tool_use` turns answered with `tool_result` blocks, stop reasons and usage.
+Message Batches (`/v1/messages/batches`: create, retrieve, results) are
+answered by the same reply sources, ending `batch_delay` seconds after
+creation. Injected errors become `errored` batch results.
+Point any runner at it through the SDK's environment variables:
+
+    python tests/fake_anthropic_server.py --port 8765 --latency 0.5 --error-rate 0.05
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=fake \\
+        python tests/run_llm_eval.py --cache off --trials 20
+
+Where replies come from, first match wins:
+    recordings  an eval cache directory (see eval_cache.py). Requests are
+                matched on model, prompt hash, max_tokens and temperature,
+                and repeated requests cycle through the recorded trials.
+    script      a list of replies consumed in order (each a Message dict or a
+                callable taking the request body).
+    responder   a callable taking the request body (default: `default_reply`).
+
+Prompt caching is simulated: a `cache_control` breakpoint (on a block, or
+top-level for the whole prompt) writes its prefix, and a later request whose
+blocks start with a written prefix reads it, reported in usage as
+`cache_creation_input_tokens` / `cache_read_input_tokens`. Prefixes shorter
+than `min_cacheable_tokens` are not cached, as with the real API.
+
+Fault injection, for exercising the scheduler's concurrency and retry logic:
+    latency, jitter   seconds slept per request (uniform extra jitter)
+    errors            statuses returned for the first requests, in order
+    error_rate        probability of a random 429 / 529 / 500 afterwards
+    retry_after       retry-after header sent with 429 / 529
+
+In-process (tests):
+
+    with FakeAnthropicServer(latency=0.01, errors=[429]) as server:
+        client = anthropic.AsyncAnthropic(base_url=server.base_url, api_key="fake")
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+
+from eval_cache import request_key
+
+ERROR_TYPES = {
+    400: "invalid_request_error",
+    401: "authentication_error",
+    404: "not_found_error",
+    429: "rate_limit_error",
+    500: "api_error",
+    529: "overloaded_error",
+}
+RANDOM_ERRORS = (429, 529, 500)
+
+Reply = dict | Callable[[dict], dict]
+
+
+# ── Reply builders ────────────────────────────────────────────────
+
+
+def _estimate_tokens(value) -> int:
+    return max(1, len(json.dumps(value, ensure_ascii=False)) // 4)
+
+
+def message(content: list[dict], stop_reason: str = "end_turn", request: dict | None = None) -> dict:
+    """A Messages API response body; usage is estimated from the request and content."""
+    request = request or {}
+    prompt = {k: request.get(k) for k in ("system", "messages", "tools") if k in request}
+    return {
+        "id": f"msg_fake_{random.getrandbits(48):012x}",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", "claude-fake"),
+        "content": content,
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {"input_tokens": _estimate_tokens(prompt), "output_tokens": _estimate_tokens(content)},
+    }
+
+
+def text_reply(text: str, stop_reason: str = "end_turn") -> Callable[[dict], dict]:
+    return lambda request: message([{"type": "text", "text": text}], stop_reason, request)
+
+
+def tool_use_reply(name: str, tool_input: dict, text: str | None = None) -> Callable[[dict], dict]:
+    def build(request: dict) -> dict:
+        content = [{"type": "text", "text": text}] if text else []
+        content.append({
+            "type": "tool_use",
+            "id": f"toolu_fake_{random.getrandbits(48):012x}",
+            "name": name,
+            "input": tool_input,
+        })
+        return message(content, "tool_use", request)
+
+    return build
+
+
+def _has_tool_result(request: dict) -> bool:
+    last = (request.get("messages") or [{}])[-1]
+    content = last.get("content")
+    return isinstance(content, list) and any(
+        isinstance(block, dict) and block.get("type") == "tool_result" for block in content
+    )
+
+
+def _prompt_blocks(request: dict) -> list:
+    """The request's prompt in cache-prefix order: tools, then system, then message blocks."""
+    blocks = list(request.get("tools") or [])
+    system = request.get("system")
+    if isinstance(system, str):
+        blocks.append({"type": "text", "text": system})
+    elif system:
+        blocks.extend(system)
+    for msg in request.get("messages") or []:
+        content = msg.get("content")
+        if isinstance(content, str):
+            blocks.append({"role": msg.get("role"), "type": "text", "text": content})
+        else:
+            blocks.extend({"role": msg.get("role"), **block} for block in content or [])
+    return blocks
+
+
+def default_reply(request: dict) -> dict:
+    """Call the first offered tool once, then answer in text."""
+    tools = request.get("tools") or []
+    if tools and not _has_tool_result(request):
+        schema = tools[0].get("input_schema", {})
+        tool_input = {
+            name: prop.get("enum", ["general"])[0] if prop.get("type") == "string" else None
+            for name, prop in schema.get("properties", {}).items()
+            if name in schema.get("required", [])
+        }
+        return tool_use_reply(tools[0]["name"], tool_input)(request)
+    return text_reply("No issues found.")(request)
+
+
+# ── Server ────────────────────────────────────────────────────────
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    errors: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    replayed: int = 0
+    batches: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+
+def load_recordings(directory: Path) -> dict[tuple, list[dict]]:
+    """Recorded responses from an eval cache directory, grouped by request and ordered by trial."""
+    grouped: dict[tuple, list[tuple]] = defaultdict(list)
+    for path in sorted(directory.glob("*/*.json")):
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            fields = entry["request"]
+        except (json.JSONDecodeError, KeyError):
+            continue
+        key = (fields["model"], fields["prompt_sha256"], fields["max_tokens"], fields["temperature"])
+        trial = fields.get("trial")
+        grouped[key].append((-1 if trial is None else trial, entry["response"]))
+    return {key: [response for _, response in sorted(entries, key=lambda e: e[0])]
+            for key, entries in grouped.items()}
+
+
+class FakeAnthropicServer:
+    def __init__(
+        self,
+        script: list[Reply] | None = None,
+        responder: Callable[[dict], dict] = default_reply,
+        recordings: Path | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        errors: list[int] | None = None,
+        error_rate: float = 0.0,
+        retry_after: float | None = None,
+        min_cacheable_tokens: int = 1024,
+        batch_delay: float = 0.0,
+        seed: int | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.script = list(script or [])
+        self.responder = responder
+        self.recordings = load_recordings(recordings) if recordings else {}
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = list(errors or [])
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.min_cacheable_tokens = min_cacheable_tokens
+        self._prompt_cache: set[str] = set()
+        self.batch_delay = batch_delay
+        self._batches: dict[str, dict] = {}
+        self.stats = ServerStats()
+        self.requests: list[dict] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._replay_cursors: dict[tuple, itertools.count] = defaultdict(itertools.count)
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAnthropicServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-anthropic", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeAnthropicServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ── Request handling (called on handler threads) ─────────────
+
+    def _pick_error(self) -> int | None:
+        with self._lock:
+            if self.errors:
+                return self.errors.pop(0)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return self._rng.choice(RANDOM_ERRORS)
+        return None
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _replay(self, request: dict) -> dict | None:
+        if not self.recordings:
+            return None
+        _, fields = request_key(request)
+        key = (fields["model"], fields["prompt_sha256"], fields["max_tokens"], fields["temperature"])
+        entries = self.recordings.get(key)
+        if not entries:
+            return None
+        with self._lock:
+            self.stats.replayed += 1
+            return entries[next(self._replay_cursors[key]) % len(entries)]
+
+    def _account_prompt_cache(self, request: dict, body: dict) -> None:
+        """Split usage.input_tokens into cache writes and reads for the request's breakpoint."""
+        blocks = _prompt_blocks(request)
+        if request.get("cache_control"):
+            breakpoint_at = len(blocks) - 1
+        else:
+            marked = [i for i, block in enumerate(blocks) if isinstance(block, dict) and block.get("cache_control")]
+            breakpoint_at = marked[-1] if marked else -1
+        if breakpoint_at < 0:
+            return
+
+        tokens = [_estimate_tokens(block) for block in blocks]
+        digest = hashlib.sha256()
+        prefixes = []  # (hash, tokens) of every block-boundary prefix up to the breakpoint
+        for i in range(breakpoint_at + 1):
+            digest.update(json.dumps(blocks[i], sort_keys=True).encode("utf-8"))
+            prefixes.append((digest.copy().hexdigest(), sum(tokens[: i + 1])))
+        prefix_hash, prefix_tokens = prefixes[-1]
+        if prefix_tokens < self.min_cacheable_tokens:
+            return
+
+        with self._lock:
+            read = next((n for h, n in reversed(prefixes) if h in self._prompt_cache), 0)
+            self._prompt_cache.add(prefix_hash)
+        body["usage"] = {
+            **body.get("usage", {}),
+            "input_tokens": max(0, sum(tokens) - prefix_tokens),
+            "cache_creation_input_tokens": prefix_tokens - read,
+            "cache_read_input_tokens": read,
+        }
+
+    def reply(self, request: dict) -> dict:
+        """The response body for one Messages request."""
+        recorded = self._replay(request)
+        if recorded is not None:
+            return recorded
+        with self._lock:
+            scripted = self.script.pop(0) if self.script else None
+        if scripted is None:
+            body = self.responder(request)
+        else:
+            body = dict(scripted(request) if callable(scripted) else scripted)
+        self._account_prompt_cache(request, body)
+        return body
+
+    # ── Message Batches ──────────────────────────────────────────
+
+    def create_batch(self, requests: list[dict]) -> dict:
+        """Answer every request now; the batch reports `ended` after batch_delay."""
+        results = []
+        for item in requests:
+            params = item.get("params") or {}
+            with self._lock:
+                self.stats.requests += 1
+                self.requests.append(params)
+            status = self._pick_error()
+            missing = [k for k in ("model", "max_tokens", "messages") if k not in params]
+            if status is None and missing:
+                status, text = 400, f"missing required fields: {', '.join(missing)}"
+            else:
+                text = f"injected {status}"
+            if status is not None:
+                with self._lock:
+                    self.stats.errors[status] += 1
+                error = {"type": ERROR_TYPES.get(status, "api_error"), "message": text}
+                result = {"type": "errored", "error": {"type": "error", "error": error}}
+            else:
+                result = {"type": "succeeded", "message": self.reply(params)}
+            results.append({"custom_id": item.get("custom_id"), "result": result})
+
+        batch_id = f"msgbatch_fake_{random.getrandbits(48):012x}"
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self.stats.batches += 1
+            self._batches[batch_id] = {
+                "created_at": now,
+                "ready_at": now + timedelta(seconds=self.batch_delay),
+                "results": results,
+            }
+        return self.batch_status(batch_id)
+
+    def batch_status(self, batch_id: str) -> dict | None:
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return None
+        ended = datetime.now(timezone.utc) >= batch["ready_at"]
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        if ended:
+            for entry in batch["results"]:
+                counts[entry["result"]["type"]] += 1
+        else:
+            counts["processing"] = len(batch["results"])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts,
+            "created_at": batch["created_at"].isoformat(),
+            "expires_at": (batch["created_at"] + timedelta(hours=24)).isoformat(),
+            "ended_at": batch["ready_at"].isoformat() if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{self.base_url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # keep test output quiet
+                pass
+
+            def _send(self, status: int, body: dict, headers: dict | None = None) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("request-id", f"req_fake_{random.getrandbits(48):012x}")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _error(self, status: int, text: str, headers: dict | None = None) -> None:
+                with server._lock:
+                    server.stats.errors[status] += 1
+                error_type = ERROR_TYPES.get(status, "api_error")
+                self._send(status, {"type": "error", "error": {"type": error_type, "message": text}}, headers)
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:3] != ["v1", "messages", "batches"] or len(parts) not in (4, 5):
+                    self._error(404, f"unknown endpoint {self.path}")
+                    return
+                status = server.batch_status(parts[3])
+                if status is None:
+                    self._error(404, f"no batch {parts[3]}")
+                elif len(parts) == 4:
+                    self._send(200, status)
+                elif status["processing_status"] != "ended":
+                    self._error(400, f"batch {parts[3]} is still processing")
+                else:
+                    lines = "".join(json.dumps(entry) + "\n" for entry in server._batches[parts[3]]["results"])
+                    data = lines.encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/binary")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                path = self.path.split("?")[0]
+                if path not in ("/v1/messages", "/v1/messages/batches"):
+                    self._error(404, f"unknown endpoint {self.path}")
+                    return
+                try:
+                    request = json.loads(raw)
+                except json.JSONDecodeError:
+                    self._error(400, "request body is not valid JSON")
+                    return
+                if path == "/v1/messages/batches":
+                    if not isinstance(request.get("requests"), list) or not request["requests"]:
+                        self._error(400, "requests: must be a non-empty list")
+                        return
+                    self._send(200, server.create_batch(request["requests"]))
+                    return
+
+                with server._lock:
+                    server.stats.requests += 1
+                    server.stats.in_flight += 1
+                    server.stats.peak_in_flight = max(server.stats.peak_in_flight, server.stats.in_flight)
+                    server.requests.append(request)
+                try:
+                    time.sleep(server._delay())
+                    status = server._pick_error()
+                    if status is not None:
+                        headers = {}
+                        if server.retry_after is not None and status in (429, 529):
+                            headers["retry-after"] = str(server.retry_after)
+                        self._error(status, f"injected {status}", headers)
+                        return
+                    missing = [k for k in ("model", "max_tokens", "messages") if k not in request]
+                    if missing:
+                        self._error(400, f"missing required fields: {', '.join(missing)}")
+                        return
+                    self._send(200, server.reply(request))
+                finally:
+                    with server._lock:
+                        server.stats.in_flight -= 1
+
+        return Handler
+
+
+# ── CLI ───────────────────────────────────────────────────────────
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local fake Anthropic Messages API for offline eval runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", type=Path, default=None,
+                        help="Eval cache directory to replay responses from (e.g. tests/.eval_cache)")
+    parser.add_argument("--text", default="No issues found.",
+                        help="Text reply for requests without a recording (default: %(default)r)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a random 429/529/500")
+    parser.add_argument("--retry-after", type=float, default=None, help="retry-after seconds sent with 429/529")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="Seconds before a message batch ends")
+    parser.add_argument("--min-cacheable-tokens", type=int, default=1024,
+                        help="Shortest prompt prefix the simulated prompt cache stores (default: 1024)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    def responder(request: dict) -> dict:
+        if request.get("tools") and not _has_tool_result(request):
+            return default_reply(request)
+        return text_reply(args.text)(request)
+
+    server = FakeAnthropicServer(
+        responder=responder, recordings=args.recordings, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, retry_after=args.retry_after, min_cacheable_tokens=args.min_cacheable_tokens,
+        batch_delay=args.batch_delay, seed=args.seed, host=args.host, port=args.port,
+    )
+    print(f"Fake Anthropic API on {server.base_url} "
+          f"({sum(map(len, server.recordings.values()))} recorded responses)")
+    print(f"  ANTHROPIC_BASE_URL={server.base_url} ANTHROPIC_API_KEY=fake python tests/run_llm_eval.py --cache off")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        s = server.stats
+        print(f"\n{s.requests} requests ({s.batches} batches), {s.replayed} replayed, "
+              f"peak in-flight {s.peak_in_flight}, "
+              f"errors {dict(s.errors) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,73 @@
-"""LLM Judge script - evaluates answer quality from a CSV using Claude API."""
+"""LLM Judge script - evaluates answer quality from a CSV using Claude API.
 
+Rows are judged concurrently through the shared EvalScheduler (bounded
+in-flight requests, token budget, retries on 429/529/5xx), and each row is
+appended to the output CSV as soon as it finishes. Output rows keep their
+input index in the `row` column, so they can be sorted back into input order.
+
+Every successful judgment is appended to a checkpoint file (JSONL), keyed by
+a hash of (model, question, answer, reference answer). Re-running after a
+crash or Ctrl-C judges only the rows that are missing, and duplicate rows are
+judged once. Pass the same --checkpoint to several runs to share the results.
+
+Usage:
+    python tests/llm_judge.py <input.csv> [output.csv]
+    python tests/llm_judge.py answers.csv --max-in-flight 16 --tpm 400000
+    python tests/llm_judge.py answers.csv --checkpoint judged.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
 import csv
+import hashlib
 import json
-import sys
 import time
 from pathlib import Path
 
-import anthropic
+from eval_scheduler import add_scheduler_args, make_client, scheduler_from_args
+
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+SCORES = ("accuracy", "completeness", "clarity")
+MAX_TOKENS = 4096
+FIELDS = ["row", "question", "answer", "reference_answer", *SCORES, "reasoning", "latency_s"]
+
+
+def row_key(model: str, question: str, answer: str, reference_answer: str) -> str:
+    """Content hash identifying one judgment; the checkpoint is keyed by it."""
+    payload = json.dumps([model, question, answer, reference_answer], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
-def judge_row(client, question, answer, reference_answer):
+def check_scores(scores) -> dict:
+    """Raise ValueError unless scores holds an int 1-5 for every score name."""
+    if not isinstance(scores, dict):
+        raise ValueError(f"expected a JSON object, got {type(scores).__name__}")
+    for name in SCORES:
+        value = scores.get(name)
+        if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 5:
+            raise ValueError(f"{name} must be an integer from 1 to 5, got {value!r}")
+    return scores
+
+
+def load_checkpoint(path: Path) -> dict[str, dict]:
+    """Judgments recorded by earlier runs, by row key. Torn or invalid lines are ignored."""
+    done = {}
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                check_scores(entry["scores"])
+                done[entry["key"]] = entry
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue
+    return done
+
+
+async def judge_row(client, question, answer, reference_answer, model: str = DEFAULT_MODEL):
     """Judge a single row by calling the Claude API."""
     prompt = f"""You are an answer quality judge. Compare the student answer against the reference answer.
 
@@ -25,9 +83,9 @@ Score on 1-5 for each:
 Respond with JSON only:
 {{"accuracy": <int>, "completeness": <int>, "clarity": <int>, "reasoning": "<brief>"}}"""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=4096,
+    response = await client.messages.create(
+        model=model,
+        max_tokens=MAX_TOKENS,
         messages=[{"role": "user", "content": prompt}],
     )
 
@@ -35,91 +93,116 @@ Respond with JSON only:
     # Strip markdown fences if present
     if text.startswith("```"):
         text = text.split("\n", 1)[1].rsplit("```", 1)[0]
-    return json.loads(text)
-
-
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python tests/llm_judge.py <input.csv> [output.csv]")
-        sys.exit(1)
-
-    input_path = Path(sys.argv[1])
-    output_path = Path(sys.argv[2]) if len(sys.argv) > 2 else input_path.with_name("judged_" + input_path.name)
+    return check_scores(json.loads(text))
 
-    client = anthropic.Anthropic()
 
-    # Read all rows
+async def judge_csv(
+    input_path: Path,
+    output_path: Path,
+    checkpoint_path: Path,
+    client,
+    model: str = DEFAULT_MODEL,
+) -> dict:
+    """Judge every row of input_path, streaming to output_path. Returns summary counts."""
     with open(input_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-
+        rows = list(csv.DictReader(f))
     print(f"Loaded {len(rows)} rows from {input_path}")
 
-    results = []
-    total_accuracy = 0
-    total_completeness = 0
-    total_clarity = 0
-    failed = 0
-
-    for i, row in enumerate(rows):
-        print(f"Judging row {i + 1}/{len(rows)}...")
-        start = time.time()
-        try:
-            scores = judge_row(
-                client,
-                row["question"],
-                row["answer"],
-                row["reference_answer"],
-            )
-            elapsed = time.time() - start
-            results.append({
-                "question": row["question"],
-                "answer": row["answer"],
-                "reference_answer": row["reference_answer"],
-                "accuracy": scores["accuracy"],
-                "completeness": scores["completeness"],
-                "clarity": scores["clarity"],
-                "reasoning": scores["reasoning"],
-                "latency_s": round(elapsed, 2),
-            })
-            total_accuracy += scores["accuracy"]
-            total_completeness += scores["completeness"]
-            total_clarity += scores["clarity"]
-            print(f"  accuracy={scores['accuracy']} completeness={scores['completeness']} "
-                  f"clarity={scores['clarity']} ({elapsed:.1f}s)")
-        except Exception as e:
-            failed += 1
-            elapsed = time.time() - start
-            print(f"  FAILED ({elapsed:.1f}s): {e}")
-            results.append({
+    done = load_checkpoint(checkpoint_path)
+    keys = [row_key(model, r["question"], r["answer"], r["reference_answer"]) for r in rows]
+    pending: dict[str, asyncio.Task] = {}  # one API call per distinct key, even for duplicate rows
+    totals = dict.fromkeys(SCORES, 0)
+    counts = {"rows": len(rows), "judged": 0, "cached": 0, "failed": 0}
+
+    with open(output_path, "w", newline="", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+
+        def emit(i: int, row: dict, scores: dict, latency_s: float) -> None:
+            writer.writerow({
+                "row": i,
                 "question": row["question"],
                 "answer": row["answer"],
                 "reference_answer": row["reference_answer"],
-                "accuracy": 0,
-                "completeness": 0,
-                "clarity": 0,
-                "reasoning": f"ERROR: {e}",
-                "latency_s": round(elapsed, 2),
+                **{name: scores.get(name, 0) for name in SCORES},
+                "reasoning": scores.get("reasoning", ""),
+                "latency_s": round(latency_s, 2),
             })
+            out.flush()
+
+        async def judge(key: str, row: dict) -> tuple[dict, float]:
+            start = time.monotonic()
+            scores = await judge_row(client, row["question"], row["answer"], row["reference_answer"], model)
+            elapsed = time.monotonic() - start
+            checkpoint.write(json.dumps({"key": key, "scores": scores, "latency_s": round(elapsed, 2)}) + "\n")
+            checkpoint.flush()
+            return scores, elapsed
+
+        async def process(i: int, key: str, row: dict) -> None:
+            if key in done:
+                counts["cached"] += 1
+                scores, elapsed = done[key]["scores"], done[key].get("latency_s", 0.0)
+            else:
+                if key not in pending:
+                    pending[key] = asyncio.create_task(judge(key, row))
+                start = time.monotonic()
+                try:
+                    scores, elapsed = await pending[key]
+                except Exception as e:
+                    counts["failed"] += 1
+                    elapsed = time.monotonic() - start
+                    print(f"  row {i + 1}: FAILED ({elapsed:.1f}s): {e}")
+                    emit(i, row, {"reasoning": f"ERROR: {e}"}, elapsed)
+                    return
+            counts["judged"] += 1
+            for name in SCORES:
+                totals[name] += scores[name]
+            emit(i, row, scores, elapsed)
+            finished = counts["judged"] + counts["failed"]
+            print(f"  [{finished}/{len(rows)}] row {i + 1}: accuracy={scores['accuracy']} "
+                  f"completeness={scores['completeness']} clarity={scores['clarity']} ({elapsed:.1f}s)")
+
+        await asyncio.gather(*(process(i, key, row) for i, (key, row) in enumerate(zip(keys, rows))))
+
+    counts.update({f"avg_{name}": totals[name] / counts["judged"] for name in SCORES if counts["judged"]})
+    return counts
+
+
+async def async_main():
+    parser = argparse.ArgumentParser(description="Judge answer quality in a CSV with Claude")
+    parser.add_argument("input", type=Path, help="CSV with question, answer, reference_answer columns")
+    parser.add_argument("output", type=Path, nargs="?", default=None,
+                        help="Output CSV (default: judged_<input> next to the input)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Judge model ID")
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="JSONL of finished judgments to resume from (default: <output>.checkpoint.jsonl)")
+    add_scheduler_args(parser)
+    args = parser.parse_args()
+
+    output_path = args.output or args.input.with_name("judged_" + args.input.name)
+    checkpoint_path = args.checkpoint or output_path.with_name(output_path.name + ".checkpoint.jsonl")
+    scheduler = scheduler_from_args(args)
+    client = make_client(scheduler)
+    try:
+        summary = await judge_csv(args.input, output_path, checkpoint_path, client, args.model)
+    finally:
+        await client.close()
 
-    # Write output CSV
-    if results:
-        with open(output_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=results[0].keys())
-            writer.writeheader()
-            writer.writerows(results)
-
-    # Summary
-    judged = len(rows) - failed
     print(f"\n{'='*50}")
-    print(f"Total rows: {len(rows)}")
-    print(f"Judged:     {judged}")
-    print(f"Failed:     {failed}")
-    if judged > 0:
-        print(f"Avg accuracy:     {total_accuracy / judged:.2f}")
-        print(f"Avg completeness: {total_completeness / judged:.2f}")
-        print(f"Avg clarity:      {total_clarity / judged:.2f}")
+    print(f"Total rows: {summary['rows']}")
+    print(f"Judged:     {summary['judged']} ({summary['cached']} from checkpoint)")
+    print(f"Failed:     {summary['failed']}")
+    for name in SCORES:
+        if f"avg_{name}" in summary:
+            print(f"Avg {name + ':':<14}{summary[f'avg_{name}']:.2f}")
     print(f"Results written to {output_path}")
+    print(f"Checkpoint: {checkpoint_path}")
+    print(scheduler.summary())
+
+
+def main():
+    asyncio.run(async_main())
 
 
 if __name__ == "__main__":
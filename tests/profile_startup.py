@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Startup profiler: import-time breakdown and stdio launch-to-initialize latency.
+
+Editors spawn one stdio server per workspace, so cold start is user-visible.
+This script measures it two ways:
+
+  1. `python -X importtime -c "import shudaizi_mcp.server"`, aggregated by
+     top-level package (self time), plus the slowest individual imports.
+  2. Wall-clock time from spawning `python -m shudaizi_mcp.server` to
+     receiving its response to an MCP `initialize` request over stdio.
+
+Bytecode is cached under a temporary PYTHONPYCACHEPREFIX and warmed before
+measuring, so results reflect an installed server even when the calling
+environment sets PYTHONDONTWRITEBYTECODE.
+
+Usage:
+    python tests/profile_startup.py                      # report
+    python tests/profile_startup.py --runs 10 --json
+    python tests/profile_startup.py --check --budget-ms 1500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = PROJECT_ROOT / "mcp_server" / "src"
+
+DEFAULT_BUDGET_MS = 1500
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-03-26",
+        "capabilities": {},
+        "clientInfo": {"name": "shudaizi-startup-profiler", "version": "1"},
+    },
+}
+
+
+def subprocess_env(pycache_dir: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPYCACHEPREFIX"] = pycache_dir
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH", "")]))
+    return env
+
+
+# ── Import time ───────────────────────────────────────────────────
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Rows of `-X importtime` output as {module, self_us, cumulative_us, depth}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return rows
+
+
+def importtime_report(module: str = "shudaizi_mcp.server", pycache_dir: str | None = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = subprocess_env(pycache_dir or tmp)
+        cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+        subprocess.run(cmd, env=env, capture_output=True, check=True)  # warm the bytecode cache
+        result = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+
+    rows = parse_importtime(result.stderr)
+    by_package: dict[str, int] = {}
+    for row in rows:
+        top = row["module"].split(".")[0]
+        by_package[top] = by_package.get(top, 0) + row["self_us"]
+    total = sum(row["self_us"] for row in rows)
+    return {
+        "module": module,
+        "total_ms": round(total / 1000, 1),
+        "modules": len(rows),
+        "by_package_ms": {
+            pkg: round(us / 1000, 1)
+            for pkg, us in sorted(by_package.items(), key=lambda kv: -kv[1])
+        },
+        "slowest_self": [
+            {"module": r["module"], "self_ms": round(r["self_us"] / 1000, 1)}
+            for r in sorted(rows, key=lambda r: -r["self_us"])[:15]
+        ],
+        "loaded": sorted(r["module"] for r in rows),
+    }
+
+
+# ── Launch to initialize ──────────────────────────────────────────
+
+
+def launch_to_initialize(pycache_dir: str, timeout: float = 30.0) -> float:
+    """Seconds from spawning the stdio server to reading its initialize response."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "shudaizi_mcp.server"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=subprocess_env(pycache_dir),
+        text=True,
+    )
+    try:
+        proc.stdin.write(json.dumps(INITIALIZE) + "\n")
+        proc.stdin.flush()
+        deadline = start + timeout
+        while True:
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError("server exited before answering initialize")
+            message = json.loads(line)
+            if message.get("id") == INITIALIZE["id"]:
+                if "result" not in message:
+                    raise RuntimeError(f"initialize failed: {message}")
+                return time.perf_counter() - start
+            if time.perf_counter() > deadline:
+                raise TimeoutError("no initialize response")
+    finally:
+        proc.stdin.close()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def launch_report(runs: int = 5) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        launch_to_initialize(tmp)  # warm the bytecode cache
+        samples = [launch_to_initialize(tmp) * 1000 for _ in range(runs)]
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def print_report(imports: dict, launch: dict, budget_ms: float) -> None:
+    print(f"\n{'='*64}")
+    print("  Shudaizi Startup Profile")
+    print(f"{'='*64}\n")
+    print(f"  import {imports['module']}: {imports['total_ms']:.0f}ms across {imports['modules']} modules")
+    print(f"  of which shudaizi_mcp itself: {imports['by_package_ms'].get('shudaizi_mcp', 0.0):.1f}ms\n")
+    print(f"  {'Package':<32} {'self ms':>8}")
+    print(f"  {'-'*41}")
+    for pkg, ms in list(imports["by_package_ms"].items())[:12]:
+        print(f"  {pkg:<32} {ms:>8.1f}")
+    print(f"\n  {'Slowest module (self)':<48} {'ms':>8}")
+    print(f"  {'-'*57}")
+    for row in imports["slowest_self"][:10]:
+        print(f"  {row['module']:<48} {row['self_ms']:>8.1f}")
+    print(f"\n  stdio launch → initialize response ({launch['runs']} runs): "
+          f"median {launch['median_ms']:.0f}ms, min {launch['min_ms']:.0f}ms, max {launch['max_ms']:.0f}ms "
+          f"(budget {budget_ms:.0f}ms)\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile MCP server startup")
+    parser.add_argument("--runs", type=int, default=5, help="Launches to time (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Launch-to-initialize budget for --check (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the median launch exceeds the budget")
+    parser.add_argument("--json", action="store_true", help="Emit the report as JSON")
+    args = parser.parse_args()
+
+    imports = importtime_report()
+    launch = launch_report(args.runs)
+
+    if args.json:
+        print(json.dumps({"imports": {k: v for k, v in imports.items() if k != "loaded"}, "launch": launch}, indent=2))
+    else:
+        print_report(imports, launch, args.budget_ms)
+
+    if args.check and launch["median_ms"] > args.budget_ms:
+        print(f"Startup regression: median {launch['median_ms']:.0f}ms > budget {args.budget_ms:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,8 @@ Usage:
     python tests/run_activation_eval.py --trials 10
     python tests/run_activation_eval.py --model claude-sonnet-4-20250514
     python tests/run_activation_eval.py --fixture activation_code_review_async
+    python tests/run_activation_eval.py --trials 20 --max-in-flight 16 --tpm 400000
+    python tests/run_activation_eval.py --cache replay   # regrade recorded responses offline
 
 Requires: ANTHROPIC_API_KEY environment variable (or .env file).
 """
@@ -28,7 +30,6 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
-import re
 import sys
 import time
 from dataclasses import dataclass, field
@@ -50,6 +51,11 @@ if _env_file.exists():
 
 FIXTURES_DIR = Path(__file__).parent / "eval_fixtures"
 
+from eval_cache import EvalCache, add_cache_args, cache_from_args  # noqa: E402
+from eval_grading import grader_for  # noqa: E402
+from eval_scheduler import EvalScheduler, add_scheduler_args, make_client, scheduler_from_args  # noqa: E402
+from eval_usage import CACHE_CONTROL, TokenUsage, gather_after_first, usage_summary  # noqa: E402
+
 # ── MCP tool schemas for the Anthropic SDK ───────────────────────
 # Only the 3 read tools. Uses input_schema (snake_case) per SDK convention.
 
@@ -158,6 +164,7 @@ class TrialResult:
     matched_keywords: list[str]
     response_text: str
     latency_ms: int
+    usage: TokenUsage = field(default_factory=TokenUsage)
 
 
 @dataclass
@@ -265,36 +272,23 @@ def grade_tool_calls(
 def grade_quality(
     response,
     expected_findings: list[dict],
+    false_positive_keywords: list[str] = (),
 ) -> tuple[bool, list[str]]:
-    """Grade text content in the response for expected keywords."""
+    """Grade text content in the response for expected keywords.
+
+    Keywords are regexes (e.g., "mock.*stripe"); invalid ones match literally.
+    """
     # Collect all text from text blocks
     text_parts = [
         block.text for block in response.content
         if block.type == "text"
     ]
-    response_text = "\n".join(text_parts).lower()
-
-    all_matched = []
-    all_passed = True
-
-    for finding in expected_findings:
-        keywords = finding.get("keywords", [])
-        matched = []
-        for kw in keywords:
-            # Support regex patterns in keywords (e.g., "mock.*stripe")
-            try:
-                if re.search(kw.lower(), response_text):
-                    matched.append(kw)
-            except re.error:
-                # Fall back to simple substring match
-                if kw.lower() in response_text:
-                    matched.append(kw)
-
-        all_matched.extend(matched)
-        if not matched:
-            all_passed = False
-
-    return all_passed, all_matched
+    ground_truth = {
+        "expected_findings": expected_findings,
+        "false_positive_keywords": list(false_positive_keywords),
+    }
+    grade = grader_for(ground_truth, regex=True).grade("\n".join(text_parts))
+    return grade.passed, grade.matched_keywords
 
 
 # ── LLM interaction ──────────────────────────────────────────────
@@ -325,12 +319,14 @@ async def run_trial(
         "model": model,
         "max_tokens": 4096,
         "messages": [{"role": "user", "content": prompt}],
+        # Every trial repeats tools + prompt verbatim: trials 2..k read it from the prompt cache
+        "cache_control": dict(CACHE_CONTROL),
     }
     if use_tools:
         kwargs["tools"] = SDK_TOOLS
 
     start = time.monotonic()
-    response = await client.messages.create(**kwargs)
+    response = await client.messages.create(**kwargs, trial=trial_num)
     latency_ms = int((time.monotonic() - start) * 1000)
 
     # Grade tool calls
@@ -345,7 +341,7 @@ async def run_trial(
 
     # Grade output quality
     quality_passed, matched_keywords = grade_quality(
-        response, ground_truth.get("expected_findings", [])
+        response, ground_truth.get("expected_findings", []), ground_truth.get("false_positive_keywords", [])
     )
 
     # Collect response text for debugging
@@ -362,6 +358,7 @@ async def run_trial(
         matched_keywords=matched_keywords,
         response_text=response_text,
         latency_ms=latency_ms,
+        usage=TokenUsage.from_response(response),
     )
 
 
@@ -373,9 +370,11 @@ async def run_eval(
     num_trials: int,
     filter_fixture: str | None,
     use_tools: bool,
+    scheduler: EvalScheduler | None = None,
+    cache: EvalCache | None = None,
 ) -> list[FixtureResult]:
     """Run activation eval across all fixtures."""
-    client = anthropic.AsyncAnthropic()
+    client = (cache or EvalCache(mode="off")).wrap(make_client(scheduler or EvalScheduler()))
     fixtures = discover_fixtures(filter_fixture)
 
     if not fixtures:
@@ -389,7 +388,7 @@ async def run_eval(
             run_trial(client, model, gt, prompt_text, i, use_tools)
             for i in range(1, num_trials + 1)
         ]
-        trials = await asyncio.gather(*trial_coros)
+        trials = await gather_after_first(trial_coros)
 
         result = FixtureResult(fixture_name=fixture_name)
         for trial in trials:
@@ -507,24 +506,32 @@ async def async_main():
     parser.add_argument("--trials", type=int, default=5, help="Number of trials per fixture (default: 5)")
     parser.add_argument("--model", default="claude-sonnet-4-20250514", help="Model ID")
     parser.add_argument("--fixture", default=None, help="Run only this fixture")
+    add_scheduler_args(parser)
+    add_cache_args(parser)
     args = parser.parse_args()
+    scheduler = scheduler_from_args(args)
+    cache = cache_from_args(args)
 
     print(f"\nModel: {args.model} | Trials: {args.trials}")
     print(f"Fixtures: {args.fixture or 'all activation fixtures'}\n")
 
     # Condition A: Tools available
     print("--- Condition A: Tools available (no instruction) ---\n")
-    with_results = await run_eval(args.model, args.trials, args.fixture, use_tools=True)
+    with_results = await run_eval(args.model, args.trials, args.fixture, use_tools=True, scheduler=scheduler, cache=cache)
     print_summary(with_results, use_tools=True)
+    print(usage_summary(((t.usage, t.latency_ms) for r in with_results for t in r.trials), args.model))
 
     # Condition B: No tools (baseline)
     print("--- Condition B: No tools (baseline) ---\n")
-    without_results = await run_eval(args.model, args.trials, args.fixture, use_tools=False)
+    without_results = await run_eval(args.model, args.trials, args.fixture, use_tools=False, scheduler=scheduler, cache=cache)
     print_summary(without_results, use_tools=False)
+    print(usage_summary(((t.usage, t.latency_ms) for r in without_results for t in r.trials), args.model))
 
     # Comparison
     if with_results and without_results:
         print_comparison(with_results, without_results)
+    print(scheduler.summary())
+    print(cache.summary())
 
 
 def main():
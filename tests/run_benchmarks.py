@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""Microbenchmarks for the parsing functions on the request path.
+
+Times extract_section, extract_checklist_section, extract_items_only,
+extract_standard, parse_frontmatter and filter_by_focus over the real corpus
+(x1) and over inflated copies where every section body is repeated 10x and
+100x. Inflation keeps the frontmatter, headings and section order intact, so
+each function does the same work on proportionally larger documents — the
+x100/x1 ratio shows how each one scales with file size.
+
+Results are normalized by a fixed pure-Python calibration loop, timed between
+benchmarks, so a baseline recorded on one machine can be checked on another.
+--check re-times anything past the threshold before reporting it, since a
+slow spell on a shared machine can cover a whole pass of one benchmark.
+
+With --scaling, instead generates synthetic knowledge bases of increasing
+size (corpus_generator.py) and times the corpus-wide operations: listing
+books/articles/checklists, resolving book IDs, the router's source listing
+and both write tools.
+
+Usage:
+    python tests/run_benchmarks.py                     # print results
+    python tests/run_benchmarks.py --save-baseline     # record tests/benchmark_baseline.json
+    python tests/run_benchmarks.py --check             # exit 1 on >50% regression vs baseline
+    python tests/run_benchmarks.py --check --threshold 0.3 --scales 1,10
+    python tests/run_benchmarks.py --corpus /tmp/corpus    # parsing benchmarks on a generated corpus
+    python tests/run_benchmarks.py --scaling 100,1000,10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "mcp_server" / "src"))
+
+from shudaizi_mcp.book_loader import (  # noqa: E402
+    SECTION_PATTERNS,
+    BookLoader,
+    extract_checklist_section,
+    extract_items_only,
+    extract_section,
+    extract_standard,
+    parse_frontmatter,
+    source_files,
+    split_sections,
+)
+from shudaizi_mcp.knowledge_manager import KnowledgeManager  # noqa: E402
+from shudaizi_mcp.routing import TaskRouter  # noqa: E402
+
+from corpus_generator import generate_corpus  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+
+FOCUS = "security,testing"
+
+
+# ── Corpus ────────────────────────────────────────────────────────
+
+
+def load_corpus(root: Path = PROJECT_ROOT) -> dict[str, list[str]]:
+    """Real checklist and book/article file contents."""
+    research_dir = root / "book_research"
+    books = [f for _, f in source_files(research_dir) + source_files(research_dir / "anthropic_articles")]
+    checklists = sorted((root / "knowledge" / "checklists").glob("*.md"))
+    return {
+        "books": [p.read_text(encoding="utf-8") for p in books],
+        "checklists": [p.read_text(encoding="utf-8") for p in checklists],
+    }
+
+
+def inflate(content: str, factor: int) -> str:
+    """Repeat every ## section body `factor` times, keeping the preamble and headings."""
+    if factor == 1:
+        return content
+    blocks = split_sections(content)
+    parts = ["\n".join(blocks[0][1])]
+    for heading, lines in blocks[1:]:
+        body = "\n".join(lines)
+        parts.append(heading + "\n" + "\n".join([body] * factor))
+    return "\n".join(parts)
+
+
+def checklist_headings(content: str) -> list[str]:
+    """Heading text of the first and last ## section — best and worst case for lookup."""
+    headings = [line[3:].strip() for line in content.split("\n") if line.startswith("## ")]
+    return [headings[0], headings[-1]] if headings else []
+
+
+# ── Benchmarks ────────────────────────────────────────────────────
+# Each benchmark maps one document to (callable, number of function calls it makes).
+
+_loader = BookLoader(PROJECT_ROOT)
+
+
+def _bench_extract_section(doc: str):
+    sections = list(SECTION_PATTERNS)
+    return (lambda: [extract_section(doc, s) for s in sections]), len(sections)
+
+
+def _bench_extract_checklist_section(doc: str):
+    names = checklist_headings(doc)
+    return (lambda: [extract_checklist_section(doc, n) for n in names]), len(names)
+
+
+def _bench_single(fn: Callable, *args):
+    def make(doc: str):
+        return (lambda: fn(doc, *args)), 1
+    return make
+
+
+BENCHMARKS: dict[str, tuple[str, Callable]] = {
+    "extract_section": ("books", _bench_extract_section),
+    "extract_checklist_section": ("checklists", _bench_extract_checklist_section),
+    "extract_items_only": ("checklists", _bench_single(extract_items_only)),
+    "extract_standard": ("checklists", _bench_single(extract_standard)),
+    "parse_frontmatter": ("checklists", _bench_single(parse_frontmatter)),
+    "filter_by_focus": ("checklists", _bench_single(_loader.filter_by_focus, FOCUS)),
+}
+
+
+def time_callable(fn: Callable[[], object], repeat: int, min_time: float = 0.01) -> float:
+    """Best-of-`repeat` seconds per invocation, looping enough to last min_time.
+
+    GC is disabled while timing (as timeit does) so collections triggered by
+    earlier allocations do not land in a random sample.
+    """
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    number = max(1, int(min_time / max(first, 1e-9)))
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - t0) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Seconds for a fixed string-processing workload, used to normalize results."""
+    text = "\n".join(f"- [ ] item {i} with some words [01]" for i in range(2000))
+
+    def work():
+        return sum(1 for line in text.split("\n") if line.strip().startswith("- [ ]"))
+
+    return time_callable(work, repeat, min_time=0.02)
+
+
+def run_benchmarks(
+    scales: list[int],
+    repeat: int = 5,
+    names: list[str] | None = None,
+    corpus: dict[str, list[str]] | None = None,
+    rounds: int = 3,
+) -> dict:
+    """Time every benchmark `rounds` times and keep each document's fastest time.
+
+    Shared machines slow down for seconds at a time; a slow period rarely
+    covers the same document in every round, so the per-document minimum
+    across rounds is far more repeatable than any single round. All results
+    are normalized by the fastest calibration of the run.
+    """
+    corpus = corpus or load_corpus()
+    best: dict[str, dict] = {}
+    calibrations = [calibrate(repeat)]
+    for _ in range(rounds):
+        for name, (kind, make) in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            for scale in scales:
+                key = f"{name}@x{scale}"
+                entry = best.setdefault(key, {"function": name, "scale": scale, "docs": {}})
+                for i, original in enumerate(corpus[kind]):
+                    doc = inflate(original, scale)
+                    fn, n = make(doc)
+                    if n == 0:
+                        continue
+                    seconds = time_callable(fn, repeat)
+                    prev = entry["docs"].get(i)
+                    entry["docs"][i] = (min(seconds, prev[0]) if prev else seconds, n, len(doc.encode("utf-8")) * n)
+                calibrations.append(calibrate(repeat))
+    # Every calibration sample shares one reference: the fastest, like the benchmarks themselves
+    calibration = min(calibrations)
+
+    results = {}
+    for key, b in best.items():
+        docs = b["docs"].values()
+        seconds = sum(d[0] for d in docs)
+        calls = sum(d[1] for d in docs)
+        per_call = seconds / calls if calls else 0.0
+        results[key] = {
+            "function": b["function"],
+            "scale": b["scale"],
+            "calls": calls,
+            "us_per_call": round(per_call * 1e6, 3),
+            "mb_per_s": round(sum(d[2] for d in docs) / seconds / 1e6, 1) if seconds else 0.0,
+            "normalized": round(per_call / calibration, 4),
+        }
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_us": round(calibration * 1e6, 3),
+        "results": results,
+    }
+
+
+def regressed(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Keys whose normalized time grew by more than `threshold`."""
+    keys = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base and base["normalized"] and result["normalized"] / base["normalized"] - 1 > threshold:
+            keys.append(key)
+    return keys
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions where the normalized time grew by more than `threshold`."""
+    regressions = []
+    for key in regressed(current, baseline, threshold):
+        result, base = current["results"][key], baseline["results"][key]
+        change = result["normalized"] / base["normalized"] - 1
+        regressions.append(
+            f"{key}: {base['us_per_call']:.1f}us -> {result['us_per_call']:.1f}us "
+            f"({change:+.0%} normalized, threshold {threshold:.0%})"
+        )
+    return regressions
+
+
+def confirm(report: dict, keys: list[str], repeat: int, corpus, rounds: int) -> dict:
+    """Re-time the `keys` benchmarks and keep each one's faster result.
+
+    A slow spell on a shared machine can outlast a whole pass of one
+    benchmark; a real regression shows up again on the second look.
+    """
+    again = {}
+    for key in keys:
+        name, scale = report["results"][key]["function"], report["results"][key]["scale"]
+        again.update(run_benchmarks([scale], repeat, [name], corpus=corpus, rounds=rounds)["results"])
+    results = dict(report["results"])
+    for key, result in again.items():
+        if result["normalized"] < results[key]["normalized"]:
+            results[key] = result
+    return {**report, "results": results}
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    print(f"\n{'='*84}")
+    print(f"  Shudaizi Parsing Benchmarks — Python {report['python']} "
+          f"(calibration {report['calibration_us']:.0f}us)")
+    print(f"{'='*84}\n")
+    header = f"  {'Benchmark':<34} {'Calls':>6} {'us/call':>11} {'MB/s':>8} {'vs x1':>7} {'vs base':>8}"
+    print(header)
+    print(f"  {'-'*(len(header)-2)}")
+    results = report["results"]
+    for key, r in results.items():
+        x1 = results.get(f"{r['function']}@x1")
+        growth = f"{r['us_per_call'] / x1['us_per_call']:.1f}x" if x1 and x1["us_per_call"] else ""
+        vs_base = ""
+        if baseline and key in baseline["results"] and baseline["results"][key]["normalized"]:
+            vs_base = f"{r['normalized'] / baseline['results'][key]['normalized'] - 1:+.0%}"
+        print(f"  {key:<34} {r['calls']:>6} {r['us_per_call']:>11.1f} {r['mb_per_s']:>8.1f} "
+              f"{growth:>7} {vs_base:>8}")
+    print()
+
+
+# ── Corpus scaling ────────────────────────────────────────────────
+
+
+def _time_each(fn, args_list: list) -> float:
+    """Mean seconds per call of fn(*args) over args_list."""
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) / max(len(args_list), 1)
+
+
+def measure_corpus(root: Path, samples: int = 50, seed: int = 0) -> dict[str, float]:
+    """Seconds per operation on the knowledge base at `root`.
+
+    "cold" operations run on fresh objects, as on the first request after a
+    restart; "warm" ones repeat them with caches populated.
+    """
+    rng = random.Random(seed)
+    loader = BookLoader(root)
+    router = TaskRouter(root / "knowledge")
+    book_ids = list(router.book_index.get("books", {}))
+    ids = [(rng.choice(book_ids),) for _ in range(samples)]
+    task_types = router.list_task_types()
+
+    timings = {
+        "list_books": _time_each(loader.list_books, [()]),
+        "list_articles": _time_each(loader.list_articles, [()]),
+        "list_checklists (cold)": _time_each(loader.list_checklists, [()]),
+        "list_checklists (warm)": _time_each(loader.list_checklists, [()]),
+        "get_book_file (cold)": _time_each(loader.get_book_file, ids),
+        "get_book_file (warm)": _time_each(loader.get_book_file, ids),
+        "read_book_section (warm)": _time_each(loader.read_book_section, ids),
+        "router.format_book_list": _time_each(router.format_book_list, [()]),
+    }
+
+    manager = KnowledgeManager(root)
+    manager.subscribe(loader.apply_change)
+    manager.subscribe(router.apply_change)
+    gen_text = (root / router.book_index["books"][book_ids[0]]["file"]).read_text(encoding="utf-8")
+    novel = "\n\n".join(
+        f"Paragraph {i} about benchmark scaling behaviour of a knowledge base with many sources, "
+        f"measured at {len(book_ids)} books with sample number {i} and seed {seed}."
+        for i in range(8)
+    )
+
+    def add_source(n: int, on_duplicate: str, content: str):
+        manager.add_knowledge_source(
+            title=f"Scaling Probe {on_duplicate} {n}",
+            source_type="book",
+            content=content,
+            category="Testing & Quality",
+            task_types=task_types[:2],
+            author="Benchmark",
+            year=2026,
+            on_duplicate=on_duplicate,
+        )
+
+    timings["add_knowledge_source (allow)"] = _time_each(add_source, [(i, "allow", novel) for i in range(5)])
+    # The first flagged write builds the paragraph index over every source
+    timings["add_knowledge_source (flag, cold)"] = _time_each(add_source, [(0, "flag", novel)])
+    timings["add_knowledge_source (flag, warm)"] = _time_each(add_source, [(i, "flag", novel) for i in range(1, 6)])
+    timings["add_knowledge_source (reject, duplicate)"] = _time_each(add_source, [(0, "reject", gen_text)])
+
+    def add_item(n: int):
+        manager.update_checklist(
+            task_type=task_types[n % len(task_types)],
+            action="add_items",
+            section="Scaling Probe",
+            content=f"- [ ] Probe item {n} checks that checklist updates stay fast at scale [{book_ids[0]}]",
+        )
+
+    timings["update_checklist (add_items)"] = _time_each(add_item, [(i,) for i in range(10)])
+    return timings
+
+
+def run_scaling(sizes: list[int], tasks: int = 16) -> dict:
+    """Generate a corpus per size (books=size, articles=size/10) and measure it."""
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="shudaizi-scale-") as tmp:
+            root = Path(tmp)
+            start = time.perf_counter()
+            summary = generate_corpus(root, books=size, articles=max(1, size // 10), tasks=tasks)
+            generated = time.perf_counter() - start
+            results[str(size)] = {
+                "corpus_mb": round(summary["bytes"] / 1e6, 1),
+                "generate_s": round(generated, 2),
+                "ops_ms": {op: round(t * 1000, 3) for op, t in measure_corpus(root).items()},
+            }
+    return results
+
+
+def print_scaling(results: dict) -> None:
+    sizes = list(results)
+    print(f"\n{'='*84}")
+    print("  Shudaizi Corpus Scaling — ms per operation by number of books")
+    print(f"{'='*84}\n")
+    header = f"  {'Operation':<40}" + "".join(f"{s + ' books':>14}" for s in sizes)
+    print(header)
+    print(f"  {'-'*(len(header)-2)}")
+    print(f"  {'corpus size (MB)':<40}" + "".join(f"{results[s]['corpus_mb']:>14.1f}" for s in sizes))
+    for op in results[sizes[0]]["ops_ms"]:
+        print(f"  {op:<40}" + "".join(f"{results[s]['ops_ms'][op]:>14.2f}" for s in sizes))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the book_loader parsing functions")
+    parser.add_argument("--scales", default="1,10,100", help="Comma-separated inflation factors (default: 1,10,100)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats per document; best is kept (default: 5)")
+    parser.add_argument("--rounds", type=int, default=3, help="Full passes over all benchmarks; best is kept (default: 3)")
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark names to run")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write results to {BASELINE_PATH.name}")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if any benchmark regressed past --threshold")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Allowed normalized slowdown (default: 0.5)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline file to compare against")
+    parser.add_argument("--corpus", default=None, help="Project root of another corpus (e.g. from corpus_generator.py)")
+    parser.add_argument("--scaling", default=None, help="Comma-separated book counts; run the corpus scaling benchmark instead")
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    args = parser.parse_args()
+
+    if args.scaling:
+        results = run_scaling([int(s) for s in args.scaling.split(",")])
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_scaling(results)
+        return
+
+    scales = [int(s) for s in args.scales.split(",")]
+    names = args.only.split(",") if args.only else None
+    corpus = load_corpus(Path(args.corpus)) if args.corpus else None
+    report = run_benchmarks(scales, args.repeat, names, corpus=corpus, rounds=args.rounds)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+
+    # With --json, stdout carries only the JSON document; status goes to stderr.
+    status = sys.stderr if args.json else sys.stdout
+
+    if args.check and baseline is not None:
+        flagged = regressed(report, baseline, args.threshold)
+        if flagged:
+            print(f"Re-timing {len(flagged)} benchmark(s) past the threshold...", file=status)
+            report = confirm(report, flagged, args.repeat, corpus, args.rounds)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, baseline)
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline saved to {baseline_path}", file=status)
+
+    if args.check:
+        if baseline is None:
+            print(f"No baseline at {baseline_path}; run with --save-baseline first.", file=status)
+            sys.exit(1)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("Regressions:", file=status)
+            for line in regressions:
+                print(f"  - {line}", file=status)
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}.", file=status)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,12 @@ Usage:
     python tests/run_llm_eval.py --model claude-sonnet-4-20250514
     python tests/run_llm_eval.py --fixture security_sql_injection  # single fixture
     python tests/run_llm_eval.py --no-checklist   # baseline without shudaizi
+    python tests/run_llm_eval.py --trials 20 --max-in-flight 16 --tpm 400000
+    python tests/run_llm_eval.py --cache replay   # regrade recorded responses offline
+    python tests/run_llm_eval.py --compare --trials 20 --batch   # nightly sweep via Message Batches
+    python tests/run_llm_eval.py --trials 20 --adaptive   # stop each fixture once its pass rate is settled
+    python tests/run_llm_eval.py --compare --incremental   # only fixtures whose checklist/code changed
+    python tests/run_llm_eval.py --no-store       # don't record the run in tests/.eval_results.sqlite3
 
 Requires: ANTHROPIC_API_KEY environment variable.
 """
@@ -20,6 +26,7 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import hashlib
 import json
 import sys
 import time
@@ -45,9 +52,20 @@ if _env_file.exists():
             os.environ.setdefault(key.strip(), value.strip())
 FIXTURES_DIR = Path(__file__).parent / "eval_fixtures"
 
-from shudaizi_mcp.book_loader import BookLoader
+from shudaizi_mcp.book_loader import BookLoader, parse_frontmatter
 from shudaizi_mcp.routing import TaskRouter
 
+from eval_batch import EvalBatcher, add_batch_args, batch_from_args
+from eval_cache import EvalCache, add_cache_args, cache_from_args
+import eval_grading
+from eval_grading import grader_for
+from eval_scheduler import EvalScheduler, add_scheduler_args, make_client, scheduler_from_args
+from eval_stopping import (
+    StoppingRule, add_stopping_args, pass_at_k, pass_pow_k, run_sequential, stopping_from_args, wilson_interval,
+)
+from eval_store import EvalStore, add_store_args, store_from_args
+from eval_usage import TokenUsage, cached_system, gather_after_first, usage_summary
+
 
 # ── Data structures ───────────────────────────────────────────────
 
@@ -67,6 +85,8 @@ class TrialResult:
     all_passed: bool
     response_text: str
     latency_ms: int
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    false_positives: list[str] = field(default_factory=list)
 
 
 @dataclass
@@ -76,14 +96,24 @@ class FixtureResult:
     trials: list[TrialResult]
     pass_at_k: float = 0.0
     pass_pow_k: float = 0.0
-
-    def compute_metrics(self):
+    detail_level: str = "standard"
+    focus: str = ""
+    checklist_version: str | None = None  # frontmatter `version`; None without a checklist
+    stop_reason: str = ""  # adaptive runs: why trials stopped (see eval_stopping)
+    pass_rate_ci: tuple[float, float] = (0.0, 1.0)
+    fingerprint: str = ""  # hash of everything the trials depend on; see fixture_fingerprint
+    reused_run: int | None = None  # --incremental: the stored run these trials came from
+
+    def compute_metrics(self, k: int | None = None, confidence: float = 0.95):
+        """pass@k / pass^k from the observed pass rate; k defaults to the number of trials run."""
         if not self.trials:
             return
         successes = sum(1 for t in self.trials if t.all_passed)
-        k = len(self.trials)
-        self.pass_at_k = 1.0 - ((1.0 - successes / k) ** k) if k > 0 else 0.0
-        self.pass_pow_k = (successes / k) ** k if k > 0 else 0.0
+        n = len(self.trials)
+        k = k or n
+        self.pass_at_k = pass_at_k(successes / n, k)
+        self.pass_pow_k = pass_pow_k(successes / n, k)
+        self.pass_rate_ci = wilson_interval(successes, n, confidence)
 
 
 # ── Fixture loading ───────────────────────────────────────────────
@@ -122,14 +152,27 @@ def get_checklist(task_type: str, detail_level: str = "standard", focus: str = "
     return content
 
 
+def checklist_version(task_type: str) -> str | None:
+    loader = BookLoader(PROJECT_ROOT)
+    path = loader.checklists_dir / f"{task_type}.md"
+    if not path.exists():
+        return None
+    metadata, _ = parse_frontmatter(path.read_text(encoding="utf-8"))
+    return metadata.get("version")
+
+
 # ── LLM interaction ───────────────────────────────────────────────
 
 
-REVIEW_PROMPT = """\
+# With a checklist, the stable part (role + checklist) goes first as a cached
+# system prompt and only the per-fixture part is sent as the user turn.
+REVIEW_SYSTEM = """\
 You are a senior software engineer performing a {task_type} review.
 
-{checklist_section}
+{checklist_section}"""
+
 
+REVIEW_PROMPT = """\
 Review the following code and identify all issues, vulnerabilities, or problems.
 For each issue found, explain what it is and why it matters.
 
@@ -153,11 +196,13 @@ For each issue found, explain what it is and why it matters.
 Respond with a structured list of findings. Be specific."""
 
 
-GENERATE_PROMPT = """\
+GENERATE_SYSTEM = """\
 You are a senior software engineer writing production code.
 
-{checklist_section}
+{checklist_section}"""
 
+
+GENERATE_PROMPT = """\
 {prompt_text}
 
 Write the implementation. Include all necessary imports."""
@@ -171,6 +216,10 @@ You are a senior software engineer writing production code.
 Write the implementation. Include all necessary imports."""
 
 
+# Sampling settings sent with every trial (fingerprinted; see fixture_fingerprint)
+REQUEST_SETTINGS = {"max_tokens": 2048}
+
+
 async def run_trial(
     client: anthropic.AsyncAnthropic,
     model: str,
@@ -182,48 +231,44 @@ async def run_trial(
 ) -> TrialResult:
     task_type = ground_truth["task_type"].replace("_", " ")
     eval_mode = ground_truth.get("eval_mode", "reactive")
+    system = None
 
     if eval_mode == "proactive":
         if checklist:
             checklist_section = f"Use the following checklist to guide your implementation:\n\n{checklist}"
-            prompt = GENERATE_PROMPT.format(
-                checklist_section=checklist_section,
-                prompt_text=prompt_text,
-            )
+            system = GENERATE_SYSTEM.format(checklist_section=checklist_section)
+            prompt = GENERATE_PROMPT.format(prompt_text=prompt_text)
         else:
             prompt = GENERATE_PROMPT_NO_CHECKLIST.format(prompt_text=prompt_text)
     elif checklist:
         checklist_section = f"Use the following checklist to guide your review:\n\n{checklist}"
-        prompt = REVIEW_PROMPT.format(
-            task_type=task_type,
-            checklist_section=checklist_section,
-            code=code,
-        )
+        system = REVIEW_SYSTEM.format(task_type=task_type, checklist_section=checklist_section)
+        prompt = REVIEW_PROMPT.format(code=code)
     else:
         prompt = REVIEW_PROMPT_NO_CHECKLIST.format(task_type=task_type, code=code)
 
+    kwargs = {
+        "model": model,
+        **REQUEST_SETTINGS,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    if system:
+        kwargs["system"] = cached_system(system)
+
     start = time.monotonic()
-    response = await client.messages.create(
-        model=model,
-        max_tokens=2048,
-        messages=[{"role": "user", "content": prompt}],
-    )
+    response = await client.messages.create(**kwargs, trial=trial_num)
     latency_ms = int((time.monotonic() - start) * 1000)
 
     response_text = response.content[0].text
-    response_lower = response_text.lower()
 
-    # Grade each expected finding
-    findings = []
-    for finding in ground_truth["expected_findings"]:
-        matched = [kw for kw in finding["keywords"] if kw.lower() in response_lower]
-        findings.append(FindingResult(
-            finding_id=finding["id"],
-            passed=len(matched) > 0,
-            matched_keywords=matched,
-        ))
+    # Grade each expected finding, and any false-positive keyword, with the fixture's compiled grader
+    grade = grader_for(ground_truth).grade(response_text)
+    findings = [
+        FindingResult(finding_id=f.finding_id, passed=f.passed, matched_keywords=f.matched)
+        for f in grade.findings
+    ]
 
-    all_passed = all(f.passed for f in findings)
+    all_passed = grade.passed
 
     return TrialResult(
         fixture_name="",
@@ -232,19 +277,92 @@ async def run_trial(
         all_passed=all_passed,
         response_text=response_text,
         latency_ms=latency_ms,
+        usage=TokenUsage.from_response(response),
+        false_positives=grade.false_positives,
     )
 
 
 # ── Main eval loop ────────────────────────────────────────────────
 
 
+PROMPT_TEMPLATES = (
+    REVIEW_SYSTEM, REVIEW_PROMPT, REVIEW_PROMPT_NO_CHECKLIST,
+    GENERATE_SYSTEM, GENERATE_PROMPT, GENERATE_PROMPT_NO_CHECKLIST,
+)
+# Any edit to the grading code (e.g. new false-positive rules) invalidates stored pass/fail results
+GRADER_SOURCE_SHA256 = hashlib.sha256(Path(eval_grading.__file__).read_bytes()).hexdigest()
+
+
+def fixture_fingerprint(code: str, ground_truth: dict, prompt_text: str, checklist: str | None) -> str:
+    """Hash of a fixture's inputs: rendered checklist (None for baseline), code, prompt, ground truth,
+    templates, request settings and grader source.
+
+    Two runs with equal fingerprints and model send the same requests and grade them the same way.
+    """
+    parts = [
+        checklist,
+        code,
+        prompt_text,
+        json.dumps(ground_truth, sort_keys=True),
+        *PROMPT_TEMPLATES,
+        json.dumps(REQUEST_SETTINGS, sort_keys=True),
+        GRADER_SOURCE_SHA256,
+    ]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def fixture_from_store(fixture_name: str, stored: dict) -> FixtureResult:
+    """Rebuild a FixtureResult from EvalStore.find_fixture (response texts are not stored)."""
+    row = stored["fixture"]
+    trials = [
+        TrialResult(
+            fixture_name=fixture_name,
+            trial_num=t["trial_num"],
+            findings=[
+                FindingResult(f["finding_id"], bool(f["passed"]), json.loads(f["matched_keywords"]))
+                for f in findings
+            ],
+            all_passed=bool(t["passed"]),
+            response_text="",
+            latency_ms=t["latency_ms"],
+            usage=TokenUsage(t["input_tokens"], t["output_tokens"], t["cache_creation_tokens"], t["cache_read_tokens"]),
+            false_positives=json.loads(t["false_positives"]),
+        )
+        for t, findings in stored["trials"]
+    ]
+    return FixtureResult(
+        fixture_name=fixture_name,
+        task_type=row["task_type"],
+        trials=trials,
+        pass_at_k=row["pass_at_k"],
+        pass_pow_k=row["pass_pow_k"],
+        detail_level=row["detail_level"],
+        focus=row["focus"],
+        checklist_version=row["checklist_version"],
+        fingerprint=row["fingerprint"],
+        reused_run=row["run_id"],
+    )
+
+
 async def run_eval(
     model: str,
     num_trials: int,
     filter_fixture: str | None,
     use_checklist: bool,
+    scheduler: EvalScheduler | None = None,
+    cache: EvalCache | None = None,
+    batch: EvalBatcher | None = None,
+    stopping: StoppingRule | None = None,
+    store: EvalStore | None = None,
+    incremental: bool = False,
 ) -> list[FixtureResult]:
-    client = anthropic.AsyncAnthropic()
+    """Run every fixture's trials; with `stopping`, each fixture stops once its pass rate is settled.
+
+    With `incremental`, a fixture whose fingerprint and model match a result in `store` that ran at
+    least `num_trials` trials is not run; the stored result is returned in its place.
+    """
+    inner = batch.wrap() if batch else make_client(scheduler or EvalScheduler())
+    client = (cache or EvalCache(mode="off")).wrap(inner)
     fixtures = discover_fixtures(filter_fixture)
 
     if not fixtures:
@@ -263,17 +381,43 @@ async def run_eval(
                 gt.get("focus", ""),
             )
 
-        # Run all trials for this fixture concurrently
-        trial_coros = [
-            run_trial(client, model, code, gt, checklist, trial_num, prompt_text)
-            for trial_num in range(1, num_trials + 1)
-        ]
-        trials = await asyncio.gather(*trial_coros)
+        fingerprint = fixture_fingerprint(code, gt, prompt_text, checklist)
+        stored = store.find_fixture(fingerprint, model, num_trials) if store and incremental else None
+        if stored:
+            fixture_result = fixture_from_store(fixture_name, stored)
+            passed = sum(1 for t in fixture_result.trials if t.all_passed)
+            print(f"  [SKIP] {fixture_name} unchanged since run {fixture_result.reused_run} "
+                  f"({passed}/{len(fixture_result.trials)} passed)")
+            fixture_result.compute_metrics(num_trials, stopping.confidence if stopping else 0.95)
+            return fixture_result
+
+        # Trial 1 writes the cached checklist prefix; the rest run concurrently and read it.
+        # Batched trials all go into one round instead.
+        warm_first = bool(checklist) and not batch
+        stop_reason = ""
+        if stopping:
+            trials, stop_reason = await run_sequential(
+                lambda trial_num: run_trial(client, model, code, gt, checklist, trial_num, prompt_text),
+                lambda trial: trial.all_passed,
+                stopping,
+                warm_first,
+            )
+        else:
+            trial_coros = [
+                run_trial(client, model, code, gt, checklist, trial_num, prompt_text)
+                for trial_num in range(1, num_trials + 1)
+            ]
+            trials = await (gather_after_first(trial_coros) if warm_first else asyncio.gather(*trial_coros))
 
         fixture_result = FixtureResult(
             fixture_name=fixture_name,
             task_type=gt["task_type"],
             trials=[],
+            detail_level=gt.get("detail_level", "standard"),
+            focus=gt.get("focus", ""),
+            checklist_version=checklist_version(gt["task_type"]) if use_checklist else None,
+            stop_reason=stop_reason,
+            fingerprint=fingerprint,
         )
 
         for trial in trials:
@@ -284,10 +428,17 @@ async def run_eval(
             findings_detail = ", ".join(
                 f"{f.finding_id}:{'OK' if f.passed else 'MISS'}" for f in trial.findings
             )
+            if trial.false_positives:
+                findings_detail += f", false positives: {', '.join(trial.false_positives)}"
             print(f"  [{status}] {fixture_name} trial {trial.trial_num}/{num_trials} "
                   f"({trial.latency_ms}ms) — {findings_detail}")
 
-        fixture_result.compute_metrics()
+        # Adaptive runs report pass@k / pass^k at the requested k, whatever number of trials they stopped at
+        fixture_result.compute_metrics(num_trials, stopping.confidence if stopping else 0.95)
+        if stop_reason:
+            low, high = fixture_result.pass_rate_ci
+            print(f"  {fixture_name}: stopped after {len(trials)}/{num_trials} trials ({stop_reason}), "
+                  f"pass rate {low:.0%}–{high:.0%}")
         return fixture_result
 
     # Run ALL fixtures concurrently
@@ -300,22 +451,28 @@ async def run_eval(
     return list(results)
 
 
-def print_summary(results: list[FixtureResult], use_checklist: bool):
+def print_summary(results: list[FixtureResult], use_checklist: bool, k: int | None = None):
     mode = "WITH checklist" if use_checklist else "WITHOUT checklist (baseline)"
-    k = results[0].trials.__len__() if results else 0
+    k = k or (results[0].trials.__len__() if results else 0)
+    adaptive = any(r.stop_reason for r in results)
 
     print(f"\n{'=' * 70}")
     print(f"  EVAL SUMMARY — {mode} — k={k}")
     print(f"{'=' * 70}")
-    print(f"{'Fixture':<35} {'Task':<20} {'Pass@k':>8} {'Pass^k':>8} {'Trials':>8}")
-    print(f"{'-' * 35} {'-' * 20} {'-' * 8} {'-' * 8} {'-' * 8}")
+    print(f"{'Fixture':<35} {'Task':<20} {'Pass@k':>8} {'Pass^k':>8} {'Trials':>8}"
+          + (f" {'Pass rate CI':>14}" if adaptive else ""))
+    print(f"{'-' * 35} {'-' * 20} {'-' * 8} {'-' * 8} {'-' * 8}" + (f" {'-' * 14}" if adaptive else ""))
 
     total_pass_at_k = 0
     total_pass_pow_k = 0
 
     for r in results:
         trial_summary = f"{sum(1 for t in r.trials if t.all_passed)}/{len(r.trials)}"
-        print(f"{r.fixture_name:<35} {r.task_type:<20} {r.pass_at_k:>7.0%} {r.pass_pow_k:>7.0%} {trial_summary:>8}")
+        line = f"{r.fixture_name:<35} {r.task_type:<20} {r.pass_at_k:>7.0%} {r.pass_pow_k:>7.0%} {trial_summary:>8}"
+        if adaptive:
+            low, high = r.pass_rate_ci
+            line += f" {f'{low:.0%}–{high:.0%}':>14}"
+        print(line)
         total_pass_at_k += r.pass_at_k
         total_pass_pow_k += r.pass_pow_k
 
@@ -323,10 +480,21 @@ def print_summary(results: list[FixtureResult], use_checklist: bool):
     if n > 0:
         print(f"{'-' * 35} {'-' * 20} {'-' * 8} {'-' * 8} {'-' * 8}")
         print(f"{'AVERAGE':<35} {'':<20} {total_pass_at_k / n:>7.0%} {total_pass_pow_k / n:>7.0%}")
+    ran = [r for r in results if r.reused_run is None]
+    if adaptive and ran:
+        run, planned = sum(len(r.trials) for r in ran), k * len(ran)
+        print(f"Adaptive: {run} of {planned} trials run ({1 - run / planned:.0%} saved)")
+    reused = sum(1 for r in results if r.reused_run is not None)
+    if reused:
+        print(f"Incremental: {reused} of {n} fixtures unchanged, results reused from the store")
 
     print()
 
 
+def print_usage(results: list[FixtureResult], model: str, batch: bool = False):
+    print(usage_summary(((t.usage, t.latency_ms) for r in results for t in r.trials), model, batch))
+
+
 async def async_main():
     parser = argparse.ArgumentParser(description="Run Level 3A LLM eval")
     parser.add_argument("--trials", type=int, default=3, help="Number of trials per fixture (default: 3)")
@@ -334,16 +502,46 @@ async def async_main():
     parser.add_argument("--fixture", default=None, help="Run only this fixture")
     parser.add_argument("--no-checklist", action="store_true", help="Run baseline without checklist")
     parser.add_argument("--compare", action="store_true", help="Run both with and without checklist")
+    add_scheduler_args(parser)
+    add_cache_args(parser)
+    add_batch_args(parser)
+    add_store_args(parser)
+    add_stopping_args(parser)
     args = parser.parse_args()
+    if args.adaptive and args.min_trials >= args.trials:
+        parser.error(f"--adaptive can only stop early when --trials ({args.trials}) is above "
+                     f"--min-trials ({args.min_trials})")
+    scheduler = scheduler_from_args(args)
+    cache = cache_from_args(args)
+    batch = batch_from_args(args)
+    store = store_from_args(args)
+    if args.incremental and not store:
+        parser.error("--incremental needs the results store; drop --no-store")
+    options = dict(scheduler=scheduler, cache=cache, batch=batch, stopping=stopping_from_args(args),
+                   store=store, incremental=args.incremental)
 
     if args.compare:
-        print("\n--- Running WITH checklist ---\n")
-        with_results = await run_eval(args.model, args.trials, args.fixture, use_checklist=True)
-        print_summary(with_results, use_checklist=True)
+        if batch:
+            # Both conditions share each batch round rather than waiting on two
+            print("\n--- Running WITH and WITHOUT checklist (batched together) ---\n")
+            with_results, without_results = await asyncio.gather(
+                run_eval(args.model, args.trials, args.fixture, use_checklist=True, **options),
+                run_eval(args.model, args.trials, args.fixture, use_checklist=False, **options),
+            )
+        else:
+            print("\n--- Running WITH checklist ---\n")
+            with_results = await run_eval(args.model, args.trials, args.fixture, use_checklist=True, **options)
+            print("\n--- Running WITHOUT checklist (baseline) ---\n")
+            without_results = await run_eval(args.model, args.trials, args.fixture, use_checklist=False, **options)
 
-        print("\n--- Running WITHOUT checklist (baseline) ---\n")
-        without_results = await run_eval(args.model, args.trials, args.fixture, use_checklist=False)
-        print_summary(without_results, use_checklist=False)
+        if store:
+            store.record_run("llm", args.model, True, args.trials, with_results)
+            store.record_run("llm", args.model, False, args.trials, without_results)
+
+        print_summary(with_results, use_checklist=True, k=args.trials)
+        print_usage(with_results, args.model, bool(batch))
+        print_summary(without_results, use_checklist=False, k=args.trials)
+        print_usage(without_results, args.model, bool(batch))
 
         # Delta summary
         print(f"\n{'=' * 70}")
@@ -360,8 +558,21 @@ async def async_main():
         print()
     else:
         print(f"\nModel: {args.model} | Trials: {args.trials} | Checklist: {not args.no_checklist}\n")
-        results = await run_eval(args.model, args.trials, args.fixture, use_checklist=not args.no_checklist)
-        print_summary(results, use_checklist=not args.no_checklist)
+        results = await run_eval(
+            args.model, args.trials, args.fixture, use_checklist=not args.no_checklist, **options
+        )
+        if store:
+            store.record_run("llm", args.model, not args.no_checklist, args.trials, results)
+        print_summary(results, use_checklist=not args.no_checklist, k=args.trials)
+        print_usage(results, args.model, bool(batch))
+
+    if batch:
+        await batch.close()
+    print(batch.summary() if batch else scheduler.summary())
+    print(cache.summary())
+    if store:
+        print(f"Results stored in {store.path} (query with tests/eval_store.py)")
+        store.close()
 
 
 def main():
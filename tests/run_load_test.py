@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Load test: replay a request mix against the MCP server and report capacity.
+
+Two targets:
+  inproc  Calls server.request_handlers[CallToolRequest] directly — measures
+          the tool code plus MCP request handling, with no transport.
+  http    Posts JSON-RPC tools/call requests to the StreamableHTTP /mcp
+          endpoint — either a server started in-process on a free port, or
+          an already-running one given with --url.
+
+Two request mixes:
+  synthetic (default)  Weighted mix over all task types, detail levels,
+                       books/articles and sections, seeded for repeatability.
+  --replay FILE        Arguments from an access log (SHUDAIZI_ACCESS_LOG).
+                       Write-tool entries are skipped: their content is only
+                       logged as a hash, and replaying writes would mutate
+                       the knowledge base.
+
+Reports throughput, p50/p95/p99 latency and error rate, overall and per tool.
+
+Usage:
+    python tests/run_load_test.py                                # inproc, 2000 requests, concurrency 8
+    python tests/run_load_test.py --target http --concurrency 32
+    python tests/run_load_test.py --target http --url http://127.0.0.1:8530/mcp --duration 30
+    python tests/run_load_test.py --replay access.jsonl --json > load.json
+    python tests/run_load_test.py --corpus /tmp/corpus     # serve a generated knowledge base
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "mcp_server" / "src"))
+
+from mcp.types import CallToolRequest, CallToolRequestParams  # noqa: E402
+
+from shudaizi_mcp.server import create_http_app, create_server  # noqa: E402
+from shudaizi_mcp.tools import _is_error  # noqa: E402  # the predicate behind /metrics' error counts
+
+WRITE_TOOLS = {"add_knowledge_source", "update_checklist"}
+
+SECTIONS = ["key_ideas", "patterns", "tradeoffs", "pitfalls", "framings", "applicability", "full"]
+SECTION_WEIGHTS = [40, 15, 10, 15, 5, 10, 5]
+
+DETAIL_LEVELS = ["brief", "standard", "detailed"]
+DETAIL_WEIGHTS = [30, 55, 15]
+
+FOCUS_TERMS = ["", "", "", "security", "performance", "testing", "error handling", "scalability"]
+
+INTENTS = [
+    "is this login handler safe against injection?",
+    "review this pull request before merge",
+    "our p99 latency spiked, what should we instrument?",
+    "design a REST API for orders",
+    "plan the test suite for the payments service",
+    "this function is 400 lines long, help me break it up",
+]
+
+
+# ── Request mixes ─────────────────────────────────────────────────
+
+
+def synthetic_mix(n: int, seed: int = 0, root: Path = PROJECT_ROOT) -> list[tuple[str, dict]]:
+    """A weighted, read-only mix covering every task type and source."""
+    rng = random.Random(seed)
+    routing = json.loads((root / "knowledge" / "routing.json").read_text())
+    index = json.loads((root / "knowledge" / "book_index.json").read_text())
+    task_types = sorted(routing["tasks"])
+    source_ids = sorted(index["books"]) + sorted(index["articles"])
+
+    requests = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.45:
+            args = {
+                "task_type": rng.choice(task_types),
+                "detail_level": rng.choices(DETAIL_LEVELS, DETAIL_WEIGHTS)[0],
+            }
+            focus = rng.choice(FOCUS_TERMS)
+            if focus:
+                args["focus"] = focus
+            requests.append(("get_task_checklist", args))
+        elif roll < 0.50:
+            requests.append(("get_task_checklist", {"task_type": "auto", "intent": rng.choice(INTENTS)}))
+        elif roll < 0.55:
+            requests.append(("get_task_checklist", {
+                "task_type": ",".join(rng.sample(task_types, 3)),
+                "max_tokens": 4000,
+            }))
+        elif roll < 0.92:
+            requests.append(("get_book_knowledge", {
+                "book_id": rng.choice(source_ids),
+                "section": rng.choices(SECTIONS, SECTION_WEIGHTS)[0],
+            }))
+        else:
+            requests.append(("list_available_knowledge", {"category": rng.choice(["all", "tasks", "books"])}))
+    return requests
+
+
+def replay_mix(path: Path) -> list[tuple[str, dict]]:
+    """Read-tool calls from an access log, in recorded order."""
+    requests = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if entry["tool"] not in WRITE_TOOLS:
+            requests.append((entry["tool"], entry["arguments"]))
+    return requests
+
+
+# ── Targets ───────────────────────────────────────────────────────
+
+
+class InProcessTarget:
+    def __init__(self, root: Path = PROJECT_ROOT):
+        self.server = create_server(root)
+        self.handler = self.server.request_handlers[CallToolRequest]
+
+    async def call(self, tool: str, arguments: dict) -> bool:
+        """Return True when the call succeeded."""
+        result = await self.handler(
+            CallToolRequest(method="tools/call", params=CallToolRequestParams(name=tool, arguments=arguments))
+        )
+        root = result.root
+        return not root.isError and not _is_error(root.content[0].text)
+
+    async def close(self) -> None:
+        pass
+
+
+class HttpTarget:
+    HEADERS = {"accept": "application/json, text/event-stream", "content-type": "application/json"}
+
+    def __init__(self, url: str, concurrency: int):
+        import httpx
+
+        self.url = url
+        self.client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._ids = itertools.count(1)
+
+    async def call(self, tool: str, arguments: dict) -> bool:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": "tools/call",
+            "params": {"name": tool, "arguments": arguments},
+        }
+        response = await self.client.post(self.url, json=payload, headers=self.HEADERS)
+        if response.status_code != 200:
+            return False
+        message = _parse_jsonrpc(response)
+        if message is None or "error" in message:
+            return False
+        result = message["result"]
+        return not result.get("isError") and not _is_error(result["content"][0]["text"])
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def _parse_jsonrpc(response) -> dict | None:
+    """StreamableHTTP answers with either JSON or a single SSE message event."""
+    if response.headers.get("content-type", "").startswith("application/json"):
+        return response.json()
+    for line in response.text.splitlines():
+        if line.startswith("data: "):
+            return json.loads(line[len("data: "):])
+    return None
+
+
+def start_local_http_server(root: Path = PROJECT_ROOT) -> tuple[str, object]:
+    """Run the StreamableHTTP app on a free port in a background thread."""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    config = uvicorn.Config(create_http_app(root), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("HTTP server did not start within 10s")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/mcp", server
+
+
+# ── Runner ────────────────────────────────────────────────────────
+
+
+@dataclass
+class Sample:
+    tool: str
+    latency: float
+    ok: bool
+
+
+@dataclass
+class LoadResult:
+    target: str
+    concurrency: int
+    elapsed: float
+    samples: list[Sample] = field(default_factory=list)
+
+
+async def run_load(target, requests: list[tuple[str, dict]], concurrency: int,
+                   duration: float | None = None) -> tuple[list[Sample], float]:
+    """Drive `concurrency` workers over the request list (cycled when a duration is set)."""
+    source = itertools.cycle(requests) if duration else iter(requests)
+    samples: list[Sample] = []
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    async def worker():
+        for tool, arguments in source:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            t0 = time.perf_counter()
+            try:
+                ok = await target.call(tool, arguments)
+            except Exception:
+                ok = False
+            samples.append(Sample(tool, time.perf_counter() - t0, ok))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    latencies = sorted(s.latency for s in samples)
+    errors = sum(1 for s in samples if not s.ok)
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+    }
+
+
+def build_report(result: LoadResult) -> dict:
+    by_tool: dict[str, list[Sample]] = {}
+    for s in result.samples:
+        by_tool.setdefault(s.tool, []).append(s)
+    return {
+        "target": result.target,
+        "concurrency": result.concurrency,
+        "elapsed_s": round(result.elapsed, 3),
+        "overall": summarize(result.samples, result.elapsed),
+        "by_tool": {tool: summarize(s, result.elapsed) for tool, s in sorted(by_tool.items())},
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n{'='*78}")
+    print(f"  Shudaizi Load Test — target={report['target']} concurrency={report['concurrency']} "
+          f"({report['elapsed_s']:.1f}s)")
+    print(f"{'='*78}\n")
+    header = f"  {'Tool':<28} {'Reqs':>6} {'RPS':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Err':>6}"
+    print(header)
+    print(f"  {'-'*(len(header)-2)}")
+    rows = list(report["by_tool"].items()) + [("TOTAL", report["overall"])]
+    for tool, s in rows:
+        print(f"  {tool:<28} {s['requests']:>6} {s['throughput_rps']:>8.1f} {s['p50_ms']:>8.2f} "
+              f"{s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['error_rate']:>6.1%}")
+    print()
+
+
+async def run(args) -> dict:
+    root = Path(args.corpus) if args.corpus else PROJECT_ROOT
+    requests = replay_mix(Path(args.replay)) if args.replay else synthetic_mix(args.requests, args.seed, root)
+    if not requests:
+        raise SystemExit("No replayable requests in the mix.")
+
+    http_server = None
+    if args.target == "http":
+        url = args.url
+        if url is None:
+            url, http_server = start_local_http_server(root)
+        target = HttpTarget(url, args.concurrency)
+    else:
+        target = InProcessTarget(root)
+
+    try:
+        if args.warmup:
+            await run_load(target, requests[: args.warmup], min(args.concurrency, args.warmup))
+        samples, elapsed = await run_load(target, requests, args.concurrency, args.duration)
+    finally:
+        await target.close()
+        if http_server is not None:
+            http_server.should_exit = True
+
+    return build_report(LoadResult(args.target, args.concurrency, elapsed, samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a request mix against the MCP server")
+    parser.add_argument("--target", choices=["inproc", "http"], default="inproc")
+    parser.add_argument("--url", default=None, help="Existing /mcp endpoint (http target; default: start one locally)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight requests (default: 8)")
+    parser.add_argument("--requests", type=int, default=2000, help="Synthetic mix size (default: 2000)")
+    parser.add_argument("--duration", type=float, default=None, help="Cycle the mix for this many seconds instead")
+    parser.add_argument("--replay", default=None, help="Access log (JSONL) to replay instead of the synthetic mix")
+    parser.add_argument("--warmup", type=int, default=50, help="Requests to send before measuring (default: 50)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic mix seed (default: 0)")
+    parser.add_argument("--corpus", default=None, help="Serve another project root (e.g. from corpus_generator.py)")
+    parser.add_argument("--json", action="store_true", help="Emit the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,9 @@ Usage:
     python tests/run_qualitative_eval.py --trials 3 --model claude-sonnet-4-20250514
     python tests/run_qualitative_eval.py --fixture qualitative_data_viz --trials 1
     python tests/run_qualitative_eval.py --judge-model claude-sonnet-4-20250514
+    python tests/run_qualitative_eval.py --trials 10 --max-in-flight 16 --tpm 400000
+    python tests/run_qualitative_eval.py --cache replay   # re-judge recorded conversations offline
+    python tests/run_qualitative_eval.py --trials 10 --batch   # conversations and judging via Message Batches
 
 Requires: ANTHROPIC_API_KEY environment variable (or .env file).
 """
@@ -51,6 +54,11 @@ if _env_file.exists():
 sys.path.insert(0, str(PROJECT_ROOT / "mcp_server" / "src"))
 from shudaizi_mcp.book_loader import BookLoader  # noqa: E402
 
+from eval_batch import EvalBatcher, add_batch_args, batch_from_args  # noqa: E402
+from eval_cache import EvalCache, add_cache_args, cache_from_args  # noqa: E402
+from eval_scheduler import EvalScheduler, add_scheduler_args, make_client, scheduler_from_args  # noqa: E402
+from eval_usage import CACHE_CONTROL, TokenUsage, gather_after_first, usage_summary  # noqa: E402
+
 FIXTURES_DIR = Path(__file__).parent / "eval_fixtures"
 
 # ── MCP tool schemas for the Anthropic SDK ───────────────────────
@@ -205,6 +213,7 @@ class TrialResult:
     tool_calls_made: list[str]
     response_text: str
     latency_ms: int
+    usage: TokenUsage = field(default_factory=TokenUsage)  # all conversation turns
 
 
 @dataclass
@@ -286,19 +295,25 @@ async def run_conversation(
     model: str,
     prompt_text: str,
     use_tools: bool,
-) -> tuple[str, list[str], int]:
+    trial: int | None = None,
+) -> tuple[str, list[str], int, TokenUsage]:
     """Run a multi-turn conversation, executing tool calls if needed.
 
-    Returns: (final_response_text, tool_calls_made, latency_ms)
+    Top-level cache_control keeps the cache breakpoint on the latest turn, so
+    each turn reads tools, prompt and earlier tool results from the cache.
+
+    Returns: (final_response_text, tool_calls_made, latency_ms, usage)
     """
     messages = [{"role": "user", "content": prompt_text}]
     tool_calls_made = []
+    usage = TokenUsage()
 
     kwargs = {
         "model": model,
         "max_tokens": 8192,
         "system": SYSTEM_PROMPT,
         "messages": messages,
+        "cache_control": dict(CACHE_CONTROL),
     }
     if use_tools:
         kwargs["tools"] = SDK_TOOLS
@@ -308,14 +323,15 @@ async def run_conversation(
 
     while turns < MAX_TOOL_TURNS:
         turns += 1
-        response = await client.messages.create(**kwargs)
+        response = await client.messages.create(**kwargs, trial=trial)
+        usage += TokenUsage.from_response(response)
 
         if response.stop_reason == "end_turn" or response.stop_reason != "tool_use":
             # Done — collect final text
             text_parts = [b.text for b in response.content if b.type == "text"]
             final_text = "\n".join(text_parts)
             latency_ms = int((time.monotonic() - start) * 1000)
-            return final_text, tool_calls_made, latency_ms
+            return final_text, tool_calls_made, latency_ms, usage
 
         # Handle tool calls
         assistant_content = response.content
@@ -343,7 +359,7 @@ async def run_conversation(
     text_parts = [b.text for b in response.content if b.type == "text"]
     final_text = "\n".join(text_parts)
     latency_ms = int((time.monotonic() - start) * 1000)
-    return final_text, tool_calls_made, latency_ms
+    return final_text, tool_calls_made, latency_ms, usage
 
 
 # ── LLM Judge ────────────────────────────────────────────────────
@@ -391,6 +407,7 @@ async def judge_output(
     task_description: str,
     response_text: str,
     judge_criteria: list[dict],
+    trial: int | None = None,
 ) -> list[CriterionResult]:
     """Use an LLM to evaluate the response against criteria.
 
@@ -408,6 +425,7 @@ async def judge_output(
         max_tokens=2048,
         temperature=0.1,
         messages=[{"role": "user", "content": prompt}],
+        trial=trial,
     )
 
     # Parse JSON from response
@@ -478,8 +496,8 @@ async def run_trial(
     condition = "with_tools" if use_tools else "without_tools"
 
     # Run the conversation
-    response_text, tool_calls_made, latency_ms = await run_conversation(
-        client, model, prompt_text, use_tools
+    response_text, tool_calls_made, latency_ms, usage = await run_conversation(
+        client, model, prompt_text, use_tools, trial=trial_num
     )
 
     # Judge the output
@@ -489,6 +507,7 @@ async def run_trial(
         ground_truth["task_description"],
         response_text,
         ground_truth["judge_criteria"],
+        trial=trial_num,
     )
 
     total_score = sum(cr.score for cr in criteria_results) / len(criteria_results) if criteria_results else 0.0
@@ -502,6 +521,7 @@ async def run_trial(
         tool_calls_made=tool_calls_made,
         response_text=response_text,
         latency_ms=latency_ms,
+        usage=usage,
     )
 
 
@@ -514,9 +534,13 @@ async def run_eval(
     num_trials: int,
     filter_fixture: str | None,
     use_tools: bool,
+    scheduler: EvalScheduler | None = None,
+    cache: EvalCache | None = None,
+    batch: EvalBatcher | None = None,
 ) -> list[FixtureResult]:
     """Run qualitative eval across all fixtures for one condition."""
-    client = anthropic.AsyncAnthropic()
+    inner = batch.wrap() if batch else make_client(scheduler or EvalScheduler())
+    client = (cache or EvalCache(mode="off")).wrap(inner)
     fixtures = discover_fixtures(filter_fixture)
 
     if not fixtures:
@@ -526,12 +550,13 @@ async def run_eval(
     async def run_fixture(fixture_name: str, fixture_dir: Path) -> list[TrialResult]:
         gt, prompt_text = load_fixture(fixture_dir)
 
-        # Run all trials concurrently
+        # Trial 1 writes the prompt cache, then the remaining trials run concurrently.
+        # Batched trials all go into one round instead.
         trial_coros = [
             run_trial(client, model, judge_model, gt, prompt_text, i, use_tools)
             for i in range(1, num_trials + 1)
         ]
-        trials = await asyncio.gather(*trial_coros)
+        trials = await (asyncio.gather(*trial_coros) if batch else gather_after_first(trial_coros))
 
         for trial in trials:
             trial.fixture_name = fixture_name
@@ -660,18 +685,25 @@ async def async_main():
     parser.add_argument("--model", default="claude-sonnet-4-20250514", help="Model for code generation")
     parser.add_argument("--judge-model", default=None, help="Model for judging (defaults to same as --model)")
     parser.add_argument("--fixture", default=None, help="Run only this fixture")
+    add_scheduler_args(parser)
+    add_cache_args(parser)
+    add_batch_args(parser)
     args = parser.parse_args()
+    scheduler = scheduler_from_args(args)
+    cache = cache_from_args(args)
+    batch = batch_from_args(args)
+    options = dict(scheduler=scheduler, cache=cache, batch=batch)
 
     judge_model = args.judge_model or args.model
 
     print(f"\nModel: {args.model} | Judge: {judge_model} | Trials: {args.trials}")
     print(f"Fixtures: {args.fixture or 'all qualitative fixtures'}\n")
 
-    # Run both conditions concurrently
+    # Run both conditions concurrently, sharing one rate limit (or one series of batches)
     print("--- Running both conditions concurrently ---\n")
     with_results, without_results = await asyncio.gather(
-        run_eval(args.model, judge_model, args.trials, args.fixture, use_tools=True),
-        run_eval(args.model, judge_model, args.trials, args.fixture, use_tools=False),
+        run_eval(args.model, judge_model, args.trials, args.fixture, use_tools=True, **options),
+        run_eval(args.model, judge_model, args.trials, args.fixture, use_tools=False, **options),
     )
 
     # Merge results by fixture name
@@ -686,9 +718,19 @@ async def async_main():
 
     # Print results
     print_summary(merged, use_tools=True)
+    print(usage_summary(
+        ((t.usage, t.latency_ms) for r in merged for t in r.with_tools_trials), args.model, bool(batch)
+    ))
     print_summary(merged, use_tools=False)
+    print(usage_summary(
+        ((t.usage, t.latency_ms) for r in merged for t in r.without_tools_trials), args.model, bool(batch)
+    ))
     if merged:
         print_comparison(merged)
+    if batch:
+        await batch.close()
+    print(batch.summary() if batch else scheduler.summary())
+    print(cache.summary())
 
 
 def main():
@@ -0,0 +1,781 @@
+"""Eval harness tests: the machinery around the LLM eval runners, offline.
+
+No API key or network needed — model calls are simulated, in-process or
+against the local fake Messages API (fake_anthropic_server.py).
+
+Run with: pytest tests/test_eval_harness.py -v
+"""
+
+import asyncio
+import csv
+import json
+import random
+import sys
+from pathlib import Path
+
+import anthropic
+import httpx
+import pytest
+
+import eval_scheduler
+import llm_judge
+from eval_grading import KeywordGrader, grader_for
+from eval_batch import BatchRequestError, EvalBatcher
+from eval_cache import CacheMiss, EvalCache, request_key
+from eval_scheduler import EvalScheduler
+from eval_stopping import StoppingRule, run_sequential, wilson_interval
+from eval_store import EvalStore
+from eval_usage import TokenUsage, gather_after_first, usage_summary
+from fake_anthropic_server import FakeAnthropicServer, text_reply, tool_use_reply
+
+
+def api_error(status: int, retry_after: str | None = None) -> anthropic.APIStatusError:
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(status, headers=headers, request=httpx.Request("POST", "http://test/v1/messages"))
+    return anthropic.APIStatusError(f"HTTP {status}", response=response, body=None)
+
+
+# ── Scheduler ─────────────────────────────────────────────────────
+
+
+class TestEvalScheduler:
+    @pytest.mark.asyncio
+    async def test_in_flight_never_exceeds_limit(self):
+        scheduler = EvalScheduler(max_in_flight=3)
+        active = 0
+        peak = 0
+
+        async def fake_call():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return "ok"
+
+        results = await asyncio.gather(*(scheduler.call(fake_call) for _ in range(20)))
+        assert results == ["ok"] * 20
+        assert peak == 3 == scheduler.stats.peak_in_flight
+
+    @pytest.mark.asyncio
+    async def test_throttling_halves_limit_and_loses_no_trials(self):
+        scheduler = EvalScheduler(max_in_flight=8, base_delay=0.001, max_delay=0.01, seed=0)
+        calls = 0
+
+        async def flaky():
+            nonlocal calls
+            calls += 1
+            if calls <= 4:
+                raise api_error(429)
+            await asyncio.sleep(0.001)
+            return calls
+
+        results = await asyncio.gather(*(scheduler.call(flaky) for _ in range(12)))
+        assert len(results) == 12
+        assert scheduler.stats.throttled == 4 and scheduler.stats.retries == 4
+        # One burst of 429s halves the window once (cooldown), then it grows back additively
+        assert 4 <= scheduler.limit < 8
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_error_raises_immediately(self):
+        scheduler = EvalScheduler(base_delay=0.001)
+
+        async def bad_request():
+            raise api_error(400)
+
+        with pytest.raises(anthropic.APIStatusError):
+            await scheduler.call(bad_request)
+        assert scheduler.stats.retries == 0 and scheduler.stats.failed == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        scheduler = EvalScheduler(max_retries=2, base_delay=0.001)
+
+        async def overloaded():
+            raise api_error(529)
+
+        with pytest.raises(anthropic.APIStatusError):
+            await scheduler.call(overloaded)
+        assert scheduler.stats.requests == 3
+
+    def test_backoff_honours_retry_after_and_caps(self):
+        scheduler = EvalScheduler(base_delay=1.0, max_delay=4.0, seed=1)
+        assert all(0 <= scheduler.backoff(n) <= 4.0 for n in range(10))
+        assert scheduler.backoff(0, api_error(429, retry_after="7")) >= 7.0
+
+    @pytest.mark.asyncio
+    async def test_token_budget_paces_requests(self, monkeypatch):
+        clock = [0.0]
+        slept = []
+
+        async def fake_sleep(seconds):
+            slept.append(seconds)
+            clock[0] += seconds
+
+        monkeypatch.setattr(eval_scheduler.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(eval_scheduler.asyncio, "sleep", fake_sleep)
+
+        scheduler = EvalScheduler(tokens_per_minute=600)  # 10 tokens/s, bucket of 600
+
+        async def call():
+            return None
+
+        for _ in range(3):
+            await scheduler.call(call, estimated_tokens=400)
+        # 600 → 200 left; second waits 20s for 400; third waits another 40s
+        assert slept == pytest.approx([20.0, 40.0])
+
+    def test_estimate_counts_prompt_and_max_tokens(self):
+        kwargs = {"max_tokens": 100, "messages": [{"role": "user", "content": "x" * 400}]}
+        assert 200 <= eval_scheduler.estimate_request_tokens(kwargs) <= 220
+
+
+# ── Response cache ────────────────────────────────────────────────
+
+
+def fake_message(text: str) -> anthropic.types.Message:
+    return anthropic.types.Message.model_validate({
+        "id": "msg_test", "type": "message", "role": "assistant", "model": "claude-test",
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn", "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": 5},
+    })
+
+
+class FakeClient:
+    """Counts calls and answers each with a numbered message."""
+
+    def __init__(self):
+        self.calls = 0
+        self.messages = self
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return fake_message(f"answer {self.calls}")
+
+    async def close(self):
+        pass
+
+
+REQUEST = {"model": "claude-test", "max_tokens": 100, "messages": [{"role": "user", "content": "review this"}]}
+
+
+class TestEvalCache:
+    @pytest.mark.asyncio
+    async def test_auto_records_then_replays(self, tmp_path):
+        fake = FakeClient()
+        client = EvalCache(tmp_path, "auto").wrap(fake)
+        first = await client.messages.create(**REQUEST, trial=0)
+        second = await client.messages.create(**REQUEST, trial=0)
+        assert fake.calls == 1
+        assert isinstance(second, anthropic.types.Message)
+        assert second.content[0].text == first.content[0].text == "answer 1"
+        assert client.cache.stats.hits == 1 and client.cache.stats.stored == 1
+
+    @pytest.mark.asyncio
+    async def test_replay_is_offline(self, tmp_path):
+        await EvalCache(tmp_path, "auto").wrap(FakeClient()).messages.create(**REQUEST, trial=0)
+        fake = FakeClient()
+        client = EvalCache(tmp_path, "replay").wrap(fake)
+        assert (await client.messages.create(**REQUEST, trial=0)).content[0].text == "answer 1"
+        with pytest.raises(CacheMiss):
+            await client.messages.create(**REQUEST, trial=1)
+        assert fake.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_record_and_off_always_call(self, tmp_path):
+        fake = FakeClient()
+        recording = EvalCache(tmp_path, "record").wrap(fake)
+        await recording.messages.create(**REQUEST, trial=0)
+        await recording.messages.create(**REQUEST, trial=0)
+        uncached = EvalCache(tmp_path / "off", "off").wrap(fake)
+        await uncached.messages.create(**REQUEST, trial=0)
+        assert fake.calls == 3
+        assert not (tmp_path / "off").exists()
+        replayed = await EvalCache(tmp_path, "replay").wrap(fake).messages.create(**REQUEST, trial=0)
+        assert replayed.content[0].text == "answer 2"  # record overwrote the first entry
+
+    def test_key_covers_trial_prompt_and_sampling(self):
+        base, fields = request_key(REQUEST, trial=0)
+        assert fields["model"] == "claude-test" and fields["trial"] == 0
+        assert request_key(dict(REQUEST), trial=0)[0] == base
+        assert request_key(REQUEST, trial=1)[0] != base
+        assert request_key({**REQUEST, "temperature": 0.1}, trial=0)[0] != base
+        assert request_key({**REQUEST, "max_tokens": 200}, trial=0)[0] != base
+        assert request_key({**REQUEST, "system": "checklist v2"}, trial=0)[0] != base
+
+    def test_key_accepts_sdk_blocks_in_history(self):
+        block = fake_message("earlier turn").content
+        kwargs = {**REQUEST, "messages": [*REQUEST["messages"], {"role": "assistant", "content": block}]}
+        key, _ = request_key(kwargs, trial=0)
+        assert key != request_key(REQUEST, trial=0)[0]
+
+    def test_rejects_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            EvalCache(tmp_path, "sometimes")
+
+
+# ── Fake Messages API ─────────────────────────────────────────────
+
+
+def fake_client(server: FakeAnthropicServer) -> anthropic.AsyncAnthropic:
+    return anthropic.AsyncAnthropic(base_url=server.base_url, api_key="fake", max_retries=0)
+
+
+class TestFakeAnthropicServer:
+    @pytest.mark.asyncio
+    async def test_text_reply_parses_as_message(self):
+        with FakeAnthropicServer(script=[text_reply("Found a SQL injection.")]) as server:
+            client = fake_client(server)
+            response = await client.messages.create(**REQUEST)
+            await client.close()
+        assert response.content[0].text == "Found a SQL injection."
+        assert response.stop_reason == "end_turn"
+        assert response.usage.input_tokens > 0 and response.usage.output_tokens > 0
+        assert server.requests[0]["messages"] == REQUEST["messages"]
+
+    @pytest.mark.asyncio
+    async def test_tool_use_conversation(self):
+        import run_qualitative_eval
+
+        script = [
+            tool_use_reply("get_task_checklist", {"task_type": "code_review", "detail_level": "brief"}),
+            text_reply("Reviewed against the checklist."),
+        ]
+        with FakeAnthropicServer(script=script) as server:
+            client = EvalCache(mode="off").wrap(fake_client(server))  # as the runners build it
+            text, tool_calls, _, usage = await run_qualitative_eval.run_conversation(
+                client, "claude-test", "Review this code", use_tools=True
+            )
+            await client.close()
+        assert text == "Reviewed against the checklist."
+        assert tool_calls == ["get_task_checklist(code_review)"]
+        assert usage.output_tokens > 0
+        tool_result = server.requests[1]["messages"][-1]["content"][0]
+        assert tool_result["type"] == "tool_result" and "[" in tool_result["content"]
+
+    @pytest.mark.asyncio
+    async def test_injected_errors_are_retried_by_scheduler(self):
+        with FakeAnthropicServer(errors=[429, 529, 500], retry_after=0) as server:
+            scheduler = EvalScheduler(max_in_flight=4, base_delay=0.001, max_delay=0.01, seed=0)
+            client = scheduler.wrap(fake_client(server))
+            responses = await asyncio.gather(*(client.messages.create(**REQUEST) for _ in range(6)))
+            await client.close()
+        assert len(responses) == 6
+        assert dict(server.stats.errors) == {429: 1, 529: 1, 500: 1}
+        assert scheduler.stats.retries == 3 and scheduler.stats.failed == 0
+
+    @pytest.mark.asyncio
+    async def test_latency_load_respects_in_flight_bound(self):
+        with FakeAnthropicServer(latency=0.02, jitter=0.01, seed=0) as server:
+            scheduler = EvalScheduler(max_in_flight=5)
+            client = scheduler.wrap(fake_client(server))
+            await asyncio.gather(*(client.messages.create(**REQUEST) for _ in range(25)))
+            await client.close()
+        assert server.stats.requests == 25
+        assert 1 < server.stats.peak_in_flight <= 5
+
+    @pytest.mark.asyncio
+    async def test_replays_recorded_trials(self, tmp_path):
+        recorder = EvalCache(tmp_path, "record").wrap(FakeClient())
+        for trial in range(2):
+            await recorder.messages.create(**REQUEST, trial=trial)
+        with FakeAnthropicServer(recordings=tmp_path, script=[text_reply("unrecorded")]) as server:
+            client = fake_client(server)
+            texts = [(await client.messages.create(**REQUEST)).content[0].text for _ in range(3)]
+            other = await client.messages.create(**{**REQUEST, "max_tokens": 50})
+            await client.close()
+        assert texts == ["answer 1", "answer 2", "answer 1"]
+        assert other.content[0].text == "unrecorded"
+        assert server.stats.replayed == 3
+
+    def test_error_bodies_match_api_shape(self):
+        with FakeAnthropicServer() as server:
+            missing = httpx.post(f"{server.base_url}/v1/messages", json={"model": "claude-test"})
+            unknown = httpx.post(f"{server.base_url}/v1/complete", json={})
+        assert missing.status_code == 400
+        assert missing.json()["error"]["type"] == "invalid_request_error"
+        assert "max_tokens" in missing.json()["error"]["message"]
+        assert unknown.status_code == 404
+
+
+# ── Prompt caching and token accounting ──────────────────────────
+
+
+class TestPromptCaching:
+    def test_usage_reads_cache_fields(self):
+        response = fake_message("x")
+        response.usage.cache_creation_input_tokens = 300
+        response.usage.cache_read_input_tokens = 1200
+        usage = TokenUsage.from_response(response)
+        assert (usage.input_tokens, usage.cache_creation_tokens, usage.cache_read_tokens) == (10, 300, 1200)
+        assert usage.prompt_tokens == 1510
+
+    def test_cost_prices_writes_and_reads(self):
+        usage = TokenUsage(cache_creation_tokens=1_000_000, cache_read_tokens=1_000_000)
+        model = "claude-sonnet-4-20250514"
+        assert usage.cost(model) == pytest.approx(3.0 * 1.25 + 3.0 * 0.1)
+        assert usage.uncached_cost(model) == pytest.approx(6.0)
+        assert usage.cost(model, batch=True) == pytest.approx(usage.cost(model) / 2)
+        assert usage.cost("unknown-model") is None
+
+    def test_summary_reports_savings_and_latency(self):
+        trials = [(TokenUsage(100, 50, 2000, 0), 900)] + [(TokenUsage(100, 50, 0, 2000), 600)] * 4
+        report = usage_summary(trials, "claude-sonnet-4-20250514")
+        assert "4/5 trials read the cache" in report
+        assert "saved" in report and "600ms mean with cache reads vs 900ms without" in report
+
+    @pytest.mark.asyncio
+    async def test_first_trial_completes_before_the_rest_start(self):
+        events = []
+
+        async def trial(n):
+            events.append(f"start {n}")
+            await asyncio.sleep(0)
+            events.append(f"end {n}")
+            return n
+
+        assert await gather_after_first([trial(n) for n in range(3)]) == [0, 1, 2]
+        assert events[:2] == ["start 0", "end 0"]
+
+    @pytest.mark.asyncio
+    async def test_checklist_prefix_is_written_once_then_read(self):
+        import run_llm_eval
+
+        gt = {"task_type": "code_review", "expected_findings": [{"id": "sqli", "keywords": ["issues"]}]}
+        with FakeAnthropicServer(responder=text_reply("No issues found."), min_cacheable_tokens=0) as server:
+            client = EvalCache(mode="off").wrap(fake_client(server))
+            trials = await gather_after_first([
+                run_llm_eval.run_trial(client, "claude-test", f"code {n}", gt, "- [ ] Check input validation", n)
+                for n in range(1, 4)
+            ])
+            await client.close()
+        system = server.requests[0]["system"]
+        assert system[0]["cache_control"] == {"type": "ephemeral"} and "input validation" in system[0]["text"]
+        assert "input validation" not in server.requests[0]["messages"][0]["content"]
+        first, *rest = (t.usage for t in trials)
+        assert first.cache_creation_tokens > 0 and first.cache_read_tokens == 0
+        assert all(u.cache_read_tokens == first.cache_creation_tokens and not u.cache_creation_tokens for u in rest)
+
+    @pytest.mark.asyncio
+    async def test_conversation_turns_read_earlier_turns(self):
+        import run_qualitative_eval
+
+        script = [tool_use_reply("get_task_checklist", {"task_type": "code_review"}), text_reply("Done.")]
+        with FakeAnthropicServer(script=script, min_cacheable_tokens=0) as server:
+            client = EvalCache(mode="off").wrap(fake_client(server))
+            *_, usage = await run_qualitative_eval.run_conversation(client, "claude-test", "Review", use_tools=True)
+            await client.close()
+        assert server.requests[0]["cache_control"] == {"type": "ephemeral"}
+        assert usage.cache_read_tokens > 0  # turn 2 re-reads tools + prompt + turn 1
+
+
+# ── Batch mode ────────────────────────────────────────────────────
+
+
+def echo_reply(request: dict) -> dict:
+    return text_reply(f"echo: {request['messages'][-1]['content']}")(request)
+
+
+def fast_batcher(server: FakeAnthropicServer, **kwargs) -> EvalBatcher:
+    return EvalBatcher(client=fake_client(server), window=0.01, poll_interval=0.01, **kwargs)
+
+
+class TestBatchMode:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_batch(self):
+        with FakeAnthropicServer(responder=echo_reply, batch_delay=0.05) as server:
+            batcher = fast_batcher(server)
+            client = batcher.wrap()
+            prompts = [f"prompt {n}" for n in range(12)]
+            responses = await asyncio.gather(*(
+                client.messages.create(model="claude-test", max_tokens=10, messages=[{"role": "user", "content": p}])
+                for p in prompts
+            ))
+            await batcher.close()
+        assert [r.content[0].text for r in responses] == [f"echo: {p}" for p in prompts]
+        assert server.stats.batches == 1 and batcher.stats.succeeded == 12
+
+    @pytest.mark.asyncio
+    async def test_overloaded_results_are_resubmitted(self):
+        with FakeAnthropicServer(errors=[529, 400]) as server:
+            batcher = fast_batcher(server, max_retries=1)
+            client = batcher.wrap()
+            results = await asyncio.gather(
+                *(client.messages.create(**REQUEST) for _ in range(3)), return_exceptions=True
+            )
+            await batcher.close()
+        failures = [r for r in results if isinstance(r, Exception)]
+        assert len(failures) == 1 and isinstance(failures[0], BatchRequestError)
+        assert "invalid_request_error" in str(failures[0])
+        assert batcher.stats.resubmitted == 1 and server.stats.batches == 2
+
+    @pytest.mark.asyncio
+    async def test_llm_eval_runs_through_batches(self):
+        import run_llm_eval
+
+        fixture = run_llm_eval.discover_fixtures()[0][0]
+        with FakeAnthropicServer() as server:
+            results = await run_llm_eval.run_eval(
+                "claude-test", 3, fixture, use_checklist=True, batch=fast_batcher(server)
+            )
+        assert len(results[0].trials) == 3
+        assert server.stats.batches == 1 and server.stats.requests == 3  # no warm-up round when batching
+
+    @pytest.mark.asyncio
+    async def test_tool_turns_become_later_rounds(self):
+        import run_qualitative_eval
+
+        tool = tool_use_reply("get_task_checklist", {"task_type": "code_review", "detail_level": "brief"})
+        with FakeAnthropicServer(script=[tool, tool, text_reply("done"), text_reply("done")]) as server:
+            client = EvalCache(mode="off").wrap(fast_batcher(server).wrap())
+            outcomes = await asyncio.gather(*(
+                run_qualitative_eval.run_conversation(client, "claude-test", "Review", use_tools=True, trial=n)
+                for n in (1, 2)
+            ))
+        assert [text for text, *_ in outcomes] == ["done", "done"]
+        assert server.stats.batches == 2  # first turns, then tool-result turns
+
+
+# ── LLM judge ─────────────────────────────────────────────────────
+
+
+def judge_reply(request: dict) -> dict:
+    return text_reply(json.dumps({"accuracy": 4, "completeness": 3, "clarity": 5, "reasoning": "ok"}))(request)
+
+
+def write_answers(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["question", "answer", "reference_answer"])
+        writer.writeheader()
+        writer.writerows({"question": q, "answer": a, "reference_answer": r} for q, a, r in rows)
+
+
+class TestLLMJudge:
+    ROWS = [("Q1", "A1", "R1"), ("Q2", "A2", "R2"), ("Q1", "A1", "R1"), ("Q3", "A3", "R3")]
+
+    async def judge(self, server, tmp_path):
+        client = EvalScheduler(max_in_flight=4, base_delay=0.001).wrap(fake_client(server))
+        try:
+            return await llm_judge.judge_csv(
+                tmp_path / "in.csv", tmp_path / "out.csv", tmp_path / "ckpt.jsonl", client, "claude-test"
+            )
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_judges_concurrently_and_dedupes(self, tmp_path):
+        write_answers(tmp_path / "in.csv", self.ROWS)
+        with FakeAnthropicServer(responder=judge_reply, latency=0.02) as server:
+            summary = await self.judge(server, tmp_path)
+        assert server.stats.requests == 3  # the duplicate row is judged once
+        assert server.stats.peak_in_flight > 1
+        assert summary["judged"] == 4 and summary["avg_accuracy"] == 4
+        with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+            out = list(csv.DictReader(f))
+        assert sorted(int(r["row"]) for r in out) == [0, 1, 2, 3]
+        assert {r["clarity"] for r in out} == {"5"}
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, tmp_path):
+        write_answers(tmp_path / "in.csv", self.ROWS)
+        with FakeAnthropicServer(responder=judge_reply, errors=[400]) as server:
+            first = await self.judge(server, tmp_path)
+        assert first["failed"] >= 1
+        with FakeAnthropicServer(responder=judge_reply) as server:
+            second = await self.judge(server, tmp_path)
+        assert server.stats.requests == 1  # only the failed row is re-judged
+        assert second["failed"] == 0 and second["cached"] == 4 - first["failed"]
+
+    def test_key_changes_with_inputs_and_model(self):
+        key = llm_judge.row_key("m", "q", "a", "r")
+        assert key == llm_judge.row_key("m", "q", "a", "r")
+        assert len({key, llm_judge.row_key("m2", "q", "a", "r"), llm_judge.row_key("m", "q", "a2", "r")}) == 3
+
+    def test_torn_or_invalid_checkpoint_lines_are_ignored(self, tmp_path):
+        path = tmp_path / "ckpt.jsonl"
+        scores = {"accuracy": 4, "completeness": 3, "clarity": 5}
+        lines = [
+            json.dumps({"key": "k1", "scores": scores}),
+            json.dumps({"key": "k3", "scores": {"accuracy": 4, "reasoning": "x"}}),
+            json.dumps({"key": "k4", "scores": {**scores, "clarity": 9}}),
+            '{"key": "k2", "sco',
+        ]
+        path.write_text("\n".join(lines), encoding="utf-8")
+        assert list(llm_judge.load_checkpoint(path)) == ["k1"]
+
+    @pytest.mark.asyncio
+    async def test_malformed_reply_fails_its_row_and_is_not_checkpointed(self, tmp_path):
+        write_answers(tmp_path / "in.csv", self.ROWS)
+
+        def reply(request):
+            if "Q2" in request["messages"][0]["content"]:
+                return text_reply(json.dumps({"accuracy": 4, "reasoning": "x"}))(request)
+            return judge_reply(request)
+
+        with FakeAnthropicServer(responder=reply) as server:
+            first = await self.judge(server, tmp_path)
+        assert first["failed"] == 1 and first["judged"] == 3
+        assert len(llm_judge.load_checkpoint(tmp_path / "ckpt.jsonl")) == 2
+        with FakeAnthropicServer(responder=judge_reply) as server:
+            second = await self.judge(server, tmp_path)
+        assert server.stats.requests == 1  # the malformed row is re-judged on resume
+        assert second["failed"] == 0 and second["cached"] == 3
+
+
+# ── Keyword grading ───────────────────────────────────────────────
+
+
+FIXTURES_DIR = Path(__file__).parent / "eval_fixtures"
+
+
+def all_ground_truths() -> list[dict]:
+    gts = [json.loads(p.read_text()) for p in sorted(FIXTURES_DIR.glob("*/ground_truth.json"))]
+    return [gt for gt in gts if gt.get("expected_findings")]
+
+
+class TestKeywordGrader:
+    def test_matches_naive_substring_grading_on_all_fixtures(self):
+        sources = sorted(p for p in FIXTURES_DIR.glob("*/*") if p.is_file() and p.suffix in (".py", ".js", ".md"))
+        corpus = "\n".join(p.read_text() for p in sources)
+        lowered = corpus.lower()
+        for gt in all_ground_truths():
+            grade = KeywordGrader.from_ground_truth(gt).grade(corpus)
+            for finding, graded in zip(gt["expected_findings"], grade.findings):
+                assert graded.matched == [kw for kw in finding["keywords"] if kw.lower() in lowered]
+
+    def test_overlapping_and_prefix_keywords_all_match(self):
+        grader = KeywordGrader([{"id": "f", "keywords": ["unmanaged", "managed", "sql", "sql injection", "inject"]}])
+        grade = grader.grade("An SQL Injection via UNMANAGED deps")
+        assert grade.findings[0].matched == ["unmanaged", "managed", "sql", "sql injection", "inject"]
+
+    def test_hits_report_positions(self):
+        text = "Use parameterized queries. Parameterized!"
+        grade = KeywordGrader([{"id": "f", "keywords": ["parameterized"]}]).grade(text)
+        assert [(h.start, h.end) for h in grade.findings[0].hits] == [(4, 17), (27, 40)]
+        assert all(text.lower()[h.start:h.end] == h.keyword for h in grade.findings[0].hits)
+
+    def test_regex_mode_and_invalid_regex_fallback(self):
+        grader = KeywordGrader([{"id": "f", "keywords": ["mock.*stripe", "c++ (", "in-memory"]}], regex=True)
+        grade = grader.grade("You should Mock the Stripe client. C++ (templates)")
+        assert grade.findings[0].matched == ["mock.*stripe", "c++ ("]
+        assert not KeywordGrader([{"id": "f", "keywords": ["mock.*stripe"]}]).grade("mock the stripe").passed
+
+    def test_false_positive_keywords_fail_the_grade(self):
+        gt = {"expected_findings": [{"id": "f", "keywords": ["race condition"]}],
+              "false_positive_keywords": ["no issues found"]}
+        clean = grader_for(gt).grade("There is a race condition here.")
+        hedged = grader_for(gt).grade("Race condition? No issues found.")
+        assert clean.passed and not clean.false_positives
+        assert hedged.findings_passed and not hedged.passed
+        assert hedged.false_positives == ["no issues found"] and hedged.hits[0].start == 16
+
+    def test_grader_is_compiled_once_per_ground_truth(self):
+        gt = all_ground_truths()[0]
+        assert grader_for(gt) is grader_for(json.loads(json.dumps(gt)))
+        assert grader_for(gt) is not grader_for(gt, regex=True)
+
+
+# ── Results store ─────────────────────────────────────────────────
+
+
+def stored_result(fixture: str, version: str | None, outcomes: list[bool]):
+    from run_llm_eval import FindingResult, FixtureResult, TrialResult
+
+    trials = [
+        TrialResult(fixture, n, [FindingResult("sqli", ok, ["injection"] if ok else [])], ok, "", 100 * n,
+                    TokenUsage(10, 5))
+        for n, ok in enumerate(outcomes, 1)
+    ]
+    result = FixtureResult(fixture, "code_review", trials, checklist_version=version)
+    result.compute_metrics()
+    return result
+
+
+class TestEvalStore:
+    @pytest.mark.asyncio
+    async def test_records_trials_findings_and_checklist_version(self, tmp_path):
+        import run_llm_eval
+
+        fixture = run_llm_eval.discover_fixtures()[0][0]
+        with FakeAnthropicServer() as server:
+            results = await run_llm_eval.run_eval(
+                "claude-test", 2, fixture, use_checklist=True, batch=fast_batcher(server)
+            )
+        with EvalStore(tmp_path / "results.sqlite3") as store:
+            run_id = store.record_run("llm", "claude-test", True, 2, results)
+            [run] = store.runs()
+            [row] = store.trend(fixture=fixture)
+            findings = store.finding_rates(fixture=fixture)
+        assert run["id"] == run_id and run["condition"] == "checklist" and run["fixtures"] == 1
+        assert row["trials"] == 2 and row["input_tokens"] > 0 and row["output_tokens"] > 0
+        assert row["checklist_version"] == run_llm_eval.checklist_version(results[0].task_type) is not None
+        assert {f["finding_id"] for f in findings} == {f.finding_id for f in results[0].trials[0].findings}
+        assert all(f["trials"] == 2 for f in findings)
+
+    def test_versions_and_regressions_answer_from_history(self, tmp_path):
+        with EvalStore(tmp_path / "results.sqlite3") as store:
+            store.record_run("llm", "m", True, 3, [stored_result("sqli", "2", [True] * 3)], "2026-01-01T00:00:00+00:00")
+            store.record_run("llm", "m", False, 3, [stored_result("sqli", None, [False] * 3)], "2026-01-01T00:00:00+00:00")
+            store.record_run("llm", "m", True, 3, [stored_result("sqli", "3", [True, False, False])],
+                             "2026-02-01T00:00:00+00:00")
+            versions = [(r["condition"], r["checklist_version"], r["pass_rate"]) for r in store.versions("code_review")]
+            [regression] = store.regressions(threshold=0.5)
+            assert not store.regressions(threshold=0.7)
+        assert versions == [("baseline", "", 0.0), ("checklist", "2", 1.0), ("checklist", "3", pytest.approx(1 / 3))]
+        assert regression["condition"] == "checklist"
+        assert (regression["previous_version"], regression["current_version"]) == ("2", "3")
+
+    def test_fixture_history_uses_index(self, tmp_path):
+        with EvalStore(tmp_path / "results.sqlite3") as store:
+            plan = " ".join(row["detail"] for row in store.db.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM fixtures WHERE fixture = ? AND model = ? ORDER BY created_at",
+                ("sqli", "m"),
+            ))
+        assert "idx_fixtures_fixture" in plan
+
+
+# ── Incremental runs ──────────────────────────────────────────────
+
+
+class TestIncrementalEval:
+    @pytest.mark.asyncio
+    async def test_unchanged_fixtures_are_reused_from_the_store(self, tmp_path, monkeypatch):
+        import run_llm_eval
+
+        fixture = run_llm_eval.discover_fixtures()[0][0]
+        with FakeAnthropicServer() as server, EvalStore(tmp_path / "results.sqlite3") as store:
+            async def sweep(trials=2):
+                results = await run_llm_eval.run_eval(
+                    "claude-test", trials, fixture, use_checklist=True,
+                    batch=fast_batcher(server), store=store, incremental=True,
+                )
+                store.record_run("llm", "claude-test", True, trials, results)
+                return results[0]
+
+            first = await sweep()
+            again = await sweep()
+            assert server.stats.requests == 2
+            assert again.reused_run == 1 and again.fingerprint == first.fingerprint
+            assert [f.finding_id for f in again.trials[0].findings] == [f.finding_id for f in first.trials[0].findings]
+            assert again.trials[0].usage == first.trials[0].usage
+
+            assert (await sweep(trials=3)).reused_run is None  # stored run had fewer trials
+            monkeypatch.setattr(run_llm_eval, "get_checklist", lambda *args: "- [ ] A changed checklist item")
+            changed = await sweep(trials=3)
+            assert changed.reused_run is None and changed.fingerprint != first.fingerprint
+            assert server.stats.requests == 2 + 3 + 3
+            assert len(store.runs()) == 4 and len(store.trend(fixture=fixture)) == 3  # reused rows not re-stored
+
+    def test_adaptive_result_that_stopped_early_is_not_reused_by_a_longer_run(self, tmp_path):
+        stopped = stored_result("sqli", "2", [True] * 4)
+        stopped.fingerprint, stopped.stop_reason = "f" * 64, "decided"
+        with EvalStore(tmp_path / "results.sqlite3") as store:
+            store.record_run("llm", "m", True, 20, [stopped])  # adaptive runs record --trials, the maximum
+            assert store.find_fixture("f" * 64, "m", 20) is None
+            reused = store.find_fixture("f" * 64, "m", 4)
+        assert reused is not None and len(reused["trials"]) == 4
+
+    def test_fingerprint_covers_checklist_code_and_ground_truth(self):
+        import run_llm_eval
+
+        gt = {"task_type": "code_review", "expected_findings": [{"id": "a", "keywords": ["x"]}]}
+        base = run_llm_eval.fixture_fingerprint("code", gt, "", "checklist")
+        assert run_llm_eval.fixture_fingerprint("code", dict(gt), "", "checklist") == base
+        assert run_llm_eval.fixture_fingerprint("code", gt, "", None) != base
+        assert run_llm_eval.fixture_fingerprint("code 2", gt, "", "checklist") != base
+        assert run_llm_eval.fixture_fingerprint("code", {**gt, "expected_findings": []}, "", "checklist") != base
+
+    def test_fingerprint_covers_grader_and_request_settings(self, monkeypatch):
+        import run_llm_eval
+
+        gt = {"task_type": "code_review", "expected_findings": [{"id": "a", "keywords": ["x"]}]}
+        base = run_llm_eval.fixture_fingerprint("code", gt, "", "checklist")
+        monkeypatch.setattr(run_llm_eval, "GRADER_SOURCE_SHA256", "0" * 64)
+        graded_differently = run_llm_eval.fixture_fingerprint("code", gt, "", "checklist")
+        monkeypatch.setattr(run_llm_eval, "REQUEST_SETTINGS", {"max_tokens": 4096})
+        assert len({base, graded_differently, run_llm_eval.fixture_fingerprint("code", gt, "", "checklist")}) == 3
+
+    def test_stores_from_before_fingerprints_are_migrated(self, tmp_path):
+        import sqlite3
+
+        path = tmp_path / "old.sqlite3"
+        old = sqlite3.connect(path)
+        old.execute("CREATE TABLE fixtures (id INTEGER PRIMARY KEY, run_id INTEGER, fixture TEXT, model TEXT, "
+                    "created_at TEXT, task_type TEXT, checklist_version TEXT, trials INTEGER)")
+        old.commit()
+        old.close()
+        with EvalStore(path) as store:
+            columns = {row["name"] for row in store.db.execute("PRAGMA table_info(fixtures)")}
+        assert "fingerprint" in columns
+
+
+# ── Adaptive trials ───────────────────────────────────────────────
+
+
+class TestSequentialStopping:
+    def test_wilson_interval(self):
+        assert wilson_interval(0, 0) == (0.0, 1.0)
+        low, high = wilson_interval(0, 10)
+        assert low == pytest.approx(0.0) and high == pytest.approx(0.2775, abs=1e-4)
+        low, high = wilson_interval(5, 10)
+        assert (low, high) == (pytest.approx(0.2366, abs=1e-4), pytest.approx(0.7634, abs=1e-4))
+
+    def test_unanimous_fixtures_stop_early(self):
+        rule = StoppingRule(max_trials=10)
+        assert rule.decision(7, 7) is None  # one of 7 looks may not spend the whole error budget
+        assert rule.decision(8, 8) == rule.decision(0, 8) == "decided"
+        assert rule.decision(1, 2) is None  # below min_trials
+        assert StoppingRule(max_trials=20).decision(9, 9) == "precise"
+        assert StoppingRule(max_trials=3).decision(2, 3) == "max"
+        assert StoppingRule(max_trials=500, ci_width=0.2).decision(50, 100) == "precise"
+
+    @pytest.mark.asyncio
+    async def test_runs_until_the_rule_stops(self):
+        started = []
+
+        async def trial(n):
+            started.append(n)
+            return n % 2 == 0  # mixed outcomes never settle before the cap
+
+        results, reason = await run_sequential(trial, bool, StoppingRule(max_trials=7))
+        assert (len(results), reason) == (7, "max") and started == list(range(1, 8))
+        results, reason = await run_sequential(lambda n: asyncio.sleep(0, True), bool, StoppingRule(max_trials=10))
+        assert (len(results), reason) == (8, "decided")
+
+    @pytest.mark.parametrize("max_trials", [10, 20, 50])
+    def test_repeated_looks_keep_the_decision_error_rate(self, max_trials):
+        # A fixture exactly at decide_at: every "decided" is on the wrong side
+        rng = random.Random(max_trials)
+        rule = StoppingRule(max_trials=max_trials)
+        wrong = 0
+        for _ in range(2000):
+            successes = n = 0
+            while (reason := rule.decision(successes, n)) is None:
+                successes += rng.random() < rule.decide_at
+                n += 1
+            wrong += reason == "decided"
+        assert wrong / 2000 <= 1 - rule.confidence
+
+    def test_adaptive_needs_trials_above_min_trials(self, monkeypatch):
+        import run_llm_eval
+
+        monkeypatch.setattr(sys, "argv", ["run_llm_eval.py", "--adaptive"])  # --trials and --min-trials both 3
+        with pytest.raises(SystemExit) as exc:
+            asyncio.run(run_llm_eval.async_main())
+        assert exc.value.code == 2
+
+    @pytest.mark.asyncio
+    async def test_llm_eval_stops_settled_fixtures_early(self):
+        import run_llm_eval
+
+        fixture = run_llm_eval.discover_fixtures()[0][0]
+        with FakeAnthropicServer() as server:  # generic replies miss every finding
+            [result] = await run_llm_eval.run_eval(
+                "claude-test", 10, fixture, use_checklist=True,
+                batch=fast_batcher(server), stopping=StoppingRule(max_trials=10),
+            )
+        assert [t.trial_num for t in result.trials] == list(range(1, 9)) and server.stats.requests == 8
+        assert result.stop_reason == "decided" and result.pass_rate_ci[1] < 0.5
+        assert result.pass_at_k == result.pass_pow_k == 0.0
+
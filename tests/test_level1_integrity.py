@@ -180,6 +180,90 @@ class TestBookLoader:
         same = book_loader.filter_by_focus(full, "")
         assert full == same
 
+    def test_merged_checklist_deduplicates_across_tasks(self, book_loader):
+        merged = book_loader.read_merged_checklist(["architecture_review", "devops"], "brief")
+        separate = sum(
+            book_loader.read_checklist(t, "brief").count("- [ ]")
+            for t in ("architecture_review", "devops")
+        )
+        assert merged.count("- [ ]") < separate
+        assert "(also in devops)" in merged
+        # The shared retry item appears once, not twice
+        assert merged.count("exponential backoff with jitter and a maximum retry count") == 1
+
+    def test_merged_checklist_honors_token_budget(self, book_loader):
+        merged = book_loader.read_merged_checklist(
+            ["code_review", "security_audit", "observability"], "standard", max_tokens=2000
+        )
+        assert len(merged) // 4 <= 2000
+        assert "items omitted to fit the budget" in merged
+        # Round-robin admission: every task contributes content
+        for title in ("# Code Review", "# Security Audit", "# Observability"):
+            assert title in merged
+
+    def test_merged_checklist_budget_below_header_keeps_items_per_task(self, book_loader):
+        for max_tokens in (1, 50):
+            merged = book_loader.read_merged_checklist(
+                ["code_review", "security_audit", "observability"], "standard", max_tokens=max_tokens
+            )
+            tasks = merged.split("\n# ")[1:]
+            assert len(tasks) == 3
+            assert all("- [ ]" in task for task in tasks)
+
+    def test_merged_checklist_reports_missing(self, book_loader):
+        merged = book_loader.read_merged_checklist(["code_review", "NONEXISTENT_TASK"])
+        assert "Not found: NONEXISTENT_TASK" in merged
+
+    def test_book_pages_reassemble_full_text(self, book_loader):
+        full = book_loader.read_book_section("01", "full")
+        cursor, bodies = "", []
+        while True:
+            page = book_loader.read_book_page("01", "full", cursor, page_tokens=1000)
+            body, _, footer = page.rpartition("\n\n---\n")
+            assert len(body) // 4 <= 1000
+            bodies.append(body)
+            if "last page" in footer:
+                break
+            cursor = re.search(r'next_cursor: "(\d+)"', footer).group(1)
+        assert len(bodies) > 1
+        # Pages are contiguous slices, so nothing is lost between them
+        assert "\n".join(bodies).split() == full.split()
+        # Most pages start on a section heading rather than mid-section
+        assert sum(b.lstrip().startswith("#") for b in bodies) >= len(bodies) // 2
+
+    def test_generated_corpus_past_two_digit_ids(self, tmp_path):
+        from corpus_generator import generate_corpus
+        from shudaizi_mcp.book_loader import BookLoader
+        from shudaizi_mcp.routing import TaskRouter
+
+        generate_corpus(tmp_path, books=105, articles=3, tasks=2, paragraphs=1)
+        loader = BookLoader(tmp_path)
+        router = TaskRouter(tmp_path / "knowledge")
+        ids = [b["id"] for b in loader.list_books()]
+        assert len(ids) == 105 and ids[-1] == "105"
+        assert "not found" not in loader.read_book_section("105", "patterns")
+        for task_type in router.list_task_types():
+            assert "- [ ]" in loader.read_checklist(task_type, "brief")
+
+    def test_book_page_cursor_inside_a_page_snaps_to_its_start(self, book_loader):
+        first = book_loader.read_book_page("01", "full", "", page_tokens=1000)
+        second_start = int(re.search(r'next_cursor: "(\d+)"', first).group(1))
+        second = book_loader.read_book_page("01", "full", str(second_start), page_tokens=1000)
+        assert book_loader.read_book_page("01", "full", "1", page_tokens=1000) == first
+        assert book_loader.read_book_page("01", "full", str(second_start + 7), page_tokens=1000) == second
+        assert "[page 2 of" in second and f"chars {second_start}-" in second
+
+    def test_book_page_missing_section(self, book_loader):
+        assert book_loader.read_book_page("01", "no_such_section") == book_loader.read_book_section(
+            "01", "no_such_section"
+        )
+        assert "[page" not in book_loader.read_book_page("01", "no_such_section")
+
+    def test_book_page_invalid_cursor(self, book_loader):
+        assert "Invalid cursor" in book_loader.read_book_page("01", "full", "abc")
+        assert "past the end" in book_loader.read_book_page("01", "full", "999999999")
+        assert "not found" in book_loader.read_book_page("99", "full").lower()
+
 
 # ── TaskRouter ────────────────────────────────────────────────────
 
@@ -218,6 +302,27 @@ class TestTaskRouter:
         assert len(task_router.format_article_list()) > 100
         assert len(task_router.format_task_list()) > 100
 
+    @pytest.mark.parametrize("intent,expected", [
+        ("review this pull request for readability and naming", "code_review"),
+        ("audit the login flow for SQL injection and XSS", "security_audit"),
+        ("set up SLOs and alerting for our service", "observability"),
+        ("design a REST API with pagination", "api_design"),
+        ("our tests are flaky, how should we mock the database", "test_strategy"),
+        ("refactor this god class", "refactoring"),
+    ])
+    def test_route_task_top_match(self, task_router, intent, expected):
+        routes = task_router.route_task(intent)
+        assert routes, f"no route for {intent!r}"
+        assert routes[0]["task_type"] == expected, routes
+
+    def test_route_task_confidence_normalized(self, task_router):
+        routes = task_router.route_task("review architecture for scalability", top_k=16)
+        assert abs(sum(r["confidence"] for r in routes) - 1.0) < 0.01
+        assert routes == sorted(routes, key=lambda r: -r["score"])
+
+    def test_route_task_no_match(self, task_router):
+        assert task_router.route_task("the and of") == []
+
 
 # ── KnowledgeManager (write ops on temp copy) ────────────────────
 
@@ -316,6 +421,158 @@ class TestKnowledgeManager:
             assert int(v_after.group(1)) == int(v_before.group(1)) + 1
 
 
+    def test_update_checklist_flags_near_duplicate(self, knowledge_manager):
+        result = knowledge_manager.update_checklist(
+            task_type="code_review",
+            action="add_items",
+            section="Phase 1",
+            content="- [ ] Every name should reveal intent -- `elapsedTimeInDays` over `d` [15]",
+        )
+        assert "error" not in result
+        assert len(result["duplicates"]) == 1
+        assert "near-duplicates" in result["message"]
+
+    def test_update_checklist_rejects_near_duplicate(self, knowledge_manager):
+        checklist_path = knowledge_manager.checklists_dir / "code_review.md"
+        before = checklist_path.read_text()
+        result = knowledge_manager.update_checklist(
+            task_type="code_review",
+            action="add_items",
+            section="Phase 1",
+            content="- [ ] Every name should reveal intent -- `elapsedTimeInDays` over `d` [15]",
+            on_duplicate="reject",
+        )
+        assert "error" in result
+        assert checklist_path.read_text() == before
+
+    def test_add_source_rejects_copy_of_existing(self, knowledge_manager):
+        existing = (knowledge_manager.book_research_dir / "17_release_it.md").read_text()
+        result = knowledge_manager.add_knowledge_source(
+            title="Release It Again",
+            source_type="book",
+            content=existing,
+            category="Testing",
+            task_types=[],
+            on_duplicate="reject",
+        )
+        assert "error" in result
+        assert result["overlaps"][0]["file"] == "book_research/17_release_it.md"
+
+    def test_unknown_on_duplicate_is_an_error(self, knowledge_manager):
+        checklist_path = knowledge_manager.checklists_dir / "code_review.md"
+        before = checklist_path.read_text()
+        result = knowledge_manager.update_checklist(
+            task_type="code_review",
+            action="add_items",
+            section="Phase 1",
+            content="- [ ] A brand new item",
+            on_duplicate="rejct",
+        )
+        assert "rejct" in result["error"] and checklist_path.read_text() == before
+        result = knowledge_manager.add_knowledge_source(
+            title="Typo Book", source_type="book", content="# Typo", category="Testing",
+            task_types=[], on_duplicate="rejct",
+        )
+        assert "rejct" in result["error"]
+        assert not list(knowledge_manager.book_research_dir.glob("*typo_book*"))
+
+    def test_source_added_during_index_build_is_indexed(self, knowledge_manager, monkeypatch):
+        from shudaizi_mcp import knowledge_manager as km
+
+        content = "# Lunar Gardening\n\n" + "Quantum gardening requires patient photon cultivation under lunar irrigation schedules. " * 3
+        listed = km.source_files
+
+        def list_then_write(directory):
+            files = listed(directory)  # listed before the new source exists
+            if directory == knowledge_manager.book_research_dir:
+                knowledge_manager.add_knowledge_source(
+                    title="Lunar Gardening", source_type="book", content=content, category="Testing",
+                    task_types=[], on_duplicate="allow",
+                )
+            return files
+
+        monkeypatch.setattr(km, "source_files", list_then_write)
+        knowledge_manager.build_paragraph_index()
+        overlaps = knowledge_manager.find_source_overlaps(content)
+        assert overlaps[0]["file"].endswith("lunar_gardening.md")
+        assert not knowledge_manager._unindexed
+
+    def test_add_source_without_overlap_reports_none(self, knowledge_manager):
+        result = knowledge_manager.add_knowledge_source(
+            title="Unrelated Book",
+            source_type="book",
+            content="# Unrelated\n\n## Key Ideas\nQuantum gardening requires patient photon cultivation under lunar irrigation schedules.",
+            category="Testing",
+            task_types=[],
+        )
+        assert result["overlaps"] == []
+
+
+    def test_write_emits_change_events(self, knowledge_manager):
+        events = []
+        knowledge_manager.subscribe(events.append)
+        knowledge_manager.update_checklist(
+            task_type="code_review",
+            action="add_items",
+            section="Security",
+            content="- [ ] Event test item [01]",
+        )
+        assert [(e.kind, e.path.name, e.sections) for e in events] == [
+            ("modified", "code_review.md", ("Security",)),
+        ]
+
+    def test_change_events_update_loader_caches(self, knowledge_manager):
+        from shudaizi_mcp.book_loader import BookLoader
+
+        loader = BookLoader(knowledge_manager.project_root)
+        knowledge_manager.subscribe(loader.apply_change)
+        loader.read_checklist("code_review", "brief")
+        index = loader.checklist_item_index
+        size_before = len(index)
+
+        knowledge_manager.update_checklist(
+            task_type="code_review",
+            action="add_items",
+            section="Security",
+            content="- [ ] Quarantine zygomorphic payloads before parsing [07]",
+        )
+        assert "zygomorphic" in loader.read_checklist("code_review", "brief")
+        assert loader.checklist_item_index is index  # updated in place, not rebuilt
+        assert len(index) == size_before + 1
+        assert index.query("Quarantine zygomorphic payloads before parsing")
+
+    def test_change_events_update_route_index(self, knowledge_manager):
+        from shudaizi_mcp.routing import TaskRouter
+
+        router = TaskRouter(knowledge_manager.knowledge_dir)
+        knowledge_manager.subscribe(router.apply_change)
+        assert router.route_task("zygomorphic widgets") == []
+
+        knowledge_manager.update_checklist(
+            task_type="code_review",
+            action="add_items",
+            section="Zygomorphic Widgets",
+            content="- [ ] Widgets are zygomorphic [06]",
+        )
+        assert router.route_task("zygomorphic widgets")[0]["task_type"] == "code_review"
+
+    def test_new_source_visible_to_router_after_write(self, knowledge_manager):
+        from shudaizi_mcp.routing import TaskRouter
+
+        router = TaskRouter(knowledge_manager.knowledge_dir)
+        knowledge_manager.subscribe(router.apply_change)
+        assert router.get_book_info("42") is None
+        result = knowledge_manager.add_knowledge_source(
+            title="Event Book",
+            source_type="book",
+            content="# Event Book\n\n## Key Ideas\nContent.",
+            category="Testing",
+            task_types=["code_review"],
+        )
+        assert router.get_book_info(result["id"])["title"] == "Event Book"
+        assert result["id"] in router.get_task_info("code_review")["secondary_sources"]
+
+
 # ── Content quality checks ────────────────────────────────────────
 
 
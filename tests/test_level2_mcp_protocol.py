@@ -7,6 +7,9 @@ Run with: pytest tests/test_level2_mcp_protocol.py -v
 
 import asyncio
 import json
+import os
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
@@ -17,7 +20,8 @@ from mcp.types import (
     TextContent,
 )
 
-from shudaizi_mcp.server import create_server
+from shudaizi_mcp import metrics
+from shudaizi_mcp.server import create_http_app, create_server
 
 
 @pytest.fixture
@@ -49,9 +53,9 @@ class TestToolListing:
     """The server exposes the correct tools with valid schemas."""
 
     @pytest.mark.asyncio
-    async def test_lists_five_tools(self, mcp_server):
+    async def test_lists_six_tools(self, mcp_server):
         tools = await list_tools(mcp_server)
-        assert len(tools) == 5
+        assert len(tools) == 6
 
     @pytest.mark.asyncio
     async def test_tool_names(self, mcp_server):
@@ -61,6 +65,7 @@ class TestToolListing:
             "get_task_checklist",
             "get_book_knowledge",
             "list_available_knowledge",
+            "get_usage_report",
             "add_knowledge_source",
             "update_checklist",
         }
@@ -83,6 +88,7 @@ class TestToolListing:
         tool = next(t for t in tools if t.name == "get_task_checklist")
         props = tool.inputSchema["properties"]
         assert "task_type" in props
+        assert "intent" in props
         assert "focus" in props
         assert "detail_level" in props
         assert tool.inputSchema["required"] == ["task_type"]
@@ -155,6 +161,46 @@ class TestReadToolCalls:
         )
         assert "not found" in result.content[0].text.lower()
 
+    @pytest.mark.asyncio
+    async def test_get_task_checklist_auto_routes(self, mcp_server):
+        result = await call_tool(
+            mcp_server,
+            "get_task_checklist",
+            {"task_type": "auto", "intent": "check this endpoint for SQL injection"},
+        )
+        text = result.content[0].text
+        assert "Auto-routed to `security_audit`" in text
+        assert "# Security" in text
+
+    @pytest.mark.asyncio
+    async def test_get_task_checklist_auto_requires_intent(self, mcp_server):
+        result = await call_tool(
+            mcp_server, "get_task_checklist", {"task_type": "auto"}
+        )
+        assert "requires an `intent`" in result.content[0].text
+
+    @pytest.mark.asyncio
+    async def test_get_task_checklist_merges_multiple_tasks(self, mcp_server):
+        result = await call_tool(
+            mcp_server,
+            "get_task_checklist",
+            {"task_type": "code_review,security_audit", "detail_level": "brief", "max_tokens": 3000},
+        )
+        text = result.content[0].text
+        assert text.startswith("# Merged Checklist: code_review + security_audit")
+        assert len(text) // 4 <= 3000
+
+    @pytest.mark.asyncio
+    async def test_get_task_checklist_rejects_bad_max_tokens(self, mcp_server):
+        for task_type in ("code_review,security_audit", "code_review"):
+            for max_tokens in (0, -5):
+                result = await call_tool(
+                    mcp_server, "get_task_checklist", {"task_type": task_type, "max_tokens": max_tokens}
+                )
+                text = result.content[0].text
+                # The schema's minimum refuses these before the tool runs when the SDK validates input
+                assert text == "Error: max_tokens must be a positive integer." or "minimum of 1" in text
+
     @pytest.mark.asyncio
     async def test_get_book_knowledge_returns_section(self, mcp_server):
         result = await call_tool(
@@ -178,6 +224,32 @@ class TestReadToolCalls:
         )
         assert len(result.content[0].text) > 10
 
+    @pytest.mark.asyncio
+    async def test_get_book_knowledge_paged(self, mcp_server):
+        first = await call_tool(
+            mcp_server, "get_book_knowledge", {"book_id": "01", "section": "full", "page_tokens": 1000}
+        )
+        text = first.content[0].text
+        assert "[page 1 of" in text
+        cursor = text.split('next_cursor: "')[1].split('"')[0]
+        second = await call_tool(
+            mcp_server, "get_book_knowledge", {"book_id": "01", "section": "full", "page_tokens": 1000, "cursor": cursor}
+        )
+        assert "[page 2 of" in second.content[0].text
+
+    @pytest.mark.asyncio
+    async def test_get_book_knowledge_rejects_bad_page_tokens(self, mcp_server):
+        for page_tokens in (0, -5):
+            result = await call_tool(
+                mcp_server, "get_book_knowledge", {"book_id": "01", "section": "full", "page_tokens": page_tokens}
+            )
+            assert result.content[0].text == "Error: page_tokens must be a positive integer."
+        for page_tokens in (None, "lots"):  # refused whether or not the transport validates the schema
+            result = await call_tool(
+                mcp_server, "get_book_knowledge", {"book_id": "01", "section": "full", "page_tokens": page_tokens}
+            )
+            assert "[page" not in result.content[0].text
+
     @pytest.mark.asyncio
     async def test_get_book_knowledge_invalid_id(self, mcp_server):
         result = await call_tool(
@@ -258,6 +330,37 @@ class TestToolDispatch:
             text = result.content[0].text
             assert len(text) > 10, f"Article {aid} returned too little content"
 
+    @pytest.mark.asyncio
+    async def test_duplicate_index_is_built_off_the_event_loop(self, knowledge_manager, monkeypatch):
+        import threading
+
+        from shudaizi_mcp.knowledge_manager import KnowledgeManager
+
+        threads = []
+        build = KnowledgeManager.build_paragraph_index
+
+        def recording_build(self):
+            threads.append(threading.get_ident())
+            build(self)
+
+        monkeypatch.setattr(KnowledgeManager, "build_paragraph_index", recording_build)
+        server = create_server(knowledge_manager.project_root)
+        result = await call_tool(server, "add_knowledge_source", {
+            "title": "Lunar Gardening", "source_type": "book", "category": "Testing", "task_types": [],
+            "content": "# Lunar Gardening\n\nQuantum gardening requires patient photon cultivation under lunar irrigation.",
+        })
+        assert result.content[0].text.startswith("Added 'Lunar Gardening'")
+        assert threads and threading.get_ident() not in threads
+
+    @pytest.mark.asyncio
+    async def test_unknown_on_duplicate_is_rejected(self, knowledge_manager):
+        server = create_server(knowledge_manager.project_root)
+        result = await call_tool(server, "update_checklist", {
+            "task_type": "code_review", "action": "add_items", "section": "Phase 1",
+            "content": "- [ ] A brand new item", "on_duplicate": "rejct",
+        })
+        assert "'rejct'" in result.content[0].text and "Updated" not in result.content[0].text
+
     @pytest.mark.asyncio
     async def test_response_is_not_error(self, mcp_server):
         """Successful tool calls should not have isError set."""
@@ -265,3 +368,352 @@ class TestToolDispatch:
             mcp_server, "get_task_checklist", {"task_type": "code_review"}
         )
         assert not result.isError
+
+
+# ── Metrics ───────────────────────────────────────────────────────
+
+
+class TestMetrics:
+    @pytest.mark.asyncio
+    async def test_tool_calls_are_counted_by_label(self, mcp_server):
+        labels = {"tool": "get_book_knowledge", "task_type": "", "detail_level": "", "section": "pitfalls"}
+        before = metrics.TOOL_CALLS.value(**labels)
+        await call_tool(mcp_server, "get_book_knowledge", {"book_id": "01", "section": "pitfalls"})
+        assert metrics.TOOL_CALLS.value(**labels) == before + 1
+        assert metrics.TOOL_LATENCY.count(**labels) >= 1
+        assert metrics.TOOL_RESPONSE_BYTES.count(**labels) >= 1
+
+    @pytest.mark.asyncio
+    async def test_error_responses_are_counted(self, mcp_server):
+        labels = {"tool": "get_task_checklist", "task_type": "unknown", "detail_level": "standard", "section": ""}
+        before = metrics.TOOL_ERRORS.value(**labels)
+        await call_tool(mcp_server, "get_task_checklist", {"task_type": "NONEXISTENT_TASK"})
+        assert metrics.TOOL_ERRORS.value(**labels) == before + 1
+
+    def test_detail_level_label_is_bounded(self):
+        from shudaizi_mcp.tools import _metric_labels
+
+        def label(arguments):
+            return _metric_labels("get_task_checklist", {"task_type": "code_review", **arguments}, ["code_review"])
+
+        assert label({"detail_level": "brief"})["detail_level"] == "brief"
+        assert label({})["detail_level"] == "standard"
+        assert label({"detail_level": "verbose-please-7"})["detail_level"] == "unknown"
+        assert _metric_labels("get_book_knowledge", {"detail_level": "brief"}, [])["detail_level"] == ""
+
+    def test_metrics_route_serves_prometheus_text(self):
+        from starlette.testclient import TestClient
+
+        with TestClient(create_http_app()) as client:
+            response = client.get("/metrics")
+        assert response.status_code == 200
+        assert "# TYPE shudaizi_tool_latency_seconds histogram" in response.text
+
+    def test_stats_file_written_atomically(self, tmp_path):
+        registry = metrics.Registry()
+        registry.counter("demo_total", "Demo.", ("tool",)).inc(tool="x")
+        registry.write_textfile(tmp_path / "stats.prom")
+        assert 'demo_total{tool="x"} 1' in (tmp_path / "stats.prom").read_text()
+        assert not (tmp_path / "stats.prom.tmp").exists()
+
+
+# ── Access log ────────────────────────────────────────────────────
+
+
+class TestAccessLog:
+    @pytest.fixture
+    def logged_server(self, knowledge_manager, tmp_path):
+        from mcp.server import Server
+        from shudaizi_mcp.access_log import AccessLog
+        from shudaizi_mcp.tools import register_tools
+
+        log = AccessLog(tmp_path / "access.jsonl")
+        server = Server("shudaizi-mcp-test")
+        register_tools(server, knowledge_manager.project_root, access_log=log)
+        return server, log
+
+    @staticmethod
+    def read_entries(log):
+        log.close()
+        return [json.loads(line) for line in log.path.read_text().splitlines()]
+
+    @pytest.mark.asyncio
+    async def test_records_calls_with_cache_flag(self, logged_server):
+        server, log = logged_server
+        for _ in range(2):
+            await call_tool(server, "get_task_checklist", {"task_type": "code_review", "detail_level": "brief"})
+        await call_tool(server, "list_available_knowledge", {"category": "tasks"})
+        first, second, listing = self.read_entries(log)
+        assert first["tool"] == "get_task_checklist"
+        assert first["arguments"] == {"task_type": "code_review", "detail_level": "brief"}
+        assert first["cache_hit"] is False and second["cache_hit"] is True
+        assert listing["cache_hit"] is None
+        assert first["response_bytes"] > 0 and first["latency_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_write_tool_content_is_hashed(self, logged_server):
+        server, log = logged_server
+        content = "- [ ] Verify webhook signatures before parsing payloads [a05]"
+        await call_tool(server, "update_checklist", {
+            "task_type": "security_audit",
+            "action": "add_items",
+            "section": "Webhooks",
+            "content": content,
+        })
+        (entry,) = self.read_entries(log)
+        assert entry["arguments"]["content"]["chars"] == len(content)
+        assert content not in json.dumps(entry)
+
+    def test_sampling_drops_calls(self, tmp_path):
+        from shudaizi_mcp.access_log import AccessLog
+
+        log = AccessLog(tmp_path / "access.jsonl", sample_rate=0.0)
+        log.record("get_book_knowledge", {"book_id": "01"}, 1.0, 10, True, False)
+        log.close()
+        assert log.path.read_text() == ""
+
+
+# ── Usage analytics ───────────────────────────────────────────────
+
+
+class TestUsageReport:
+    @pytest.mark.asyncio
+    async def test_counts_reads_and_lists_unread_sources(self, mcp_server):
+        await call_tool(mcp_server, "get_book_knowledge", {"book_id": "01", "section": "key_ideas"})
+        await call_tool(mcp_server, "get_book_knowledge", {"book_id": "01", "section": "key_ideas"})
+        await call_tool(mcp_server, "get_book_knowledge", {"book_id": "99"})
+        await call_tool(mcp_server, "get_task_checklist", {"task_type": "code_review", "focus": "Security"})
+        await call_tool(mcp_server, "get_task_checklist", {"task_type": "code_review,security_audit"})
+        result = await call_tool(mcp_server, "get_usage_report", {})
+        report = result.content[0].text
+
+        row = next(line for line in report.splitlines() if line.startswith("| 01 |"))
+        assert row.split(" | ")[2] == "2"
+        assert "| 99 |" not in report
+        unread = next(line for line in report.splitlines() if line.startswith("**Never read") and "a01" in line)
+        assert " 01," not in unread
+        code_review = next(line for line in report.splitlines() if line.startswith("| code_review |"))
+        assert code_review.split(" | ")[1] == "2" and "security (1)" in code_review
+        assert any(line.startswith("| security_audit |") for line in report.splitlines())
+
+    @pytest.mark.asyncio
+    async def test_category_filter(self, mcp_server):
+        result = await call_tool(mcp_server, "get_usage_report", {"category": "checklists"})
+        report = result.content[0].text
+        assert "## Checklists" in report and "## Sources" not in report
+
+    def test_persisted_counts_reload(self, tmp_path):
+        from shudaizi_mcp.usage import UsageTracker
+
+        path = tmp_path / "usage.json"
+        tracker = UsageTracker(path, flush_interval=0)
+        tracker.record_source("01", "patterns", "x" * 400)
+        tracker.record_checklist(["code_review"], "", "brief", "y" * 40)
+        reloaded = UsageTracker(path)
+        assert reloaded.sources[("01", "patterns")] == [1, 100]
+        assert reloaded.checklists[("code_review", "", "brief")] == [1, 10]
+
+
+# ── Tracing ───────────────────────────────────────────────────────
+
+
+class TestTracing:
+    @pytest.fixture
+    def spans_file(self, tmp_path):
+        pytest.importorskip("opentelemetry.sdk")
+        from shudaizi_mcp import tracing
+
+        path = tmp_path / "spans.jsonl"
+        assert tracing.configure(f"file:{path}")
+        yield path
+        tracing.shutdown()
+
+    @staticmethod
+    def read_spans(path):
+        from shudaizi_mcp import tracing
+
+        tracing.flush()
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    @pytest.mark.asyncio
+    async def test_nested_spans_for_book_read(self, mcp_server, spans_file):
+        await call_tool(mcp_server, "get_book_knowledge", {"book_id": "01", "section": "key_ideas"})
+        spans = {s["name"]: s for s in self.read_spans(spans_file)}
+        call, lookup, read, extract = (
+            spans[n] for n in ("tool.call", "cache.lookup", "file.read", "book.extract_section")
+        )
+        assert call["parent_id"] is None
+        assert lookup["parent_id"] == call["span_id"] == extract["parent_id"]
+        assert read["parent_id"] == lookup["span_id"]
+        assert call["attributes"]["tool"] == "get_book_knowledge"
+        assert call["attributes"]["response.bytes"] > 0
+        assert lookup["attributes"]["cache.hit"] is False
+        assert read["attributes"]["file.bytes"] > 0
+
+    @pytest.mark.asyncio
+    async def test_rendition_cache_hit_recorded(self, mcp_server, spans_file):
+        for _ in range(2):
+            await call_tool(mcp_server, "get_task_checklist", {"task_type": "code_review"})
+        renders = [s for s in self.read_spans(spans_file) if s["name"] == "checklist.render"]
+        assert [r["attributes"]["cache.hit"] for r in renders] == [False, True]
+        assert renders[0]["attributes"]["rendition.bytes"] > 0
+
+    def test_disabled_span_is_noop(self):
+        from shudaizi_mcp import tracing
+
+        assert not tracing.enabled()
+        with tracing.span("anything", size=1) as span:
+            span.set_attribute("cache.hit", True)
+
+
+# ── Health and readiness ──────────────────────────────────────────
+
+
+class TestHealth:
+    def test_healthz_and_readyz_after_warm_up(self):
+        import time
+
+        from starlette.testclient import TestClient
+
+        with TestClient(create_http_app()) as client:
+            assert client.get("/healthz").text == "ok\n"
+            deadline = time.monotonic() + 30
+            while (response := client.get("/readyz")).status_code != 200 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        assert response.status_code == 200, response.json()
+        body = response.json()
+        assert body["warm"] and body["problems"] == [] and len(body["digest"]) == 16
+
+    def test_probes_use_cached_digest(self, knowledge_manager):
+        from shudaizi_mcp.health import HealthMonitor
+
+        monitor = HealthMonitor(knowledge_manager.project_root)
+        monitor.warm_up()
+        first = monitor.status()
+        for _ in range(50):
+            assert monitor.status() is first
+        assert monitor.scans == 1 and first["status"] == "ready"
+
+    def test_half_written_routing_fails_readiness(self, knowledge_manager):
+        from shudaizi_mcp.health import HealthMonitor
+
+        monitor = HealthMonitor(knowledge_manager.project_root)
+        monitor.warm_up()
+        digest = monitor.status()["digest"]
+        routing = knowledge_manager.routing_path
+        routing.write_text(routing.read_text()[:200])
+        status = monitor.status()
+        assert status["status"] == "not_ready" and status["digest"] != digest
+        assert any(p.startswith("routing.json: unreadable") for p in status["problems"])
+
+    def test_write_event_revalidates_citations(self, knowledge_manager):
+        from shudaizi_mcp.health import HealthMonitor
+
+        monitor = HealthMonitor(knowledge_manager.project_root)
+        monitor.warm_up()
+        knowledge_manager.subscribe(monitor.apply_change)
+        monitor.status()
+        knowledge_manager.update_checklist(
+            task_type="code_review",
+            action="add_items",
+            section="Citations",
+            content="- [ ] Cite a source that does not exist [97]",
+            on_duplicate="allow",
+        )
+        assert "checklist code_review: unknown citation [97]" in monitor.status()["problems"]
+        assert monitor.scans == 2
+
+
+# ── Admin profiler ────────────────────────────────────────────────
+
+
+def _busy_work(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class TestAdminProfile:
+    def test_route_absent_without_token(self, monkeypatch):
+        from starlette.testclient import TestClient
+
+        monkeypatch.delenv("SHUDAIZI_ADMIN_TOKEN", raising=False)
+        with TestClient(create_http_app()) as client:
+            assert client.get("/admin/profile?seconds=0").status_code == 404
+
+    def test_rejects_wrong_token(self, monkeypatch):
+        from starlette.testclient import TestClient
+
+        monkeypatch.setenv("SHUDAIZI_ADMIN_TOKEN", "s3cret")
+        with TestClient(create_http_app()) as client:
+            response = client.get("/admin/profile?seconds=0", headers={"Authorization": "Bearer nope"})
+        assert response.status_code == 401
+
+    def test_returns_collapsed_stacks(self, monkeypatch):
+        import threading
+
+        from starlette.testclient import TestClient
+
+        monkeypatch.setenv("SHUDAIZI_ADMIN_TOKEN", "s3cret")
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_work, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            with TestClient(create_http_app()) as client:
+                response = client.get(
+                    "/admin/profile?seconds=0.3&interval_ms=2", headers={"Authorization": "Bearer s3cret"}
+                )
+        finally:
+            stop.set()
+            worker.join()
+        assert response.status_code == 200
+        assert int(response.headers["X-Profile-Samples"]) > 0
+        lines = response.text.splitlines()
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any(line.startswith("busy-worker;") and ":_busy_work" in line for line in lines)
+
+
+    def test_interval_is_bounded(self, monkeypatch):
+        import time
+
+        from starlette.testclient import TestClient
+
+        monkeypatch.setenv("SHUDAIZI_ADMIN_TOKEN", "s3cret")
+        headers = {"Authorization": "Bearer s3cret"}
+        with TestClient(create_http_app()) as client:
+            for query in ("interval_ms=nan", "seconds=inf", "interval_ms=-inf"):
+                assert client.get(f"/admin/profile?seconds=0&{query}", headers=headers).status_code == 400
+            start = time.monotonic()
+            huge = client.get("/admin/profile?seconds=0.2&interval_ms=1e12", headers=headers)
+            assert huge.status_code == 200 and time.monotonic() - start < 5
+            # the sampler was released, so the next profile is not refused as busy
+            assert client.get("/admin/profile?seconds=0", headers=headers).status_code == 200
+
+
+# ── Startup ───────────────────────────────────────────────────────
+
+
+class TestStartup:
+    """Cold start of the stdio server stays within budget and stays lazy."""
+
+    def test_stdio_launch_to_initialize_within_budget(self, tmp_path):
+        from profile_startup import launch_to_initialize
+
+        # Generous default so slow CI machines pass; tighten locally via env
+        budget_ms = float(os.environ.get("SHUDAIZI_STARTUP_BUDGET_MS", 5000))
+        launch_to_initialize(str(tmp_path))  # warm the bytecode cache
+        elapsed_ms = min(launch_to_initialize(str(tmp_path)) for _ in range(2)) * 1000
+        assert elapsed_ms < budget_ms, f"stdio startup took {elapsed_ms:.0f}ms (budget {budget_ms:.0f}ms)"
+
+    def test_server_import_defers_unneeded_modules(self, tmp_path):
+        from profile_startup import subprocess_env
+
+        code = "import json, sys, shudaizi_mcp.server; print(json.dumps(sorted(sys.modules)))"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            env=subprocess_env(str(tmp_path)), capture_output=True, text=True, check=True,
+        )
+        loaded = set(json.loads(result.stdout))
+        # mcp itself pulls in its transports, starlette and uvicorn; only our own
+        # optional work is checked here
+        for module in ("shudaizi_mcp.knowledge_manager", "anthropic", "opentelemetry.sdk"):
+            assert module not in loaded, f"{module} is imported at startup"
@@ -17,6 +17,7 @@ from mcp.types import (
     ListToolsRequest,
 )
 
+from eval_grading import grader_for
 from shudaizi_mcp.server import create_server
 
 FIXTURES_DIR = Path(__file__).parent / "eval_fixtures"
@@ -110,11 +111,10 @@ class TestChecklistCoverage:
                 "focus": gt.get("focus", ""),
             },
         )
-        checklist_text = result.content[0].text.lower()
+        grade = grader_for(gt).grade(result.content[0].text)
 
-        for finding in gt["expected_findings"]:
-            matched = [kw for kw in finding["keywords"] if kw.lower() in checklist_text]
-            assert matched, (
+        for finding, graded in zip(gt["expected_findings"], grade.findings):
+            assert graded.passed, (
                 f"Fixture '{name}', finding '{finding['id']}': "
                 f"checklist '{gt['task_type']}' contains none of {finding['keywords']}"
             )
@@ -155,11 +155,10 @@ class TestDetailLevelSensitivity:
             "get_task_checklist",
             {"task_type": gt["task_type"], "detail_level": "detailed"},
         )
-        checklist_text = result.content[0].text.lower()
+        grade = grader_for(gt).grade(result.content[0].text)
 
-        for finding in gt["expected_findings"]:
-            matched = [kw for kw in finding["keywords"] if kw.lower() in checklist_text]
-            assert matched, (
+        for finding, graded in zip(gt["expected_findings"], grade.findings):
+            assert graded.passed, (
                 f"Fixture '{name}', finding '{finding['id']}': "
                 f"not found even at 'detailed' level"
             )